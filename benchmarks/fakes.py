@@ -0,0 +1,286 @@
+"""
+Local stand-ins for the external services used by the bot:
+    - a Binance WebSocket server speaking the "!announcement" subscription protocol,
+    - an HTTP server for api.bybit.com/v5/announcements/index,
+    - an HTTP server for api.telegram.org (records delivery times),
+    - a minimal in-memory S3 (GET/PUT object) for BybitStorage.
+All fakes run on their own event loop in a background thread, so they never
+compete with the code under test for the benchmark's event loop.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import urlsplit, parse_qs
+
+import websockets
+
+HREF_RE = re.compile(r'href="([^"]+)"')
+
+class _HttpRequest:
+    def __init__(self, method: str, target: str, headers: dict, body: bytes):
+        self.method = method
+        self.target = target
+        self.headers = headers
+        self.body = body
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+class FakeHttpServer:
+    """Minimal HTTP/1.1 server with keep-alive; routing is done by the handler callable."""
+    def __init__(self, handler: Callable[[_HttpRequest], tuple[int, dict, bytes]]):
+        self.handler = handler
+        self.delay = 0.0 # Seconds every response is held back, to play a slow API
+        self.port: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: set[asyncio.Task] = set()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            # Keep-alive connections outlive the listening socket, end them explicitly
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = b""
+                if headers.get("expect", "").lower() == "100-continue":
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                    await writer.drain()
+                if "content-length" in headers:
+                    body = await reader.readexactly(int(headers["content-length"]))
+
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                status, response_headers, response_body = self.handler(_HttpRequest(method, target, headers, body))
+                head = [f"HTTP/1.1 {status} X", f"Content-Length: {len(response_body)}", "Connection: keep-alive"]
+                head.extend(f"{name}: {value}" for name, value in response_headers.items())
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response_body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+def _json_response(payload, status: int = 200, headers: Optional[dict] = None) -> tuple[int, dict, bytes]:
+    return status, {"Content-Type": "application/json", **(headers or {})}, json.dumps(payload).encode()
+
+class FakeTelegramApi:
+    """Accepts sendMessage/editMessageText and records when each message reached each chat."""
+    def __init__(self, retry_after_every: int = 0):
+        self.server = FakeHttpServer(self._handle)
+        self.retry_after_every = retry_after_every
+        # Chats for which every request fails with 502, to exercise the outbox retries
+        self.failing_chats: set[str] = set()
+        self.deliveries: list[dict] = []
+        self._requests = 0
+        self._message_id = 0
+
+    def _handle(self, request: _HttpRequest):
+        received_at = time.perf_counter()
+        self._requests += 1
+        if self.retry_after_every and self._requests % self.retry_after_every == 0:
+            return _json_response({"ok": False, "error_code": 429, "parameters": {"retry_after": 1}}, status=429)
+
+        payload = json.loads(request.body or b"{}")
+        if payload.get("chat_id") in self.failing_chats:
+            return _json_response({"ok": False, "error_code": 502, "description": "Bad Gateway"}, status=502)
+        method = request.path.rsplit("/", 1)[-1]
+        self._message_id += 1
+        text = payload.get("text", "")
+        hrefs = HREF_RE.findall(text)
+        self.deliveries.append({
+            "method": method,
+            "chat_id": payload.get("chat_id"),
+            "url": hrefs[0] if hrefs else None,
+            "urls": hrefs, # Coalesced messages link several announcements
+            "text": text,
+            "received_at": received_at
+        })
+        return _json_response({"ok": True, "result": {"message_id": self._message_id, "chat": {"id": payload.get("chat_id")}}})
+
+class FakeBybitApi:
+    """Serves /v5/announcements/index from a list the benchmark can replace at any time."""
+    def __init__(self):
+        self.server = FakeHttpServer(self._handle)
+        self.announcements: list[dict] = []
+        self.served_at: dict[str, float] = {}
+        self.request_times: list[float] = []
+
+    def _handle(self, request: _HttpRequest):
+        self.request_times.append(time.perf_counter())
+        if request.path != "/v5/announcements/index":
+            return _json_response({"retCode": 10001, "retMsg": "not found"}, status=404)
+        limit = int(request.query.get("limit", 20))
+        page = int(request.query.get("page", 1))
+        items = self.announcements[(page - 1) * limit:page * limit]
+        now = time.perf_counter()
+        for item in items:
+            self.served_at.setdefault(item["url"], now)
+        return _json_response({
+            "retCode": 0,
+            "retMsg": "OK",
+            "result": {"total": len(self.announcements), "list": items},
+            "time": int(time.time() * 1000)
+        })
+
+class FakeS3:
+    """In-memory object store answering path-style GetObject/PutObject (with ETags)."""
+    def __init__(self):
+        self.server = FakeHttpServer(self._handle)
+        self.objects: dict[str, tuple[bytes, str]] = {}
+        self.requests: list[str] = []
+        self._versions = 0
+
+    def _handle(self, request: _HttpRequest):
+        key = request.path.lstrip("/")
+        self.requests.append(request.method)
+        if request.method == "PUT":
+            if request.headers.get("if-none-match") == "*" and key in self.objects:
+                return 412, {"Content-Type": "application/xml"}, b"<Error><Code>PreconditionFailed</Code></Error>"
+            if_match = request.headers.get("if-match")
+            if if_match and (key not in self.objects or self.objects[key][1] != if_match):
+                return 412, {"Content-Type": "application/xml"}, b"<Error><Code>PreconditionFailed</Code></Error>"
+            self._versions += 1
+            etag = f'"{self._versions}"'
+            self.objects[key] = (request.body, etag)
+            return 200, {"ETag": etag}, b""
+        if request.method in ("GET", "HEAD"):
+            if key not in self.objects:
+                body = (b'<?xml version="1.0" encoding="UTF-8"?><Error><Code>NoSuchKey</Code>'
+                        b'<Message>The specified key does not exist.</Message></Error>')
+                return 404, {"Content-Type": "application/xml"}, body
+            body, etag = self.objects[key]
+            if request.headers.get("if-none-match") == etag:
+                return 304, {"ETag": etag}, b""
+            return 200, {"Content-Type": "application/json", "ETag": etag}, body
+        if request.method == "DELETE":
+            self.objects.pop(key, None)
+            return 204, {}, b""
+        return 405, {}, b""
+
+class FakeBinanceWebSocket:
+    """Accepts SUBSCRIBE to "!announcement" and pushes announcement frames to subscribers."""
+    def __init__(self):
+        self.port: Optional[int] = None
+        self.sent_at: dict[str, float] = {}
+        self._subscribers: set = set()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/ws"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle, "127.0.0.1", 0)
+        self.port = next(iter(self._server.sockets)).getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, websocket, *args):
+        try:
+            async for raw in websocket:
+                request = json.loads(raw)
+                if request.get("method") == "SUBSCRIBE" and "!announcement" in request.get("params", []):
+                    self._subscribers.add(websocket)
+                    await websocket.send(json.dumps({"result": None, "id": request.get("id")}))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self._subscribers.discard(websocket)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def broadcast(self, title: str, url: str):
+        frame = json.dumps({"e": "announcement", "E": int(time.time() * 1000), "t": title, "u": url})
+        self.sent_at[url] = time.perf_counter()
+        for websocket in list(self._subscribers):
+            await websocket.send(frame)
+
+    async def broadcast_raw(self, frame: str):
+        """Pushes a frame exactly as given (e.g. one recorded from the real stream)."""
+        for websocket in list(self._subscribers):
+            await websocket.send(frame)
+
+    async def drop_connection(self):
+        """Closes a single subscriber connection."""
+        for websocket in list(self._subscribers)[:1]:
+            await websocket.close()
+
+    async def drop_connections(self):
+        """Closes every subscriber connection to simulate a server-side disconnect."""
+        for websocket in list(self._subscribers):
+            await websocket.close()
+
+class FakeServices:
+    """Runs all fakes on a dedicated event loop thread."""
+    def __init__(self, telegram_retry_after_every: int = 0):
+        self.telegram = FakeTelegramApi(retry_after_every=telegram_retry_after_every)
+        self.bybit = FakeBybitApi()
+        self.s3 = FakeS3()
+        self.binance = FakeBinanceWebSocket()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="fake-services", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self.call(self._start_all())
+
+    def stop(self):
+        self.call(self._stop_all())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    def call(self, coroutine):
+        """Runs a coroutine on the fakes' loop and waits for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def acall(self, coroutine) -> asyncio.Future:
+        """Schedules a coroutine on the fakes' loop; the result can be awaited from another loop."""
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self.loop))
+
+    async def _start_all(self):
+        await self.telegram.server.start()
+        await self.bybit.server.start()
+        await self.s3.server.start()
+        await self.binance.start()
+
+    async def _stop_all(self):
+        await self.binance.stop()
+        await self.telegram.server.stop()
+        await self.bybit.server.stop()
+        await self.s3.server.stop()
@@ -0,0 +1,552 @@
+"""
+End-to-end latency benchmark: Binance announcement frame -> Telegram message.
+
+Runs the real exchange feeds (BinanceSource, BybitPoller) through the shared
+SourceRegistry pipeline, and handle_bybit_announcements, against the local
+fakes in benchmarks/fakes.py and
+writes per-stage p50/p99 latencies and the maximum sustained frame rate to a
+JSON file. Telegram rate limits are lifted so the numbers reflect the pipeline,
+not Telegram's pacing policy.
+
+Usage (from the repository root):
+    python -m benchmarks.latency_benchmark --output bench_results.json
+    python -m benchmarks.latency_benchmark --baseline bench_results.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+from benchmarks.fakes import FakeServices
+
+# Delisting wave for the coalescing stage
+COALESCE_WINDOW_SECONDS = 0.3
+COALESCE_WAVE_SIZE = 10
+# Delisting frames sent with two-phase alerts (headline, then edit)
+TWO_PHASE_FRAMES = 20
+# Bybit announcements published at once for the backlog stage (several pages)
+BYBIT_BACKLOG_SIZE = 23
+# Binance frames per round of the concurrent feeds stage, and how slow Bybit gets in the second round
+SOURCES_FRAMES = 20
+SOURCES_SLOW_BYBIT_SECONDS = 1.0
+# Leader lease used by the takeover stage (short, so a crash takes over quickly)
+LEADER_LEASE_SECONDS = 0.5
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3)
+    }
+
+def configure_environment(services: FakeServices, chats: int):
+    # Mix of private chats and group topics, like a real CHAT_IDS config
+    chat_ids = []
+    for i in range(chats):
+        if i % 2:
+            chat_ids.append({"chat_id": f"-100{i}", "message_thread_id": i})
+        else:
+            chat_ids.append(str(1000 + i))
+    os.environ.update({
+        "BOT_TOKEN": "bench-token",
+        "CHAT_IDS": json.dumps(chat_ids),
+        "BUCKET_NAME": "bench-bucket",
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "S3_ENDPOINT_URL": services.s3.server.base_url,
+        "TELEGRAM_API_URL": services.telegram.server.base_url,
+        "BYBIT_API_URL": services.bybit.server.base_url,
+        # Only problems, so the handlers' logs don't drown the report
+        "LOG_LEVEL": "WARNING",
+        # Never record the benchmark's own traffic
+        "TRAFFIC_RECORD_DIR": "",
+        # No exchange pair lists: the parsers run on their heuristics unless a stage builds an index
+        "SYMBOL_INDEX_PATH": "",
+        "SYMBOL_INDEX_REFRESH_SECONDS": "0",
+        # Every delivery goes through the durable outbox, as in production
+        "TELEGRAM_OUTBOX_PATH": os.path.join(tempfile.mkdtemp(prefix="bench-outbox-"), "telegram_outbox.sqlite3"),
+        # Handled announcements are archived, as in production
+        "ANNOUNCEMENT_ARCHIVE_PATH": os.path.join(tempfile.mkdtemp(prefix="bench-archive-"), "announcements.sqlite3"),
+        # Per-frame latencies are measured without coalescing; run_binance enables it for the wave stage
+        "ALERT_COALESCE_WINDOW_SECONDS": "0"
+    })
+
+def lift_telegram_rate_limits():
+    from src.bot import output_message_sender
+    output_message_sender.TELEGRAM_GLOBAL_RATE = 1_000_000
+    output_message_sender.TELEGRAM_PRIVATE_CHAT_RATE = 1_000_000
+    output_message_sender.TELEGRAM_GROUP_CHAT_RATE = 1_000_000
+    output_message_sender.TELEGRAM_GROUP_CHAT_BURST = 1_000_000
+
+async def wait_for(condition, timeout: float, interval: float = 0.005) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if condition():
+            return True
+        await asyncio.sleep(interval)
+    return condition()
+
+def delivery_times(services: FakeServices, method: str = "sendMessage") -> dict[str, list[float]]:
+    times: dict[str, list[float]] = {}
+    for delivery in list(services.telegram.deliveries):
+        if delivery["method"] != method:
+            continue
+        for url in delivery["urls"]:
+            times.setdefault(url, []).append(delivery["received_at"])
+    return times
+
+async def run_binance(services: FakeServices, frames: int, interval: float, burst: int, chats: int, connections: int) -> tuple[dict, dict, dict, dict]:
+    from src.handlers.binance_handler import BinanceSource
+    from src.handlers.source_registry import source_registry, stop_output_sender
+
+    handler_started: dict[str, float] = {}
+    handler_finished: dict[str, float] = {}
+
+    source = BinanceSource(connections=connections, stagger_seconds=0.1)
+    source_registry.register(source)
+    process = source_registry.handler_for(source)
+
+    async def timed_handler(announcements):
+        url = announcements[0].url
+        handler_started[url] = time.perf_counter()
+        await process(announcements)
+        handler_finished[url] = time.perf_counter()
+
+    client = source.client
+    client.ws_base_url = services.binance.url
+    listener = asyncio.create_task(source.ingest(timed_handler))
+    if not await wait_for(lambda: services.binance.subscriber_count >= connections, timeout=10):
+        raise RuntimeError("BinanceClient did not subscribe to the fake WebSocket server.")
+
+    # --- Latency: delisting frames spaced out so they don't queue behind each other ---
+    urls = []
+    for i in range(frames):
+        url = f"https://www.binance.com/en/support/announcement/bench-delist-{i}"
+        urls.append(url)
+        await services.acall(services.binance.broadcast(f"Binance Will Delist AB{i % 100}, CD on 2026-03-0{i % 9 + 1}", url))
+        await asyncio.sleep(interval)
+    await wait_for(lambda: all(len(delivery_times(services).get(url, [])) >= chats for url in urls), timeout=30)
+
+    times = delivery_times(services)
+    stages = {"ws_to_handler": [], "handler": [], "frame_to_first_chat": [], "frame_to_last_chat": [], "fanout_spread": []}
+    for url in urls:
+        sent = services.binance.sent_at[url]
+        delivered = times.get(url)
+        if url in handler_started:
+            stages["ws_to_handler"].append(handler_started[url] - sent)
+        if url in handler_finished:
+            stages["handler"].append(handler_finished[url] - handler_started[url])
+        if delivered:
+            stages["frame_to_first_chat"].append(min(delivered) - sent)
+            stages["frame_to_last_chat"].append(max(delivered) - sent)
+            stages["fanout_spread"].append(max(delivered) - min(delivered))
+
+    # --- Throughput: a burst of non-delisting announcements sent as fast as possible ---
+    handled_before = len(handler_finished)
+    burst_started = time.perf_counter()
+    for i in range(burst):
+        await services.acall(services.binance.broadcast(
+            f"Binance Will List Bench Token (BT{i % 1000})",
+            f"https://www.binance.com/en/support/announcement/bench-list-{i}"
+        ))
+    await wait_for(lambda: len(handler_finished) - handled_before + client.dispatcher.dropped >= burst, timeout=60)
+    elapsed = max(handler_finished.values()) - burst_started
+    handled = len(handler_finished) - handled_before
+    throughput = {
+        "frames_sent": burst,
+        "frames_handled": handled,
+        "frames_dropped": client.dispatcher.dropped,
+        "seconds": round(elapsed, 4),
+        "frames_per_second": round(handled / elapsed, 1) if elapsed > 0 else None
+    }
+
+    # --- Failover: the server drops one connection while frames keep coming ---
+    failover_urls = []
+    for i in range(20):
+        if i == 5:
+            await services.acall(services.binance.drop_connection())
+        url = f"https://www.binance.com/en/support/announcement/bench-failover-{i}"
+        failover_urls.append(url)
+        await services.acall(services.binance.broadcast(f"Binance Will Delist FO{i} on 2026-03-01", url))
+        await asyncio.sleep(0.05)
+    await wait_for(lambda: services.binance.subscriber_count >= connections, timeout=30)
+    failover = {
+        "connections": connections,
+        "frames_sent": len(failover_urls),
+        "frames_missed": sum(1 for url in failover_urls if url not in handler_started),
+        "failover_gaps": client.stats.failover_gaps,
+        "covered_disconnects": client.stats.covered_disconnects,
+        "max_failover_gap_ms": round(client.stats.max_failover_gap_seconds * 1000, 3),
+        "duplicate_frames_suppressed": client.stats.duplicate_frames
+    }
+
+    # --- Two-phase: the headline goes out right after classification, the parsed alert as an edit ---
+    source_registry.two_phase = True
+    two_phase_urls = []
+    for i in range(TWO_PHASE_FRAMES):
+        url = f"https://www.binance.com/en/support/announcement/bench-two-phase-{i}"
+        two_phase_urls.append(url)
+        await services.acall(services.binance.broadcast(f"Binance Will Delist TP{i}, QR on 2026-03-01", url))
+        await asyncio.sleep(interval)
+    await wait_for(lambda: all(len(delivery_times(services, "editMessageText").get(url, [])) >= chats for url in two_phase_urls), timeout=30)
+    source_registry.two_phase = False
+    headlines, edits = delivery_times(services), delivery_times(services, "editMessageText")
+    stages["two_phase_frame_to_last_headline"] = []
+    stages["two_phase_frame_to_last_edit"] = []
+    for url in two_phase_urls:
+        sent = services.binance.sent_at[url]
+        if url in headlines:
+            stages["two_phase_frame_to_last_headline"].append(max(headlines[url]) - sent)
+        if url in edits:
+            stages["two_phase_frame_to_last_edit"].append(max(edits[url]) - sent)
+
+    # --- Coalescing: a delisting wave inside one window ends up in few messages per chat ---
+    window_seconds = source_registry.alert_coalescer.window_seconds
+    source_registry.alert_coalescer.window_seconds = COALESCE_WINDOW_SECONDS
+    await asyncio.sleep(0.2)
+    requests_before = len(services.telegram.deliveries)
+    wave_urls = []
+    for i in range(COALESCE_WAVE_SIZE):
+        url = f"https://www.binance.com/en/support/announcement/bench-wave-{i}"
+        wave_urls.append(url)
+        await services.acall(services.binance.broadcast(f"Binance Will Delist WV{i} on 2026-03-01", url))
+        await asyncio.sleep(0.01)
+    await wait_for(lambda: all(len(delivery_times(services).get(url, [])) >= chats for url in wave_urls), timeout=30)
+    times = delivery_times(services)
+    coalescing = {
+        "window_seconds": COALESCE_WINDOW_SECONDS,
+        "alerts": len(wave_urls),
+        "telegram_requests": len(services.telegram.deliveries) - requests_before,
+        "requests_without_coalescing": len(wave_urls) * chats,
+        "first_alert_to_last_chat_ms": round((max(times[wave_urls[0]]) - services.binance.sent_at[wave_urls[0]]) * 1000, 3),
+        "last_alert_to_last_chat_ms": round((max(times[wave_urls[-1]]) - services.binance.sent_at[wave_urls[-1]]) * 1000, 3)
+    }
+
+    await source.aclose()
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+    await stop_output_sender()
+    source_registry.alert_coalescer.window_seconds = window_seconds
+    return {f"binance.{name}": summarize(samples) for name, samples in stages.items()}, throughput, failover, coalescing
+
+async def run_bybit(services: FakeServices, rounds: int, per_round: int) -> dict:
+    from src.handlers.bybit_handler import handle_bybit_announcements
+
+    invocation, end_to_end = [], []
+    for round_number in range(rounds):
+        fresh = [{
+            "title": f"Delisting of BENCH{round_number}X{i}USDT Perpetual Contract",
+            "description": f"Bybit will be delisting the BENCH{round_number}X{i}USDT Perpetual Contract at Feb 11, 2026, 9:00AM UTC.",
+            "type": {"title": "Delistings", "key": "delistings"},
+            "tags": ["Derivatives"],
+            "url": f"https://announcements.bybit.com/en/article/bench-{round_number}-{i}",
+            "dateTimestamp": int(time.time() * 1000),
+            "publishTime": int(time.time() * 1000) + i
+        } for i in range(per_round)]
+        services.bybit.announcements = fresh + services.bybit.announcements
+
+        started = time.perf_counter()
+        result = await asyncio.to_thread(handle_bybit_announcements, None, None)
+        invocation.append(time.perf_counter() - started)
+        if result.get("statusCode") != 200:
+            raise RuntimeError(f"Bybit handler failed: {result}")
+
+        times = delivery_times(services)
+        for item in fresh:
+            delivered = times.get(item["url"])
+            if delivered:
+                end_to_end.append(max(delivered) - services.bybit.served_at[item["url"]])
+
+    return {"bybit.invocation": summarize(invocation), "bybit.response_to_last_chat": summarize(end_to_end)}
+
+async def run_bybit_poller(services: FakeServices, rounds: int, per_round: int, chats: int) -> dict:
+    from src.handlers.bybit_handler import BybitPoller
+    from src.handlers.source_registry import source_registry, stop_output_sender
+    from src.repositories.http.http_client import get_http_client, close_http_client
+
+    poller = BybitPoller(min_interval=0.05, max_interval=0.5, http_client=get_http_client())
+    source_registry.register(poller)
+    task = asyncio.create_task(poller.ingest(source_registry.handler_for(poller)))
+    publish_to_last_chat, backlog_to_last_chat = [], []
+
+    async def publish(prefix: str, count: int, samples: list):
+        fresh = [{
+            "title": f"Delisting of {prefix}X{i}USDT Perpetual Contract",
+            "description": f"Bybit will be delisting the {prefix}X{i}USDT Perpetual Contract at Feb 11, 2026, 9:00AM UTC.",
+            "url": f"https://announcements.bybit.com/en/article/{prefix.lower()}-{i}",
+            "publishTime": int(time.time() * 1000) + i
+        } for i in reversed(range(count))]
+        published_at = time.perf_counter()
+        services.bybit.announcements = fresh + services.bybit.announcements
+        await wait_for(lambda: all(len(delivery_times(services).get(item["url"], [])) >= chats for item in fresh), timeout=10)
+        times = delivery_times(services)
+        samples.extend(max(times[item["url"]]) - published_at for item in fresh if item["url"] in times)
+        # Let the poller back off a little before the next announcement
+        await asyncio.sleep(0.2)
+
+    try:
+        for round_number in range(rounds):
+            await publish(f"POLL{round_number}", per_round, publish_to_last_chat)
+        # More announcements than fit on one page: caught up through the watermark walk
+        await publish("BACKLOG", BYBIT_BACKLOG_SIZE, backlog_to_last_chat)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await poller.aclose()
+        await stop_output_sender()
+        await close_http_client()
+    return {
+        "bybit_poller.publish_to_last_chat": summarize(publish_to_last_chat),
+        "bybit_poller.backlog_to_last_chat": summarize(backlog_to_last_chat)
+    }
+
+async def run_concurrent_feeds(services: FakeServices, interval: float, chats: int) -> dict:
+    """
+    Binance and Bybit feeds registered together and run by one SourceRegistry:
+    Binance frame-to-last-chat latency with a healthy Bybit API, then with every
+    Bybit response held back SOURCES_SLOW_BYBIT_SECONDS. The two should match.
+    """
+    from src.handlers.binance_handler import BinanceSource
+    from src.handlers.bybit_handler import BybitPoller
+    from src.handlers.source_registry import SourceRegistry, alert_coalescer, stop_output_sender
+    from src.repositories.http.http_client import get_http_client, close_http_client
+    from src.utils.dedup_index import DedupIndex
+
+    registry = SourceRegistry(alert_coalescer, DedupIndex(max_items=10000, ttl_seconds=3600))
+    binance_source = BinanceSource(connections=1)
+    binance_source.client.ws_base_url = services.binance.url
+    registry.register(binance_source)
+    registry.register(BybitPoller(min_interval=0.05, max_interval=0.2, http_client=get_http_client()))
+    task = asyncio.create_task(registry.run())
+    stages = {}
+    try:
+        if not await wait_for(lambda: services.binance.subscriber_count >= 1, timeout=10):
+            raise RuntimeError("BinanceSource did not subscribe to the fake WebSocket server.")
+        for stage, bybit_delay in (("healthy_bybit", 0.0), ("slow_bybit", SOURCES_SLOW_BYBIT_SECONDS)):
+            services.bybit.server.delay = bybit_delay
+            urls = []
+            for i in range(SOURCES_FRAMES):
+                url = f"https://www.binance.com/en/support/announcement/bench-sources-{stage}-{i}"
+                urls.append(url)
+                await services.acall(services.binance.broadcast(f"Binance Will Delist SR{i}, {stage.upper()[:2]} on 2026-03-01", url))
+                await asyncio.sleep(interval)
+            await wait_for(lambda: all(len(delivery_times(services).get(url, [])) >= chats for url in urls), timeout=30)
+            times = delivery_times(services)
+            stages[f"sources.binance_frame_to_last_chat_{stage}"] = summarize([
+                max(times[url]) - services.binance.sent_at[url] for url in urls if url in times
+            ])
+    finally:
+        services.bybit.server.delay = 0.0
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await registry.aclose()
+        await stop_output_sender()
+        await close_http_client()
+    return stages
+
+async def run_leader_election(rounds: int) -> tuple[dict, dict]:
+    """
+    Two instances with S3 leases against the fake bucket: how long a standby takes
+    to become leader after the leader crashes (stops renewing) or releases the
+    lease on shutdown, and whether both ever considered themselves leader.
+    """
+    from src.repositories.leader.leader_lease import S3Lease
+    from src.utils.leader_election import LeaderElector
+
+    def start(instance_id: str) -> tuple[LeaderElector, asyncio.Task]:
+        lease = S3Lease(instance_id, ttl_seconds=LEADER_LEASE_SECONDS, storage_file_name="bench_leader_lease.json")
+        elector = LeaderElector(lease, ttl_seconds=LEADER_LEASE_SECONDS)
+        return elector, asyncio.create_task(elector.run())
+
+    samples = {"leader.takeover_after_crash": [], "leader.takeover_after_release": []}
+    overlaps = 0
+    leader, leader_task = start("bench-0")
+    for round_number in range(rounds):
+        for stage in samples:
+            while not leader.is_leader:
+                await asyncio.sleep(0.01)
+            standby, standby_task = start(f"bench-{round_number}-{stage}")
+            for _ in range(int(LEADER_LEASE_SECONDS * 100)):
+                await asyncio.sleep(0.02)
+                overlaps += leader.is_leader and standby.is_leader
+            if stage == "leader.takeover_after_crash":
+                leader.lease.release = lambda: None # a crashed leader never releases
+            leader_task.cancel()
+            await asyncio.gather(leader_task, return_exceptions=True)
+            stopped = time.perf_counter()
+            while not standby.is_leader:
+                await asyncio.sleep(0.005)
+            samples[stage].append(time.perf_counter() - stopped)
+            leader, leader_task = standby, standby_task
+    leader_task.cancel()
+    await asyncio.gather(leader_task, return_exceptions=True)
+    return {name: summarize(values) for name, values in samples.items()}, {"overlapping_leader_samples": overlaps}
+
+def run_parsers(iterations: int) -> dict:
+    from src.utils.binance.binance_parser import parse_announcement_title
+    from src.utils.bybit.bybit_parser import parse_description
+    from src.utils.output_message_formatter import format_delisting_message
+    from src.utils.symbol_index import SymbolIndex
+
+    titles = [
+        "Binance Will Delist ACA, CHESS, DATA, DF, GHST, NKN on 2024-03-06",
+        "Notice of Removal of Spot Trading Pairs - 2024-05-10",
+        "Binance Will Delist BETA, VGX on Mar 1, 2024"
+    ]
+    descriptions = [
+        "Bybit will be delisting the SAROSUSDT Perpetual Contract at Feb 11, 2026, 9:00AM UTC.",
+        "Delisting of COQ and VRA on the 11th of Feb 2026 at 10:00 UTC",
+        "Token swap and rebranding of MANTRA (OM) to MANTRA (MANTRA) on 2025-01-02 08:00"
+    ]
+    # Same texts against an index the size of the real pair lists
+    symbol_index = SymbolIndex()
+    symbol_index.add_pairs("bench", [
+        (f"COIN{i}{quote}", f"COIN{i}", quote) for i in range(1500) for quote in ("USDT", "BTC")
+    ] + [
+        (f"{base}USDT", base, "USDT") for base in ("ACA", "CHESS", "DATA", "DF", "GHST", "NKN", "BETA", "VGX", "SAROS", "COQ", "VRA", "OM")
+    ])
+
+    stages = {
+        "parse.binance_title": [], "parse.bybit_description": [], "format.message": [],
+        "parse.binance_title_indexed": [], "parse.bybit_description_indexed": []
+    }
+    for i in range(iterations):
+        title, description = titles[i % len(titles)], descriptions[i % len(descriptions)]
+        started = time.perf_counter()
+        parsed = parse_announcement_title(title)
+        parsed_at = time.perf_counter()
+        parse_description(description)
+        described_at = time.perf_counter()
+        format_delisting_message("BINANCE", parsed["tickers"], parsed["date"], parsed["time"], "https://example.com")
+        formatted_at = time.perf_counter()
+        parse_announcement_title(title, symbol_index)
+        indexed_at = time.perf_counter()
+        parse_description(description, symbol_index)
+        described_indexed_at = time.perf_counter()
+        stages["parse.binance_title"].append(parsed_at - started)
+        stages["parse.bybit_description"].append(described_at - parsed_at)
+        stages["format.message"].append(formatted_at - described_at)
+        stages["parse.binance_title_indexed"].append(indexed_at - formatted_at)
+        stages["parse.bybit_description_indexed"].append(described_indexed_at - indexed_at)
+    return {name: summarize(samples) for name, samples in stages.items()}
+
+def compare_with_baseline(results: dict, baseline_path: str, tolerance: float) -> list[str]:
+    """Returns a description of every stage whose p50/p99 regressed by more than the tolerance."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous or not current.get("count") or not previous.get("count"):
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if previous[key] > 0 and current[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{stage} {key}: {previous[key]} -> {current[key]}")
+    previous_fps = baseline.get("throughput", {}).get("frames_per_second")
+    current_fps = results["throughput"].get("frames_per_second")
+    if previous_fps and current_fps and current_fps < previous_fps * (1 - tolerance):
+        regressions.append(f"throughput frames_per_second: {previous_fps} -> {current_fps}")
+    return regressions
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args) -> dict:
+    services = FakeServices()
+    services.start()
+    try:
+        configure_environment(services, args.chats)
+        lift_telegram_rate_limits()
+        # Same queued logging as production, so its cost is part of the numbers
+        from src.utils.logging_setup import setup_logging, stop_logging
+        setup_logging("WARNING", json_output=False)
+
+        stages = run_parsers(args.parse_iterations)
+        binance_stages, throughput, failover, coalescing = await run_binance(
+            services, args.frames, args.interval, args.burst, args.chats, args.connections
+        )
+        stages.update(binance_stages)
+        stages.update(await run_bybit(services, args.bybit_rounds, args.bybit_per_round))
+        stages.update(await run_bybit_poller(services, args.bybit_rounds, args.bybit_per_round, args.chats))
+        stages.update(await run_concurrent_feeds(services, args.interval, args.chats))
+        leader_stages, leader_election = await run_leader_election(args.leader_rounds)
+        stages.update(leader_stages)
+    finally:
+        services.stop()
+        stop_logging()
+
+    return {
+        "benchmark": "latency",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "stages": stages,
+        "throughput": throughput,
+        "failover": failover,
+        "coalescing": coalescing,
+        "leader_election": leader_election
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200, help="Delisting frames for the latency run.")
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between latency frames.")
+    parser.add_argument("--burst", type=int, default=2000, help="Frames sent back-to-back for the throughput run.")
+    parser.add_argument("--connections", type=int, default=2, help="Redundant Binance WebSocket connections.")
+    parser.add_argument("--chats", type=int, default=40, help="Number of configured chats/topics.")
+    parser.add_argument("--bybit-rounds", type=int, default=20, help="handle_bybit_announcements invocations.")
+    parser.add_argument("--bybit-per-round", type=int, default=3, help="New Bybit announcements per invocation.")
+    parser.add_argument("--leader-rounds", type=int, default=3, help="Leader crash/release takeovers to time.")
+    parser.add_argument("--parse-iterations", type=int, default=20000, help="Iterations of the parser microbenchmark.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--baseline", help="Previous results file to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown against the baseline.")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for stage, summary in results["stages"].items():
+        if summary.get("count"):
+            print(f"{stage:32} p50={summary['p50_ms']:>9.3f}ms  p99={summary['p99_ms']:>9.3f}ms  n={summary['count']}")
+    print(f"{'binance.throughput':32} {results['throughput']['frames_per_second']} frames/s "
+          f"({results['throughput']['frames_dropped']} dropped)")
+    print(f"{'binance.failover':32} {results['failover']['frames_missed']}/{results['failover']['frames_sent']} frames missed, "
+          f"max gap {results['failover']['max_failover_gap_ms']}ms over {results['failover']['failover_gaps']} gaps")
+    print(f"{'binance.coalescing':32} {results['coalescing']['alerts']} alerts in "
+          f"{results['coalescing']['telegram_requests']} requests "
+          f"(vs {results['coalescing']['requests_without_coalescing']}), "
+          f"last alert delivered after {results['coalescing']['last_alert_to_last_chat_ms']}ms")
+    print(f"{'leader.exclusivity':32} {results['leader_election']['overlapping_leader_samples']} samples with two leaders")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Replays recorded exchange traffic through the real handlers.
+
+Reads the gzip logs written with TRAFFIC_RECORD_DIR set, pushes the Binance
+frames through the local fake WebSocket into a real BinanceSource and serves
+the Bybit responses from the fake Bybit API to a real BybitPoller (both through
+the shared SourceRegistry pipeline), with
+Telegram and S3 replaced by the fakes in benchmarks/fakes.py. The original
+timing is kept at --speed 1, compressed at --speed N, or dropped entirely
+with --speed max.
+
+The report has throughput numbers and the parse result of every delisting
+announcement; against a --baseline report any parse that changed is listed
+(and the exit code is 1), which makes a recorded log a parser regression test.
+
+Usage (from the repository root):
+    python -m benchmarks.replay traffic/ --speed 10 --output replay_report.json
+    python -m benchmarks.replay traffic/ --speed max --baseline replay_report.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Optional
+
+from benchmarks.fakes import FakeServices
+from benchmarks.latency_benchmark import configure_environment, lift_telegram_rate_limits, wait_for
+
+def parse_speed(value: str) -> Optional[float]:
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'.")
+    return speed
+
+async def wait_for_quiet(progress, quiet: float, timeout: float):
+    """Waits until progress() has not changed for `quiet` seconds (or the timeout)."""
+    deadline = time.perf_counter() + timeout
+    last_value, last_change = progress(), time.perf_counter()
+    while time.perf_counter() < deadline and time.perf_counter() - last_change < quiet:
+        await asyncio.sleep(0.05)
+        value = progress()
+        if value != last_value:
+            last_value, last_change = value, time.perf_counter()
+
+def build_timeline(records: list[dict]) -> list[tuple[float, str, object]]:
+    """
+    Turns records into (received_at, kind, payload) events.
+    Bybit responses of one poll (a first page and the pages fetched after it)
+    become a single "bybit" event carrying the concatenated list.
+    """
+    timeline = []
+    for record in records:
+        if record["source"] == "binance":
+            timeline.append((record["received_at"], "binance", record["data"]))
+        elif record["source"] == "bybit":
+            try:
+                items = json.loads(record["data"])["result"]["list"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if record.get("page", 1) == 1 or not timeline or timeline[-1][1] != "bybit":
+                timeline.append((record["received_at"], "bybit", list(items)))
+            else:
+                timeline[-1][2].extend(item for item in items if item not in timeline[-1][2])
+    return timeline
+
+def collect_parses(timeline: list[tuple[float, str, object]]) -> dict:
+    """Parse result of every delisting announcement in the log, keyed by exchange and URL (or title)."""
+    from src.handlers.binance_handler import is_delisting_title
+    from src.models.announcement import decode_binance_frame
+    from src.utils.binance.binance_parser import parse_announcement_title
+    from src.utils.bybit.bybit_parser import parse_description
+
+    parses = {}
+    for _, kind, payload in timeline:
+        if kind == "binance":
+            announcement = decode_binance_frame(payload)
+            if announcement is not None and is_delisting_title(announcement.title):
+                parses[f"binance:{announcement.url or announcement.title}"] = {
+                    "text": announcement.title, **parse_announcement_title(announcement.title)
+                }
+        else:
+            for item in payload:
+                if "description" in item and "url" in item:
+                    parses[f"bybit:{item['url']}"] = {"text": item["description"], **parse_description(item["description"])}
+    return parses
+
+def compare_parses(parses: dict, baseline_path: str) -> list[dict]:
+    with open(baseline_path) as f:
+        baseline = json.load(f).get("parses", {})
+    return [
+        {"key": key, "before": baseline[key], "after": parsed}
+        for key, parsed in parses.items()
+        if key in baseline and baseline[key] != parsed
+    ]
+
+async def replay(services: FakeServices, timeline: list[tuple[float, str, object]], speed: Optional[float], chats: int) -> dict:
+    from src.handlers.binance_handler import BinanceSource
+    from src.handlers.bybit_handler import BybitPoller
+    from src.handlers.source_registry import source_registry, stop_output_sender
+    from src.models.announcement import decode_binance_frame
+
+    handled = 0
+    source = BinanceSource(connections=1)
+    source_registry.register(source)
+    process = source_registry.handler_for(source)
+
+    async def counting_handler(announcements):
+        nonlocal handled
+        await process(announcements)
+        handled += len(announcements)
+
+    client = source.client
+    client.ws_base_url = services.binance.url
+    listener = asyncio.create_task(source.ingest(counting_handler))
+    if not await wait_for(lambda: services.binance.subscriber_count >= 1, timeout=10):
+        raise RuntimeError("BinanceClient did not subscribe to the fake WebSocket server.")
+
+    has_bybit = any(kind == "bybit" for _, kind, _ in timeline)
+    poller = poller_task = None
+    if has_bybit:
+        # Poll often enough to see every recorded change, even when accelerated
+        poller = BybitPoller(min_interval=0.05, max_interval=0.2)
+        source_registry.register(poller)
+        poller_task = asyncio.create_task(poller.ingest(source_registry.handler_for(poller)))
+
+    announcements = sum(1 for _, kind, data in timeline if kind == "binance" and decode_binance_frame(data) is not None)
+    bybit_urls = {item["url"] for _, kind, items in timeline if kind == "bybit" for item in items if "url" in item}
+
+    started = time.perf_counter()
+    first_at = timeline[0][0] if timeline else 0.0
+    for received_at, kind, payload in timeline:
+        if speed is not None:
+            delay = (received_at - first_at) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if kind == "binance":
+            await services.acall(services.binance.broadcast_raw(payload))
+        else:
+            services.bybit.announcements = payload
+    fed = time.perf_counter() - started
+
+    await wait_for(lambda: handled + client.dispatcher.dropped >= announcements, timeout=60)
+    binance_done = time.perf_counter() - started
+
+    def bybit_delivered() -> int:
+        delivered = {url for delivery in list(services.telegram.deliveries) for url in delivery["urls"]}
+        return len(bybit_urls & delivered)
+    if has_bybit:
+        # Announcements older than the poller's first page are never sent, so wait for quiet instead
+        await wait_for_quiet(bybit_delivered, quiet=1.0, timeout=30)
+
+    await source.aclose()
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+    if poller is not None:
+        poller_task.cancel()
+        await asyncio.gather(poller_task, return_exceptions=True)
+        await poller.aclose()
+    await stop_output_sender()
+
+    binance_frames = sum(1 for _, kind, _ in timeline if kind == "binance")
+    return {
+        "binance": {
+            "frames": binance_frames,
+            "announcements": announcements,
+            "handled": handled,
+            "dropped": client.dispatcher.dropped,
+            "seconds": round(binance_done, 4),
+            "frames_per_second": round(binance_frames / binance_done, 1) if binance_done > 0 else None
+        },
+        "bybit": {
+            "responses": sum(1 for _, kind, _ in timeline if kind == "bybit"),
+            "announcements": len(bybit_urls),
+            "delivered": bybit_delivered() if has_bybit else 0
+        },
+        "feed_seconds": round(fed, 4),
+        "telegram_requests": len(services.telegram.deliveries),
+        "telegram_chats": chats
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="Traffic log files or directories (TRAFFIC_RECORD_DIR).")
+    parser.add_argument("--speed", type=parse_speed, default=None, help="Playback speed factor, or 'max' (default).")
+    parser.add_argument("--chats", type=int, default=5, help="Number of fake Telegram chats.")
+    parser.add_argument("--output", default="replay_report.json", help="Where to write the JSON report.")
+    parser.add_argument("--baseline", help="Previous report whose parse results must not change.")
+    args = parser.parse_args(argv)
+
+    from src.utils.traffic_recorder import read_traffic
+    timeline = build_timeline(read_traffic(args.paths))
+    if not timeline:
+        print("No recorded traffic found.")
+        return 1
+
+    services = FakeServices()
+    services.start()
+    try:
+        configure_environment(services, args.chats)
+        lift_telegram_rate_limits()
+        results = asyncio.run(replay(services, timeline, args.speed, args.chats))
+    finally:
+        services.stop()
+
+    parses = collect_parses(timeline)
+    report = {
+        "replay": "traffic",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "speed": args.speed or "max",
+        "paths": args.paths,
+        **results,
+        "parses": parses
+    }
+    if args.baseline:
+        report["parse_differences"] = compare_parses(parses, args.baseline)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    binance = report["binance"]
+    print(f"binance: {binance['frames']} frames, {binance['handled']} announcements handled, "
+          f"{binance['dropped']} dropped, {binance['frames_per_second']} frames/s")
+    print(f"bybit: {report['bybit']['responses']} responses, {report['bybit']['announcements']} announcements, "
+          f"{report['bybit']['delivered']} delivered")
+    print(f"telegram: {report['telegram_requests']} requests, {len(parses)} delisting parses")
+    print(f"Report written to {args.output}")
+
+    for difference in report.get("parse_differences", []):
+        print(f"PARSE CHANGED {difference['key']}: {difference['before']} -> {difference['after']}")
+    return 1 if report.get("parse_differences") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
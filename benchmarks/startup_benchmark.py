@@ -0,0 +1,139 @@
+"""
+Cold start benchmark for the Bybit cloud-function entry point.
+
+Starts a fresh interpreter per run, like a new cloud-function instance, and
+measures against the local fakes in benchmarks/fakes.py:
+    - process_start: spawning the interpreter until its first line runs,
+    - import: importing src.handlers.bybit_handler,
+    - first_request: spawning the interpreter until the Bybit request arrives,
+    - cold_invocation: the first handle_bybit_announcements call (one new announcement),
+    - cold_total: import + cold_invocation, the billed part of a cold start,
+    - warm_invocation: the following calls on the same instance (nothing new).
+Times across processes use time.perf_counter(), a system-wide monotonic clock on Linux.
+
+Usage (from the repository root):
+    python -m benchmarks.startup_benchmark --output startup_results.json
+    python -m benchmarks.startup_benchmark --baseline startup_results.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.fakes import FakeServices
+from benchmarks.latency_benchmark import configure_environment, git_revision, summarize
+
+# Runs in the fresh interpreter: nothing but the handler's own imports is loaded before it
+CHILD_SCRIPT = """
+import time
+started = time.perf_counter()
+import json
+import sys
+from src.handlers.bybit_handler import handle_bybit_announcements
+imported = time.perf_counter()
+invocations = []
+for _ in range(1 + int(sys.argv[1])):
+    invocation_started = time.perf_counter()
+    result = handle_bybit_announcements(None, None)
+    invocations.append(time.perf_counter() - invocation_started)
+    if result.get("statusCode") != 200:
+        raise SystemExit(f"Bybit handler failed: {result}")
+print(json.dumps({"started": started, "import": imported - started, "invocations": invocations}))
+"""
+
+def run_instance(services: FakeServices, run_number: int, warm_calls: int) -> dict:
+    """Runs one cold instance and returns its timings in seconds."""
+    now = int(time.time() * 1000)
+    services.bybit.announcements = [{
+        "title": f"Delisting of COLD{run_number}USDT Perpetual Contract",
+        "description": f"Bybit will be delisting the COLD{run_number}USDT Perpetual Contract at Feb 11, 2026, 9:00AM UTC.",
+        "type": {"title": "Delistings", "key": "delistings"},
+        "tags": ["Derivatives"],
+        "url": f"https://announcements.bybit.com/en/article/cold-{run_number}",
+        "dateTimestamp": now,
+        "publishTime": now
+    }] + services.bybit.announcements
+    requests_before = len(services.bybit.request_times)
+
+    spawned = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, str(warm_calls)],
+        capture_output=True, text=True, env=os.environ.copy()
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Cold start run failed:\n{completed.stderr}")
+    child = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    return {
+        "process_start": child["started"] - spawned,
+        "import": child["import"],
+        "first_request": services.bybit.request_times[requests_before] - spawned,
+        "cold_invocation": child["invocations"][0],
+        "cold_total": child["import"] + child["invocations"][0],
+        "warm_invocations": child["invocations"][1:]
+    }
+
+def run(args) -> dict:
+    services = FakeServices()
+    services.start()
+    try:
+        configure_environment(services, args.chats)
+        samples: dict[str, list[float]] = {}
+        for run_number in range(args.runs):
+            timings = run_instance(services, run_number, args.warm_calls)
+            for stage in ("process_start", "import", "first_request", "cold_invocation", "cold_total"):
+                samples.setdefault(stage, []).append(timings[stage])
+            samples.setdefault("warm_invocation", []).extend(timings["warm_invocations"])
+    finally:
+        services.stop()
+
+    return {
+        "benchmark": "startup",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": git_revision(),
+        "python": sys.version.split()[0],
+        "parameters": vars(args),
+        "stages": {f"startup.{stage}": summarize(values) for stage, values in samples.items()}
+    }
+
+def compare_with_baseline(results: dict, baseline_path: str, tolerance: float) -> list[str]:
+    """Returns a description of every stage whose p50 regressed by more than the tolerance."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous and previous.get("count") and current.get("count"):
+            if previous["p50_ms"] > 0 and current["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+                regressions.append(f"{stage} p50_ms: {previous['p50_ms']} -> {current['p50_ms']}")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Cold instances to start.")
+    parser.add_argument("--warm-calls", type=int, default=5, help="Warm invocations per instance after the cold one.")
+    parser.add_argument("--chats", type=int, default=4, help="Number of configured chats/topics.")
+    parser.add_argument("--output", default="startup_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--baseline", help="Previous results file to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown against the baseline.")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for stage, summary in results["stages"].items():
+        print(f"{stage:32} p50={summary['p50_ms']:>9.3f}ms  p99={summary['p99_ms']:>9.3f}ms  n={summary['count']}")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
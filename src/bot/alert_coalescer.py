@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+from src.bot.output_message_sender import OutputMessageSender
+from src.models.output_message import DelistingAlert
+from src.utils.output_message_formatter import format_delisting_alerts
+
+logger = logging.getLogger(__name__)
+
+class AlertCoalescer:
+    """
+    Batches delisting alerts that arrive close together into one message per chat.
+
+    The first alert after a quiet period is sent immediately and opens a window of
+    window_seconds. Alerts arriving inside the window are held back and sent as one
+    multi-section message (split at Telegram's length limit) when it closes; if
+    anything was sent, a new window opens, so a delisting wave costs one message
+    per chat per window instead of one per announcement.
+    With window_seconds <= 0 every alert is sent on its own.
+    """
+    def __init__(self, output_sender: OutputMessageSender, window_seconds: float = 2.0):
+        self.output_sender = output_sender
+        self.window_seconds = window_seconds
+        self._pending: list[DelistingAlert] = []
+        # Messages of the batch being sent that the sender hasn't taken yet
+        self._unsent: list[str] = []
+        self._window_task: Optional[asyncio.Task] = None
+
+    async def send_alert(self, alert: DelistingAlert):
+        """
+        Sends the alert now (no open window) or queues it for the end of the window.
+        Only the immediate path waits for delivery.
+        """
+        await self.send_alerts([alert])
+
+    async def send_alerts(self, alerts: list[DelistingAlert]):
+        """Same as send_alert for alerts that arrived together (e.g. one poll); they are merged either way."""
+        if not alerts:
+            return
+        if self.window_seconds > 0:
+            if self._window_task is not None:
+                self._pending.extend(alerts)
+                return
+            self._window_task = asyncio.create_task(self._run_window())
+        await self._send(alerts)
+
+    async def send_alerts_in_two_phases(
+        self,
+        headlines: list[DelistingAlert],
+        build_alerts: Callable[[], list[DelistingAlert]]
+    ) -> list[DelistingAlert]:
+        """
+        Two-phase variant of send_alerts: the headlines (exchange and link only)
+        go out right away while build_alerts() parses the announcements, then the
+        messages are edited in place to the full alerts. Parsing is off the path
+        to the first notification, the chats still end up with one message per alert.
+        Inside an open window the full alerts are queued as usual instead.
+        Args:
+            headlines: Minimal alerts, one per announcement, in order.
+            build_alerts: Returns the full alerts for the same announcements.
+        Returns:
+            The full alerts.
+        """
+        if not headlines:
+            return []
+        if self.window_seconds > 0:
+            if self._window_task is not None:
+                alerts = build_alerts()
+                self._pending.extend(alerts)
+                return alerts
+            self._window_task = asyncio.create_task(self._run_window())
+
+        headline_messages = format_delisting_alerts(headlines)
+        sending = asyncio.create_task(self._send_messages(headline_messages))
+        # The first headline is on its way; parse (and publish to the stream) while they are sent,
+        # so the stream never waits for the Telegram fan-out
+        await asyncio.sleep(0)
+        try:
+            alerts = build_alerts()
+        finally:
+            sent = await sending
+        messages = format_delisting_alerts(alerts)
+        for sent_messages, headline_message, message in zip(sent, headline_messages, messages):
+            if message == headline_message:
+                continue
+            edited = await self.output_sender.edit_telegram_messages(sent_messages, message)
+            # Chats whose headline was left to the outbox (no message to edit) or whose
+            # edit failed get the full alert as a new message, delivered through the outbox
+            missing = [chat for chat in self.output_sender.chats if chat not in edited]
+            if missing:
+                await self.output_sender.send_telegram_message(message, chats=missing)
+        # Full sections are never shorter than headlines, so they may need more messages, never fewer
+        for message in messages[len(sent):]:
+            await self.output_sender.send_telegram_message(message)
+        return alerts
+
+    async def _send_messages(self, messages: list[str]) -> list[list[tuple[str, int]]]:
+        return [await self.output_sender.send_telegram_message(message) for message in messages]
+
+    async def _send(self, alerts: list[DelistingAlert]):
+        # Sequential, so the parts of a split message arrive in order
+        for message in format_delisting_alerts(alerts):
+            await self.output_sender.send_telegram_message(message)
+
+    async def _send_pending(self):
+        """
+        Sends the pending alerts, after what is left of a batch an earlier call
+        didn't finish. A message leaves _unsent once the sender has it: if the
+        send is cancelled the outbox already has it, if it raises it is kept.
+        """
+        if self._pending:
+            self._unsent.extend(format_delisting_alerts(self._pending))
+            self._pending.clear()
+        while self._unsent:
+            try:
+                await self.output_sender.send_telegram_message(self._unsent[0])
+            except asyncio.CancelledError:
+                del self._unsent[0]
+                raise
+            del self._unsent[0]
+
+    async def _run_window(self):
+        try:
+            while True:
+                await asyncio.sleep(self.window_seconds)
+                if not (self._pending or self._unsent):
+                    break
+                try:
+                    await self._send_pending()
+                except Exception as e:
+                    # Still pending: sent with the next window or by flush()
+                    logger.exception("Error sending coalesced alerts: %s", e)
+        finally:
+            self._window_task = None
+
+    async def flush(self):
+        """Closes the current window and sends whatever is still pending."""
+        if self._window_task is not None:
+            self._window_task.cancel()
+            await asyncio.gather(self._window_task, return_exceptions=True)
+        await self._send_pending()
@@ -0,0 +1,18 @@
+import time
+from src.models.output_message import DelistingAlert
+from src.utils.event_broadcaster import EventBroadcaster
+from src.env import STREAM_BUFFER_SIZE, STREAM_SLOW_CONSUMER_POLICY
+
+# Parsed delisting events for /stream/delistings, shared by both exchange handlers
+delisting_events = EventBroadcaster(buffer_size=STREAM_BUFFER_SIZE, policy=STREAM_SLOW_CONSUMER_POLICY)
+
+def publish_delisting(alert: DelistingAlert):
+    """Pushes a parsed alert to the stream subscribers; never waits, call it before the Telegram send."""
+    delisting_events.publish("delisting", {
+        "exchange": alert.header,
+        "tickers": alert.tickers or [],
+        "date": alert.date,
+        "time": alert.time,
+        "url": alert.announcement_url,
+        "detected_at": time.time()
+    })
@@ -1,35 +1,342 @@
-import requests
-import os
-from src.env import BOT_TOKEN, CHAT_IDS_LIST
+import asyncio
+import logging
+import random
+import time
+import httpx
+from typing import Collection, Optional
+from src.env import TELEGRAM_API_URL
+from src.utils.token_bucket import TokenBucket
+from src.utils.metrics import TELEGRAM_SENDS
+from src.repositories.telegram.telegram_outbox import TelegramOutbox
+
+logger = logging.getLogger(__name__)
+
+_SENT_METRIC = TELEGRAM_SENDS.labels("sent")
+_RATE_LIMITED_METRIC = TELEGRAM_SENDS.labels("rate_limited")
+_FAILED_METRIC = TELEGRAM_SENDS.labels("failed")
+_GAVE_UP_METRIC = TELEGRAM_SENDS.labels("gave_up")
+_EDITED_METRIC = TELEGRAM_SENDS.labels("edited")
+
+# Telegram Bot API limits: ~30 messages per second overall,
+# ~1 message per second per private chat and 20 messages per minute per group.
+TELEGRAM_GLOBAL_RATE = 30
+TELEGRAM_PRIVATE_CHAT_RATE = 1
+TELEGRAM_GROUP_CHAT_RATE = 20 / 60
+TELEGRAM_GROUP_CHAT_BURST = 20
+
+# Seconds to wait after a 429 whose body doesn't say (e.g. not JSON)
+DEFAULT_RETRY_AFTER = 1
+
+# Outcome of one delivery
+DELIVERED = "delivered"
+RETRYABLE = "retryable" # Network error, 5xx or still rate limited: the outbox retries it
+REJECTED = "rejected"   # 4xx other than 429: retrying would not help
+
+# Outbox retries: per-chat exponential backoff, how often due deliveries are checked,
+# when to give up on a delivery and how long finished ones are kept
+RETRY_BACKOFF_BASE = 2.0
+RETRY_BACKOFF_MAX = 300.0
+RETRY_INTERVAL = 1.0
+OUTBOX_MAX_AGE = 24 * 3600
+OUTBOX_PURGE_INTERVAL = 3600
+
+def _json_field(response: httpx.Response, name: str, default):
+    """A top-level field of a JSON response body, or default if the body isn't a JSON object."""
+    try:
+        body = response.json()
+    except ValueError:
+        return default
+    value = body.get(name, default) if isinstance(body, dict) else default
+    return value if isinstance(value, type(default)) else default
 
 class OutputMessageSender:
-    def __init__(self):
+    """
+    Sends messages to every configured chat.
+
+    With an outbox_path, each (message, chat) delivery is recorded in a
+    TelegramOutbox before it is sent and marked as soon as its own chat answers.
+    Failed deliveries are retried by a background scheduler
+    (start_retry_scheduler) with per-chat backoff. Retries
+    only use rate-limit tokens that are free at that moment, so fresh messages,
+    which are always sent right away, never queue behind them.
+    """
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_connections: int = 100,
+        max_retries: int = 3,
+        outbox_path: Optional[str] = None
+    ):
+        from src.env import BOT_TOKEN, CHAT_IDS_LIST # Validated on first use, see src.env
         self.bot_token = BOT_TOKEN
         self.chat_ids_config = CHAT_IDS_LIST
-        self.telegram_api_base = f"https://api.telegram.org/bot{self.bot_token}"
+        self.telegram_api_base = f"{TELEGRAM_API_URL}/bot{self.bot_token}"
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
 
-    def send_telegram_message(self, message: str):
-        for chat_config in self.chat_ids_config:
-            send_message_endpoint = self.telegram_api_base + '/sendMessage'
-            payload = {
-                'parse_mode': 'HTML',
-                'text': message
-            }
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global_bucket = TokenBucket(TELEGRAM_GLOBAL_RATE, TELEGRAM_GLOBAL_RATE)
+        self._chat_buckets: dict[str, TokenBucket] = {}
+        self._targets = self._build_targets()
+        self._target_payloads = {current_chat_id: base_payload for base_payload, current_chat_id in self._targets}
 
+        self.outbox_path = outbox_path
+        self._outbox: Optional[TelegramOutbox] = None
+        self._retry_task: Optional[asyncio.Task] = None
+        # chat_id -> (consecutive failures, time.time() before which the chat is not retried)
+        self._chat_backoff: dict[str, tuple[int, float]] = {}
+        self._last_purge = 0.0
+
+    def _build_targets(self) -> list[tuple[dict, str]]:
+        """Resolves CHAT_IDS_LIST once into (base payload, display id) pairs."""
+        targets = []
+        for chat_config in self.chat_ids_config:
             if isinstance(chat_config, str):
-                payload['chat_id'] = chat_config
-                current_chat_id = chat_config
+                targets.append(({'chat_id': chat_config}, chat_config))
             elif isinstance(chat_config, dict):
-                payload['chat_id'] = chat_config['chat_id']
-                payload['message_thread_id'] = chat_config['message_thread_id']
-                current_chat_id = f"{chat_config['chat_id']}/{chat_config['message_thread_id']}"
+                targets.append((
+                    {'chat_id': chat_config['chat_id'], 'message_thread_id': chat_config['message_thread_id']},
+                    f"{chat_config['chat_id']}/{chat_config['message_thread_id']}"
+                ))
+            else:
+                logger.warning("Invalid chat configuration type: %s. Skipping.", type(chat_config))
+        return targets
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool is bound to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.telegram_api_base,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    def _get_chat_bucket(self, chat_id: str) -> TokenBucket:
+        # Topics of one group share the group's limit, so buckets are keyed by chat_id only
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if chat_id.startswith('-'):
+                bucket = TokenBucket(TELEGRAM_GROUP_CHAT_RATE, TELEGRAM_GROUP_CHAT_BURST)
             else:
-                print(f"Invalid chat configuration type: {type(chat_config)}. Skipping.")
+                bucket = TokenBucket(TELEGRAM_PRIVATE_CHAT_RATE, TELEGRAM_PRIVATE_CHAT_RATE)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _get_outbox(self) -> Optional[TelegramOutbox]:
+        if self._outbox is None and self.outbox_path:
+            self._outbox = TelegramOutbox(self.outbox_path)
+        return self._outbox
+
+    def pending_deliveries(self) -> int:
+        outbox = self._get_outbox()
+        return outbox.pending_count() if outbox is not None else 0
+
+    @property
+    def chats(self) -> list[str]:
+        """Display ids of the configured chats (chat_id, or chat_id/message_thread_id for topics)."""
+        return [current_chat_id for _, current_chat_id in self._targets]
+
+    async def send_telegram_message(self, message: str, chats: Optional[Collection[str]] = None) -> list[tuple[str, int]]:
+        """
+        Sends the message to all configured chats concurrently.
+        Args:
+            chats: Display ids (see chats) to send to instead of all of them.
+        Returns:
+            (chat display id, message_id) of every message delivered right away, for
+            edit_telegram_messages; deliveries left to the outbox are not included.
+        """
+        deliveries = [
+            (current_chat_id, {**base_payload, 'parse_mode': 'HTML', 'text': message})
+            for base_payload, current_chat_id in self._targets
+            if chats is None or current_chat_id in chats
+        ]
+        outbox = self._get_outbox()
+        delivery_ids = outbox.record(deliveries) if outbox is not None else [None] * len(deliveries)
+
+        results = await asyncio.gather(*(
+            self._deliver(outbox, delivery_id, payload, current_chat_id)
+            for delivery_id, (current_chat_id, payload) in zip(delivery_ids, deliveries)
+        ))
+        return [
+            (current_chat_id, message_id)
+            for (current_chat_id, _), (result, _, message_id) in zip(deliveries, results)
+            if result == DELIVERED and message_id is not None
+        ]
+
+    async def _deliver(self, outbox: Optional[TelegramOutbox], delivery_id: Optional[int], payload: dict, current_chat_id: str) -> tuple[str, str, Optional[int]]:
+        # Each chat's outcome is recorded as soon as it is known, not after the slowest chat
+        result, error, message_id = await self._send_to_chat(payload, current_chat_id)
+        if outbox is not None:
+            if result == DELIVERED:
+                outbox.mark_delivered([delivery_id])
+                self._chat_backoff.pop(payload['chat_id'], None)
+            else:
+                self._record_failure(outbox, delivery_id, payload['chat_id'], result, error, time.time())
+        return result, error, message_id
+
+    async def edit_telegram_messages(self, sent_messages: list[tuple[str, int]], message: str) -> list[str]:
+        """
+        Replaces the text of messages sent earlier (editMessageText), concurrently
+        and within the same rate limits as new messages. Edits are not kept in the
+        outbox: a failed edit leaves the original message as it was.
+        Args:
+            sent_messages: (chat display id, message_id) pairs as returned by send_telegram_message.
+            message: The new text (HTML).
+        Returns:
+            Display ids of the chats whose message was edited.
+        """
+        results = await asyncio.gather(*(
+            self._send_to_chat(
+                {'chat_id': self._target_payloads[current_chat_id]['chat_id'], 'message_id': message_id, 'parse_mode': 'HTML', 'text': message},
+                current_chat_id,
+                method='editMessageText'
+            )
+            for current_chat_id, message_id in sent_messages
+        ))
+        return [current_chat_id for (current_chat_id, _), (result, _, _) in zip(sent_messages, results) if result == DELIVERED]
+
+    async def _post(self, payload: dict, current_chat_id: str, method: str = 'sendMessage') -> tuple[str, str, float, Optional[int]]:
+        """
+        One sendMessage (or editMessageText) call.
+        Returns:
+            (outcome, error description, Telegram's retry_after in seconds or 0,
+            message_id of the sent or edited message if delivered).
+        """
+        client = self._get_client()
+        try:
+            response = await client.post(f'/{method}', json=payload)
+            if response.status_code == 429:
+                _RATE_LIMITED_METRIC.inc()
+                retry_after = _json_field(response, 'parameters', {}).get('retry_after', DEFAULT_RETRY_AFTER)
+                return RETRYABLE, f"rate limited, retry after {retry_after}s", retry_after, None
+            response.raise_for_status()
+            try:
+                body = response.json()
+            except ValueError:
+                # Not Telegram's answer (e.g. an HTML page from a proxy): don't count it as delivered
+                _FAILED_METRIC.inc()
+                logger.warning("Non-JSON %s response for chat ID %s (HTTP %d)", method, current_chat_id, response.status_code)
+                return RETRYABLE, f"non-JSON response (HTTP {response.status_code})", 0, None
+            (_EDITED_METRIC if method == 'editMessageText' else _SENT_METRIC).inc()
+            logger.debug("%s done for chat ID %s", method, current_chat_id)
+            result = body.get('result') if isinstance(body, dict) else None
+            return DELIVERED, "", 0, result.get('message_id') if isinstance(result, dict) else None
+        except httpx.HTTPStatusError as e:
+            _FAILED_METRIC.inc()
+            logger.warning("Error in %s for chat ID %s: %s", method, current_chat_id, e)
+            return (REJECTED if e.response.status_code < 500 else RETRYABLE), str(e), 0, None
+        except httpx.HTTPError as e:
+            _FAILED_METRIC.inc()
+            logger.warning("Error in %s for chat ID %s: %r", method, current_chat_id, e)
+            return RETRYABLE, str(e) or type(e).__name__, 0, None
+
+    async def _send_to_chat(self, payload: dict, current_chat_id: str, method: str = 'sendMessage') -> tuple[str, str, Optional[int]]:
+        chat_bucket = self._get_chat_bucket(payload['chat_id'])
+
+        for attempt in range(self.max_retries + 1):
+            await chat_bucket.acquire()
+            await self._global_bucket.acquire()
+            result, error, retry_after, message_id = await self._post(payload, current_chat_id, method)
+            if not retry_after:
+                return result, error, message_id
+            logger.warning("Rate limited for chat ID %s, retrying after %ss (attempt %d/%d)",
+                           current_chat_id, retry_after, attempt + 1, self.max_retries + 1)
+            chat_bucket.penalize(retry_after)
+
+        _GAVE_UP_METRIC.inc()
+        logger.error("Giving up on chat ID %s after %d rate-limited attempts.", current_chat_id, self.max_retries + 1)
+        return RETRYABLE, "rate limited", None
+
+    def _record_failure(self, outbox: TelegramOutbox, delivery_id: int, chat_id: str, result: str, error: str, now: float):
+        if result == REJECTED:
+            outbox.mark_rejected(delivery_id, error)
+            return
+        # Every failure pushes the whole chat back, so a dead chat is not hammered
+        failures = self._chat_backoff.get(chat_id, (0, 0.0))[0] + 1
+        delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** (failures - 1))
+        retry_at = now + delay / 2 + random.uniform(0, delay / 2)
+        self._chat_backoff[chat_id] = (failures, retry_at)
+        outbox.reschedule(delivery_id, retry_at, error)
+
+    async def retry_due_deliveries(self) -> int:
+        """
+        Sends due deliveries from the outbox again, at most one per chat per call
+        and only to chats whose backoff is over and whose rate-limit tokens are free.
+        Returns:
+            Number of deliveries attempted.
+        """
+        outbox = self._get_outbox()
+        if outbox is None:
+            return 0
+        now = time.time()
+        outbox.heartbeat(now)
+        # In-flight deliveries of a process that died (this one's are never taken over)
+        released = outbox.release_orphans(now)
+        if released:
+            logger.warning("Sending %d Telegram deliveries interrupted by a stopped process again.", released)
+        if now - self._last_purge >= OUTBOX_PURGE_INTERVAL:
+            expired = outbox.expire(now - OUTBOX_MAX_AGE)
+            if expired:
+                logger.error("Gave up on %d Telegram deliveries older than %ss.", expired, OUTBOX_MAX_AGE)
+            outbox.purge(now - OUTBOX_MAX_AGE)
+            self._last_purge = now
+
+        busy_chats = set()
+        retries = []
+        for delivery_id, current_chat_id, payload, attempts in outbox.due(now):
+            chat_id = payload['chat_id']
+            if chat_id in busy_chats or self._chat_backoff.get(chat_id, (0, 0.0))[1] > now:
+                continue
+            # One retry per chat per round, oldest first
+            busy_chats.add(chat_id)
+            # Never take a token a fresh message would have to wait for
+            chat_bucket = self._get_chat_bucket(chat_id)
+            if not (chat_bucket.has_token() and self._global_bucket.has_token()):
                 continue
+            if not outbox.claim(delivery_id, now):
+                continue
+            chat_bucket.reserve()
+            self._global_bucket.reserve()
+            logger.info("Retrying delivery %d to chat ID %s (attempt %d)", delivery_id, current_chat_id, attempts + 1)
+            retries.append(self._retry_delivery(outbox, delivery_id, payload, current_chat_id))
+        await asyncio.gather(*retries)
+        return len(retries)
+
+    async def _retry_delivery(self, outbox: TelegramOutbox, delivery_id: int, payload: dict, current_chat_id: str):
+        result, error, retry_after, _ = await self._post(payload, current_chat_id)
+        if result == DELIVERED:
+            outbox.mark_delivered([delivery_id])
+            self._chat_backoff.pop(payload['chat_id'], None)
+            return
+        if retry_after:
+            self._get_chat_bucket(payload['chat_id']).penalize(retry_after)
+        self._record_failure(outbox, delivery_id, payload['chat_id'], result, error, time.time())
 
+    async def _retry_loop(self):
+        while True:
             try:
-                response = requests.post(send_message_endpoint, json=payload)
-                response.raise_for_status()
-                print(f"Message sent to chat ID {current_chat_id}: {response.json()}")
-            except requests.exceptions.RequestException as e:
-                print(f"Error sending message to chat ID {current_chat_id}: {e}")
+                await self.retry_due_deliveries()
+            except Exception as e:
+                logger.exception("Error retrying Telegram deliveries: %s", e)
+            await asyncio.sleep(RETRY_INTERVAL)
+
+    def start_retry_scheduler(self):
+        """Starts retrying outbox deliveries in the background (no-op without an outbox)."""
+        if self._get_outbox() is not None and self._retry_task is None:
+            self._retry_task = asyncio.create_task(self._retry_loop())
+
+    async def aclose(self):
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            await asyncio.gather(self._retry_task, return_exceptions=True)
+            self._retry_task = None
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        if self._outbox is not None:
+            self._outbox.close()
+            self._outbox = None
@@ -0,0 +1,211 @@
+import asyncio
+import heapq
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from src.bot.output_message_sender import OutputMessageSender
+from src.models.output_message import DelistingReminder
+from src.repositories.reminders.reminder_store import ReminderStore
+from src.utils.leader_election import is_leader
+from src.utils.metrics import FAILURES
+from src.utils.output_message_formatter import format_delisting_reminder
+
+logger = logging.getLogger(__name__)
+
+# Deadlines are wall-clock times: sleep at most this long so a clock adjustment is noticed
+MAX_SLEEP_SECONDS = 600.0
+
+@dataclass(slots=True)
+class _Delisting:
+    deadline: float
+    announcement_url: str
+    sent_offset: float # Smallest offset already sent or skipped, math.inf before the first one
+
+class ReminderScheduler:
+    """
+    Sends reminders at fixed offsets before delisting deadlines (e.g. T-24h, T-1h, T-0).
+
+    Pending reminders are a min-heap of (due time, exchange, ticker, deadline, offset)
+    next to the scheduled delisting of each (exchange, ticker), so scheduling and
+    taking the next due reminder are O(log n) and run() sleeps until the earliest one.
+    A ticker announced again keeps one set of reminders: the same deadline is a no-op,
+    a new one replaces the old (its heap entries are skipped when they come up).
+    Reminders due together for the same exchange and deadline go out as one message.
+    With a store the delistings survive restarts; a reminder more than grace_seconds
+    late (the process was down) is dropped instead of sent.
+
+    Every instance schedules, only the leader sends: a standby keeps its reminders
+    until take_over(), which picks up what the previous leader recorded in a shared
+    store. A reminder stays unsent in the store until the outbox has it.
+    """
+    def __init__(
+        self,
+        output_sender: OutputMessageSender,
+        offsets: Iterable[float] = (86400.0, 3600.0, 0.0),
+        store: Optional[ReminderStore] = None,
+        grace_seconds: float = 600.0
+    ):
+        self.output_sender = output_sender
+        self.offsets = tuple(sorted(set(offsets), reverse=True))
+        self.store = store
+        self.grace_seconds = grace_seconds
+        self._delistings: dict[tuple[str, str], _Delisting] = {}
+        self._heap: list[tuple[float, str, str, float, float]] = []
+        self._wakeup = asyncio.Event()
+        self._started_at = time.time()
+        # Reminders due from _started_at until this time were the previous leader's (see take_over)
+        self._handled_before = -math.inf
+
+    def __len__(self) -> int:
+        """Scheduled delistings with reminders still to send."""
+        return len(self._delistings)
+
+    def _push(self, exchange: str, ticker: str, delisting: _Delisting):
+        for offset in self.offsets:
+            if offset < delisting.sent_offset:
+                heapq.heappush(self._heap, (delisting.deadline - offset, exchange, ticker, delisting.deadline, offset))
+
+    def _merge(self, rows: list[tuple[str, str, float, str, float]]):
+        # The store is what other processes on the host sent or scheduled
+        for exchange, ticker, deadline, url, sent_offset in rows:
+            key = (exchange, ticker)
+            current = self._delistings.get(key)
+            if current is not None and current.deadline == deadline:
+                current.sent_offset = min(current.sent_offset, sent_offset)
+                continue
+            delisting = _Delisting(deadline, url, sent_offset)
+            self._delistings[key] = delisting
+            self._push(exchange, ticker, delisting)
+
+    def restore(self):
+        """Loads the delistings saved in the store (blocking, call once before run)."""
+        if self.store is None:
+            return
+        self._merge(self.store.load())
+        logger.info("Restored reminders for %d delistings.", len(self._delistings))
+
+    async def take_over(self, replay_seconds: float):
+        """
+        Called when this instance becomes the leader: reloads the store and skips
+        the reminders that came due while this instance was a standby, except
+        those of the last replay_seconds (the previous leader may have died first).
+        """
+        if self.store is not None:
+            self._merge(await asyncio.to_thread(self.store.load))
+        self._handled_before = time.time() - replay_seconds
+        self._wakeup.set()
+
+    def _save_sent(self, exchange: str, tickers: Iterable[str], deadline: float, offset: float):
+        if self.store is None:
+            return
+        keys = [(exchange, ticker) for ticker in tickers]
+        if offset <= self.offsets[-1]:
+            self.store.delete(keys, deadline)
+        else:
+            self.store.mark_sent(keys, deadline, offset)
+
+    def schedule(self, exchange: str, tickers: Iterable[str], deadline: float, announcement_url: str, now: Optional[float] = None) -> int:
+        """
+        Schedules the reminders of a parsed delisting; offsets already past are skipped.
+        Args:
+            exchange: Header of the alert, e.g. "BINANCE".
+            tickers: Delisted tickers.
+            deadline: Delisting time as a UTC timestamp.
+            announcement_url: Link for the reminder.
+        Returns:
+            Number of tickers scheduled or rescheduled.
+        """
+        now = time.time() if now is None else now
+        # Offsets are sorted from the largest, so those already past come first
+        past_offsets = [offset for offset in self.offsets if deadline - offset <= now]
+        if len(past_offsets) == len(self.offsets):
+            return 0
+        sent_offset = past_offsets[-1] if past_offsets else math.inf
+
+        changed = []
+        for ticker in dict.fromkeys(tickers):
+            key = (exchange, ticker)
+            current = self._delistings.get(key)
+            if current is not None and current.deadline == deadline:
+                continue
+            delisting = _Delisting(deadline, announcement_url, sent_offset)
+            self._delistings[key] = delisting
+            self._push(exchange, ticker, delisting)
+            changed.append((exchange, ticker, deadline, announcement_url, sent_offset))
+        if changed:
+            if self.store is not None:
+                self.store.save(changed)
+            self._wakeup.set()
+        return len(changed)
+
+    def pop_due(self, now: Optional[float] = None) -> list[DelistingReminder]:
+        """
+        Takes the reminders due by now off the heap. Late or skipped ones are
+        recorded in the store right away; those returned stay unsent there until
+        save_sent() after they went out.
+        Returns:
+            One reminder per (exchange, deadline, offset), tickers in scheduling order.
+        """
+        now = time.time() if now is None else now
+        groups: dict[tuple[str, float, float], tuple[list[str], str]] = {}
+        skipped: dict[tuple[str, float, float], list[str]] = {}
+        late = handled = 0
+        while self._heap and self._heap[0][0] <= now:
+            due_at, exchange, ticker, deadline, offset = heapq.heappop(self._heap)
+            key = (exchange, ticker)
+            delisting = self._delistings.get(key)
+            if delisting is None or delisting.deadline != deadline or offset >= delisting.sent_offset:
+                continue # Rescheduled or already sent
+            delisting.sent_offset = offset
+            if delisting.sent_offset <= self.offsets[-1]:
+                del self._delistings[key]
+            if now - due_at > self.grace_seconds:
+                late += 1
+            elif self._started_at <= due_at < self._handled_before:
+                handled += 1
+            else:
+                tickers, _ = groups.setdefault((exchange, deadline, offset), ([], delisting.announcement_url))
+                tickers.append(ticker)
+                continue
+            skipped.setdefault((exchange, deadline, offset), []).append(ticker)
+        if late:
+            logger.warning("Dropped %d reminders that were more than %.0fs late.", late, self.grace_seconds)
+        if handled:
+            logger.info("Skipped %d reminders due while the previous leader was sending.", handled)
+        for (exchange, deadline, offset), tickers in skipped.items():
+            self._save_sent(exchange, tickers, deadline, offset)
+
+        return [
+            DelistingReminder(header=exchange, tickers=tickers, deadline=deadline, offset_seconds=offset, announcement_url=url)
+            for (exchange, deadline, offset), (tickers, url) in groups.items()
+        ]
+
+    def save_sent(self, reminder: DelistingReminder):
+        """Records a reminder from pop_due() as sent."""
+        self._save_sent(reminder.header, reminder.tickers, reminder.deadline, reminder.offset_seconds)
+
+    async def run(self):
+        """Sends reminders as they come due while this instance is the leader, until cancelled."""
+        while True:
+            self._wakeup.clear()
+            timeout = MAX_SLEEP_SECONDS
+            # A standby keeps its reminders; take_over() wakes it up when it is elected
+            if is_leader():
+                for reminder in self.pop_due():
+                    logger.info("DELISTING REMINDER: %s %s, %.0fs before the deadline", reminder.header, reminder.tickers, reminder.offset_seconds)
+                    try:
+                        for message in format_delisting_reminder(reminder):
+                            await self.output_sender.send_telegram_message(message)
+                        # The outbox has it now and retries delivery
+                        self.save_sent(reminder)
+                    except Exception as e:
+                        FAILURES.labels("reminders").inc()
+                        logger.exception("Error sending delisting reminders: %s", e)
+                if self._heap:
+                    timeout = min(timeout, max(0.0, self._heap[0][0] - time.time()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
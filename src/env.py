@@ -1,5 +1,6 @@
 import os
 import json
+import socket
 
 def _get_required_env_var(var_name: str) -> str:
     value = os.environ.get(var_name)
@@ -7,33 +8,141 @@ def _get_required_env_var(var_name: str) -> str:
         raise ValueError(f"Environment variable {var_name} must be set.")
     return value
 
-BOT_TOKEN = _get_required_env_var("BOT_TOKEN")
-_chat_ids_json_string = _get_required_env_var("CHAT_IDS")
-try:
-    CHAT_IDS_LIST = json.loads(_chat_ids_json_string)
-    if not isinstance(CHAT_IDS_LIST, list):
-        raise ValueError("CHAT_IDS environment variable must be a JSON array.")
-    for item in CHAT_IDS_LIST:
-        if isinstance(item, str):
-            # Simple chat ID
-            if not item:
-                raise ValueError("Chat ID string cannot be empty.")
-        elif isinstance(item, dict):
-            # Chat ID with message_thread_id
-            if "chat_id" not in item or "message_thread_id" not in item:
-                raise ValueError("Each object in CHAT_IDS must contain 'chat_id' and 'message_thread_id'.")
-            if not isinstance(item["chat_id"], str) or not item["chat_id"]:
-                raise ValueError("chat_id in CHAT_IDS object must be a non-empty string.")
-            if not isinstance(item["message_thread_id"], int):
-                raise ValueError("message_thread_id in CHAT_IDS object must be an integer.")
-        else:
-            raise ValueError("Each item in CHAT_IDS must be either a string or an object with 'chat_id' and 'message_thread_id'.")
-except json.JSONDecodeError:
-    raise ValueError("CHAT_IDS environment variable is not a valid JSON string.")
-
-BUCKET_NAME = _get_required_env_var("BUCKET_NAME")
-AWS_ACCESS_KEY_ID = _get_required_env_var("AWS_ACCESS_KEY_ID")
-AWS_SECRET_ACCESS_KEY = _get_required_env_var("AWS_SECRET_ACCESS_KEY")
+def _get_chat_ids() -> list:
+    chat_ids_json_string = _get_required_env_var("CHAT_IDS")
+    try:
+        chat_ids = json.loads(chat_ids_json_string)
+        if not isinstance(chat_ids, list):
+            raise ValueError("CHAT_IDS environment variable must be a JSON array.")
+        for item in chat_ids:
+            if isinstance(item, str):
+                # Simple chat ID
+                if not item:
+                    raise ValueError("Chat ID string cannot be empty.")
+            elif isinstance(item, dict):
+                # Chat ID with message_thread_id
+                if "chat_id" not in item or "message_thread_id" not in item:
+                    raise ValueError("Each object in CHAT_IDS must contain 'chat_id' and 'message_thread_id'.")
+                if not isinstance(item["chat_id"], str) or not item["chat_id"]:
+                    raise ValueError("chat_id in CHAT_IDS object must be a non-empty string.")
+                if not isinstance(item["message_thread_id"], int):
+                    raise ValueError("message_thread_id in CHAT_IDS object must be an integer.")
+            else:
+                raise ValueError("Each item in CHAT_IDS must be either a string or an object with 'chat_id' and 'message_thread_id'.")
+    except json.JSONDecodeError:
+        raise ValueError("CHAT_IDS environment variable is not a valid JSON string.")
+    return chat_ids
+
+# Required settings are read and validated on first access rather than at import, so
+# importing this module costs nothing and a process only needs the settings its code
+# paths use (no S3 credentials for a local-only setup, no Telegram token for tools).
+# Each value is cached in the module after the first lookup.
+_LAZY_SETTINGS = {
+    "BOT_TOKEN": lambda: _get_required_env_var("BOT_TOKEN"),
+    "CHAT_IDS_LIST": _get_chat_ids,
+    "BUCKET_NAME": lambda: _get_required_env_var("BUCKET_NAME"),
+    "AWS_ACCESS_KEY_ID": lambda: _get_required_env_var("AWS_ACCESS_KEY_ID"),
+    "AWS_SECRET_ACCESS_KEY": lambda: _get_required_env_var("AWS_SECRET_ACCESS_KEY")
+}
+
+def __getattr__(name: str):
+    loader = _LAZY_SETTINGS.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = loader()
+    globals()[name] = value
+    return value
+
 S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "https://storage.yandexcloud.net") # Revert to optional with default
 
+# Overridable API endpoints (e.g. a local Bot API server or the benchmark fakes)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+BYBIT_API_URL = os.getenv("BYBIT_API_URL", "https://api.bybit.com")
+BINANCE_API_URL = os.getenv("BINANCE_API_URL", "https://api.binance.com")
+# Connections in the keep-alive pool every exchange REST request shares
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "32"))
+
+# Binance frame dispatch: worker count, queue bound and overflow policy ("drop" or "block")
+BINANCE_DISPATCH_WORKERS = int(os.getenv("BINANCE_DISPATCH_WORKERS", "4"))
+BINANCE_DISPATCH_QUEUE_SIZE = int(os.getenv("BINANCE_DISPATCH_QUEUE_SIZE", "1000"))
+BINANCE_DISPATCH_OVERFLOW = os.getenv("BINANCE_DISPATCH_OVERFLOW", "drop")
+
+# Redundant Binance WebSocket connections and the delay between their starts
+BINANCE_WS_CONNECTIONS = int(os.getenv("BINANCE_WS_CONNECTIONS", "2"))
+BINANCE_WS_STAGGER_SECONDS = float(os.getenv("BINANCE_WS_STAGGER_SECONDS", "5"))
+
+# Announcement dedup shared by every exchange feed (named after Binance, its first user):
+# bounded TTL index, optional Bloom filter capacity (0 = off) and where its snapshot
+# is kept ("s3", "local" or "off")
+BINANCE_DEDUP_MAX_ITEMS = int(os.getenv("BINANCE_DEDUP_MAX_ITEMS", "10000"))
+BINANCE_DEDUP_TTL_SECONDS = float(os.getenv("BINANCE_DEDUP_TTL_SECONDS", str(7 * 24 * 3600)))
+BINANCE_DEDUP_BLOOM_CAPACITY = int(os.getenv("BINANCE_DEDUP_BLOOM_CAPACITY", "0"))
+BINANCE_DEDUP_SNAPSHOT = os.getenv("BINANCE_DEDUP_SNAPSHOT", "s3")
+BINANCE_DEDUP_SNAPSHOT_PATH = os.getenv("BINANCE_DEDUP_SNAPSHOT_PATH", "binance_dedup.json")
+
+# In-process Bybit poller, opt-in: it replaces the scheduled cloud function, which
+# must be unscheduled before enabling it or every Bybit alert is sent twice
+BYBIT_POLLER_ENABLED = os.getenv("BYBIT_POLLER_ENABLED", "false").lower() in ("1", "true", "yes")
+BYBIT_POLL_MIN_INTERVAL = float(os.getenv("BYBIT_POLL_MIN_INTERVAL", "2"))
+BYBIT_POLL_MAX_INTERVAL = float(os.getenv("BYBIT_POLL_MAX_INTERVAL", "30"))
+# Number of seen Bybit announcement URLs kept in the S3 state
+BYBIT_STATE_MAX_URLS = int(os.getenv("BYBIT_STATE_MAX_URLS", "10"))
+
+# Delisting alerts arriving within this many seconds of the previous message are
+# merged into one Telegram message per chat (0 = send every alert on its own)
+ALERT_COALESCE_WINDOW_SECONDS = float(os.getenv("ALERT_COALESCE_WINDOW_SECONDS", "2"))
+# Two-phase alerts: an "EXCHANGE DELISTING" headline with the link goes out right after
+# classification and is edited into the full alert once the announcement is parsed
+TWO_PHASE_ALERTS = os.getenv("TWO_PHASE_ALERTS", "false").lower() in ("1", "true", "yes")
+
+# SQLite outbox for Telegram deliveries, retried in the background until delivered ("" = off)
+TELEGRAM_OUTBOX_PATH = os.getenv("TELEGRAM_OUTBOX_PATH", "telegram_outbox.sqlite3")
+
+# Raw Binance frames and Bybit responses are appended to gzip logs in this directory
+# for benchmarks/replay.py ("" = off), rotated by compressed size
+TRAFFIC_RECORD_DIR = os.getenv("TRAFFIC_RECORD_DIR", "")
+TRAFFIC_RECORD_MAX_BYTES = int(os.getenv("TRAFFIC_RECORD_MAX_MB", "64")) * 1024 * 1024
+TRAFFIC_RECORD_MAX_FILES = int(os.getenv("TRAFFIC_RECORD_MAX_FILES", "20"))
+
+# Logging: level, "json" or "text" output, and records per call site per second (0 = no sampling)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_SAMPLE_PER_SECOND = int(os.getenv("LOG_SAMPLE_PER_SECOND", "10"))
+
+# Exchange trading pairs used by the parsers to confirm tickers: local snapshot ("" = none)
+# and how often each pair list is refetched in the background (0 = never)
+SYMBOL_INDEX_PATH = os.getenv("SYMBOL_INDEX_PATH", "symbol_index.json")
+SYMBOL_INDEX_REFRESH_SECONDS = float(os.getenv("SYMBOL_INDEX_REFRESH_SECONDS", "3600"))
+
+# Event loop watchdog: lag sampling interval and how long a callback may hold the loop
+# before its stack is logged
+LOOP_WATCHDOG_INTERVAL = float(os.getenv("LOOP_WATCHDOG_INTERVAL", "0.1"))
+LOOP_BLOCK_THRESHOLD_SECONDS = float(os.getenv("LOOP_BLOCK_THRESHOLD_SECONDS", "0.25"))
+# Bearer token for /debug/profile ("" = endpoint disabled)
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN", "")
+
+# Leader election between instances: "s3" (lease object in BUCKET_NAME), "file" (flock on
+# LEADER_LOCK_PATH, workers on one host) or "off" (every instance sends)
+LEADER_ELECTION = os.getenv("LEADER_ELECTION", "off")
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "15"))
+LEADER_LOCK_PATH = os.getenv("LEADER_LOCK_PATH", "delisting_bot.lock")
+INSTANCE_ID = os.getenv("INSTANCE_ID", f"{socket.gethostname()}-{os.getpid()}")
+
+# /stream/delistings: events buffered per subscriber and what happens to one whose
+# buffer is full ("drop" its oldest events or "disconnect" it)
+STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", "256"))
+STREAM_SLOW_CONSUMER_POLICY = os.getenv("STREAM_SLOW_CONSUMER_POLICY", "drop")
+
+# SQLite archive of every classified announcement for /announcements ("" = off)
+# and how many distinct queries it keeps cached responses for
+ANNOUNCEMENT_ARCHIVE_PATH = os.getenv("ANNOUNCEMENT_ARCHIVE_PATH", "announcements.sqlite3")
+ANNOUNCEMENT_CACHE_ENTRIES = int(os.getenv("ANNOUNCEMENT_CACHE_ENTRIES", "256"))
+
+# Reminders before each parsed delisting deadline, in hours (0: when it happens),
+# the SQLite file they survive restarts in ("" = in memory only) and how late a
+# reminder may still go out after downtime before it is dropped
+REMINDER_OFFSETS_HOURS = tuple(float(hours) for hours in os.getenv("REMINDER_OFFSETS_HOURS", "24,1,0").split(",") if hours.strip())
+REMINDER_STORE_PATH = os.getenv("REMINDER_STORE_PATH", "reminders.sqlite3")
+REMINDER_GRACE_SECONDS = float(os.getenv("REMINDER_GRACE_SECONDS", "600"))
+
 # BINANCE_API_KEY and BINANCE_SECRET_KEY are removed as per user's request
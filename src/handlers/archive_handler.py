@@ -0,0 +1,94 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+from src.repositories.archive.announcement_archive import AnnouncementArchive
+from src.models.announcement import Announcement
+from src.models.output_message import DelistingAlert
+from src.utils.response_cache import ResponseCache
+from src.utils.metrics import FAILURES
+from src.env import ANNOUNCEMENT_ARCHIVE_PATH, ANNOUNCEMENT_CACHE_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+# Announcements are written in batches: one transaction per ARCHIVE_FLUSH_DELAY instead of one per frame
+ARCHIVE_FLUSH_DELAY = 0.5
+
+_archive: Optional[AnnouncementArchive] = None
+_pending: list[tuple[Announcement, Optional[DelistingAlert], Optional[str]]] = []
+_flush_handle: Optional[asyncio.TimerHandle] = None
+_query_cache = ResponseCache(ANNOUNCEMENT_CACHE_ENTRIES)
+_ARCHIVE_FAILURES_METRIC = FAILURES.labels("archive")
+
+def get_announcement_archive() -> Optional[AnnouncementArchive]:
+    """The shared archive, opened on first use; None if ANNOUNCEMENT_ARCHIVE_PATH is empty."""
+    global _archive
+    if _archive is None and ANNOUNCEMENT_ARCHIVE_PATH:
+        _archive = AnnouncementArchive(ANNOUNCEMENT_ARCHIVE_PATH)
+    return _archive
+
+def archive_announcement(announcement: Announcement, alert: Optional[DelistingAlert] = None, identity: Optional[str] = None):
+    """
+    Queues a classified announcement (alert set for delistings) for the archive;
+    it is written with the others that arrive within ARCHIVE_FLUSH_DELAY.
+    """
+    global _flush_handle
+    if not ANNOUNCEMENT_ARCHIVE_PATH:
+        return
+    _pending.append((announcement, alert, identity))
+    if _flush_handle is None:
+        try:
+            _flush_handle = asyncio.get_running_loop().call_later(ARCHIVE_FLUSH_DELAY, flush_announcement_archive)
+        except RuntimeError:
+            flush_announcement_archive() # No event loop to batch on
+
+def flush_announcement_archive():
+    """Writes the queued announcements. Never raises: alerts matter more."""
+    global _flush_handle
+    if _flush_handle is not None:
+        _flush_handle.cancel()
+        _flush_handle = None
+    if not _pending:
+        return
+    batch = list(_pending)
+    _pending.clear()
+    try:
+        get_announcement_archive().add_many(batch)
+    except Exception as e:
+        _ARCHIVE_FAILURES_METRIC.inc()
+        logger.error("Error archiving %d announcements: %s", len(batch), e)
+
+def query_announcements(
+    ticker: Optional[str] = None,
+    exchange: Optional[str] = None,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    delisting: Optional[bool] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Optional[bytes]:
+    """
+    Encoded JSON page of archived announcements (see AnnouncementArchive.query),
+    served from the cache while nothing new was archived.
+    Returns:
+        None if the archive is disabled.
+    """
+    archive = get_announcement_archive()
+    if archive is None:
+        return None
+    # Answers include everything handled so far
+    flush_announcement_archive()
+    key = (ticker and ticker.upper(), exchange and exchange.upper(), since, until, delisting, limit, cursor)
+    body = _query_cache.get(key, archive.version)
+    if body is None:
+        announcements, next_cursor = archive.query(ticker, exchange, since, until, delisting, limit, cursor)
+        body = json.dumps({"announcements": announcements, "next_cursor": next_cursor}, ensure_ascii=False).encode('utf-8')
+        _query_cache.put(key, archive.version, body)
+    return body
+
+def close_announcement_archive():
+    global _archive
+    flush_announcement_archive()
+    if _archive is not None:
+        _archive.close()
+        _archive = None
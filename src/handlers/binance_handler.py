@@ -1,52 +1,67 @@
-import asyncio
+from typing import Optional
 from src.repositories.binance.binance_client import BinanceClient
-from src.bot.output_message_sender import OutputMessageSender
 from src.utils.binance.binance_parser import parse_announcement_title
-from src.utils.output_message_formatter import format_delisting_message
-
-# Define delisting keywords
-DELISTING_KEYWORDS = ["delist", "removal", "remove", "suspend trading", "discontinue"]
-
-# This function will be called by the BinanceClient when a new message is received
-def process_binance_websocket_message(message: dict):
-    # Initialize sender here to avoid passing it around or making it global
-    output_sender = OutputMessageSender() 
-
-    # Filter for announcement events
-    if message.get("e") == "announcement":
-        title = message.get("title", "")
-        article_url = message.get("url", "")
-        
-        # Check for delisting keywords in the title (case-insensitive)
-        is_delisting_announcement = any(keyword in title.lower() for keyword in DELISTING_KEYWORDS)
-
-        if is_delisting_announcement:
-            print(f"DELISTING ANNOUNCEMENT DETECTED: {title}")
-            
-            # Parse the title to extract tickers, date, and time
-            parsed_data = parse_announcement_title(title)
-            
-            # Format the message for Telegram
-            formatted_telegram_message = format_delisting_message(
-                header="BINANCE",
-                tickers=parsed_data.get("tickers"),
-                date=parsed_data.get("date"),
-                time=parsed_data.get("time"),
-                announcement_url=article_url
-            )
-            
-            # Send the formatted message to Telegram
-            output_sender.send_telegram_message(formatted_telegram_message)
-        else:
-            print(f"BINANCE ANNOUNCEMENT (non-delisting): {title}")
-
-async def start_binance_websocket_listener(client_instance: BinanceClient):
+from src.utils.message_dispatcher import PRIORITY_DELISTING, PRIORITY_ANNOUNCEMENT, OVERFLOW_DROP
+from src.utils.announcement_parser import is_delisting_text
+from src.utils.traffic_recorder import TrafficRecorder
+from src.models.announcement import Announcement, AnnouncementHandler, get_announcement_identity
+
+def is_delisting_title(title: str) -> bool:
+    # Check for delisting keywords in the title (case-insensitive), one scan for all keywords
+    return is_delisting_text(title)
+
+def get_binance_message_priority(announcement: Announcement) -> int:
+    """Dispatch priority of a frame: delisting announcements are handled first."""
+    if is_delisting_title(announcement.title):
+        return PRIORITY_DELISTING
+    return PRIORITY_ANNOUNCEMENT
+
+class BinanceSource:
     """
-    Starts the Binance WebSocket client's connection and listening loop.
-    This function is intended to be run as an asyncio task within a larger application.
+    Binance announcements from the WebSocket stream, one frame at a time
+    (see SourceRegistry). Delistings are recognized and parsed from the title.
     """
-    print("Binance WebSocket listener task started.")
-    await client_instance.connect_and_listen()
-    print("Binance WebSocket listener task stopped.")
+    name = "binance"
+
+    def __init__(
+        self,
+        dispatch_workers: int = 4,
+        dispatch_queue_size: int = 1000,
+        dispatch_overflow: str = OVERFLOW_DROP,
+        connections: int = 1,
+        stagger_seconds: float = 5.0,
+        recorder: Optional[TrafficRecorder] = None
+    ):
+        self._handle: Optional[AnnouncementHandler] = None
+        # The client's dispatcher workers run the pipeline, so the socket reader never waits on it
+        self.client = BinanceClient(
+            message_handler=self._on_announcement,
+            priority_fn=get_binance_message_priority,
+            dispatch_workers=dispatch_workers,
+            dispatch_queue_size=dispatch_queue_size,
+            dispatch_overflow=dispatch_overflow,
+            connections=connections,
+            stagger_seconds=stagger_seconds,
+            recorder=recorder
+        )
+
+    async def _on_announcement(self, announcement: Announcement):
+        await self._handle([announcement])
+
+    async def ingest(self, handle: AnnouncementHandler):
+        """Connects and listens until stopped; every announcement frame goes to handle."""
+        self._handle = handle
+        await self.client.connect_and_listen()
+
+    def classify(self, announcement: Announcement) -> bool:
+        return is_delisting_title(announcement.title)
+
+    def parse(self, announcement: Announcement) -> dict:
+        # Tickers, date and time are all in the title
+        return parse_announcement_title(announcement.title)
+
+    def identity(self, announcement: Announcement) -> str:
+        return get_announcement_identity(announcement)
 
-# The _binance_client instance will be created and managed by the main FastAPI app.
+    async def aclose(self):
+        await self.client.stop()
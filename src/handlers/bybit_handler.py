@@ -1,62 +1,281 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import httpx
+from typing import Optional
 from src.repositories.bybit.bybit_client import BybitClient
 from src.bot.output_message_sender import OutputMessageSender
+from src.bot.alert_coalescer import AlertCoalescer
+from src.bot.delisting_stream import publish_delisting
 from src.repositories.bybit.bybit_storage import BybitStorage
 from src.utils.bybit.bybit_parser import parse_description
-from src.utils.output_message_formatter import format_delisting_message
+from src.utils.bounded_ordered_set import BoundedOrderedSet
+from src.models.announcement import Announcement, AnnouncementHandler
+from src.models.output_message import DelistingAlert
+from src.utils.metrics import DELISTINGS, FAILURES, stage_timer
+from src.utils.leader_election import is_leader
+from src.utils.traffic_recorder import TrafficRecorder
+from src.utils.logging_setup import setup_logging, stop_logging
+from src.handlers.symbol_index_handler import load_symbol_index
+from src.env import (
+    BYBIT_STATE_MAX_URLS,
+    TRAFFIC_RECORD_DIR,
+    TRAFFIC_RECORD_MAX_BYTES,
+    TRAFFIC_RECORD_MAX_FILES,
+    LOG_LEVEL,
+    LOG_FORMAT,
+    LOG_SAMPLE_PER_SECOND,
+    TWO_PHASE_ALERTS
+)
+
+logger = logging.getLogger(__name__)
+
+_FETCH_TIMER = stage_timer("bybit", "fetch")
+_PARSE_TIMER = stage_timer("bybit", "parse")
+_SEND_TIMER = stage_timer("bybit", "send")
+_DELISTINGS_METRIC = DELISTINGS.labels("bybit")
+_POLL_FAILURES_METRIC = FAILURES.labels("bybit_poll")
+
+def _get_announcement_list(items: list) -> list[Announcement]:
+    # Oldest first, so alerts go out in publication order and the newest URLs are the last evicted
+    return [
+        Announcement.from_bybit(item) for item in reversed(items)
+        if "description" in item and "url" in item
+    ]
+
+def _advance_watermark(watermark: Optional[int], announcements: list[Announcement]) -> Optional[int]:
+    published = [announcement.published_at for announcement in announcements if announcement.published_at is not None]
+    if not published:
+        return watermark
+    return max(published) if watermark is None else max(watermark, *published)
+
+def _create_bybit_client(http_client: Optional[httpx.AsyncClient] = None) -> BybitClient:
+    recorder = None
+    if TRAFFIC_RECORD_DIR:
+        recorder = TrafficRecorder(TRAFFIC_RECORD_DIR, "bybit", TRAFFIC_RECORD_MAX_BYTES, TRAFFIC_RECORD_MAX_FILES)
+    return BybitClient(recorder=recorder, http_client=http_client)
+
+def _build_alert(announcement: Announcement) -> DelistingAlert:
+    # Parse description
+    started = time.perf_counter()
+    parsed_data = parse_description(announcement.description)
+    _PARSE_TIMER.observe(time.perf_counter() - started)
+    _DELISTINGS_METRIC.inc()
+
+    return DelistingAlert(
+        header="BYBIT", # Static header for now
+        announcement_url=announcement.url,
+        tickers=parsed_data.get("tickers"),
+        date=parsed_data.get("date"),
+        time=parsed_data.get("time")
+    )
+
+def _build_alerts(announcements: list[Announcement]) -> list[DelistingAlert]:
+    alerts = [_build_alert(announcement) for announcement in announcements]
+    for alert in alerts:
+        publish_delisting(alert) # Stream subscribers first: publishing never waits
+    return alerts
+
+async def _send_alerts(announcements: list[Announcement], alert_coalescer: AlertCoalescer) -> list[DelistingAlert]:
+    # Announcements found by one request go out as one merged message per chat
+    started = time.perf_counter()
+    if TWO_PHASE_ALERTS:
+        # Headlines now, parsed details as an edit (the send stage includes the parse)
+        headlines = [DelistingAlert(header="BYBIT", announcement_url=announcement.url) for announcement in announcements]
+        alerts = await alert_coalescer.send_alerts_in_two_phases(headlines, lambda: _build_alerts(announcements))
+    else:
+        alerts = _build_alerts(announcements)
+        await alert_coalescer.send_alerts(alerts)
+    _SEND_TIMER.observe(time.perf_counter() - started)
+    return alerts
+
+class _FunctionInstance:
+    """
+    What a cloud-function instance keeps between warm invocations: the event loop
+    (the HTTP sessions are bound to it), the Bybit and Telegram clients with their
+    connection pools, and the S3 state with its ETag, so an unchanged state costs
+    a bodyless 304. Only the first invocation pays for creating them.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.bybit_client = _create_bybit_client()
+        self.output_sender = OutputMessageSender()
+        # A single invocation has nothing to wait for: everything new is sent merged right away
+        self.alert_coalescer = AlertCoalescer(self.output_sender, window_seconds=0)
+        self.bybit_storage: Optional[BybitStorage] = None
+
+    def load_state(self) -> BoundedOrderedSet:
+        # Blocking, and on a cold start it imports boto3 too: run it in a thread
+        if self.bybit_storage is None:
+            self.bybit_storage = BybitStorage(max_urls=BYBIT_STATE_MAX_URLS)
+        return self.bybit_storage.load_state()
+
+_function_instance: Optional[_FunctionInstance] = None
+# Invocations of one instance take turns on its event loop
+_function_instance_lock = threading.Lock()
 
 def handle_bybit_announcements(event, context):
     """
     Handles the Bybit announcement check.
     This function is intended to be called by a Yandex Cloud Function.
     """
-    bybit_client = BybitClient()
-    output_sender = OutputMessageSender()
-    bybit_storage = BybitStorage() # Initialize BybitStorage
+    global _function_instance
+    started_logging = setup_logging(LOG_LEVEL, json_output=LOG_FORMAT == "json", sample_per_second=LOG_SAMPLE_PER_SECOND)
+    try:
+        with _function_instance_lock:
+            if _function_instance is None:
+                _function_instance = _FunctionInstance()
+            return _function_instance.loop.run_until_complete(_handle_bybit_announcements(_function_instance))
+    finally:
+        # The instance may be frozen right after returning, write the logs out first
+        if started_logging:
+            stop_logging()
 
+async def _handle_bybit_announcements(instance: _FunctionInstance):
+    bybit_client = instance.bybit_client
     try:
-        announcements = bybit_client.get_announcements()
-        current_state_urls = bybit_storage.load_state() # Load current state
-        new_urls_to_store = list(current_state_urls) # Copy for modifications
-
-        if "result" in announcements and "list" in announcements["result"]:
-            for announcement in announcements["result"]["list"]:
-                if "description" in announcement and "url" in announcement:
-                    url = announcement["url"]
-                    if url not in current_state_urls: # Check if URL is new
-                        description = announcement["description"]
-                        
-                        # Parse description
-                        parsed_data = parse_description(description)
-                        
-                        # Format message
-                        formatted_message = format_delisting_message(
-                            header="BYBIT", # Static header for now
-                            tickers=parsed_data.get("tickers"),
-                            date=parsed_data.get("date"),
-                            time=parsed_data.get("time"),
-                            announcement_url=url
-                        )
-                        output_sender.send_telegram_message(formatted_message)
-                        
-                        # Add new URL to the state, trimming if necessary
-                        new_urls_to_store = bybit_storage.add_and_trim_url(url, new_urls_to_store)
-        else:
-            # Handle case where expected structure is not found
-            error_message = "Bybit announcements response did not contain expected 'result.list' structure."
-            print(error_message)
-            output_sender.send_telegram_message(f"Error: {error_message}")
-        
-        bybit_storage.save_state(new_urls_to_store) # Save updated state
+        # The first page does not depend on the watermark: request it right away and
+        # load the state from S3 and the trading pairs snapshot (no refresh here) meanwhile
+        started = time.perf_counter()
+        first_page, seen_urls, _ = await asyncio.gather(
+            bybit_client.get_announcements(limit=bybit_client.page_size),
+            asyncio.to_thread(instance.load_state),
+            load_symbol_index()
+        )
+        bybit_storage = instance.bybit_storage
+        items = await bybit_client.get_announcements_since(bybit_storage.watermark, first_page=first_page)
+        _FETCH_TIMER.observe(time.perf_counter() - started)
+
+        announcement_list = _get_announcement_list(items)
+        new_announcements = []
+        for announcement in announcement_list:
+            if announcement.url not in seen_urls: # Check if URL is new
+                new_announcements.append(announcement)
+
+                # Add new URL to the state, evicting the oldest if necessary
+                seen_urls.add(announcement.url)
+        await _send_alerts(new_announcements, instance.alert_coalescer)
+
+        # Save updated state (skipped if unchanged)
+        await asyncio.to_thread(bybit_storage.save_state, seen_urls, _advance_watermark(bybit_storage.watermark, announcement_list))
 
         return {
             'statusCode': 200,
             'body': 'Successfully processed and sent Bybit delisting announcements.'
         }
     except Exception as e:
+        _POLL_FAILURES_METRIC.inc()
         error_message = f"Error handling Bybit announcements: {e}"
-        print(error_message)
-        output_sender.send_telegram_message(f"Error: {error_message}")
+        logger.exception(error_message)
+        await instance.output_sender.send_telegram_message(f"Error: {error_message}")
         return {
             'statusCode': 500,
             'body': error_message
         }
+
+class BybitPoller:
+    """
+    Bybit announcements for the SourceRegistry, polled from the delistings
+    endpoint: the long-running replacement for the cloud-function handler.
+    The HTTP session, S3 client and seen URLs stay in memory between polls; S3 is
+    read once at startup and written only when new announcements were sent.
+    The interval drops to min_interval after news and backs off towards
+    max_interval while nothing changes, with random jitter on every sleep.
+    """
+    name = "bybit"
+
+    def __init__(
+        self,
+        min_interval: float = 2.0,
+        max_interval: float = 30.0,
+        backoff_factor: float = 1.5,
+        jitter: float = 0.2,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+
+        self.bybit_client = _create_bybit_client(http_client)
+        self.bybit_storage: Optional[BybitStorage] = None
+        self._handle: Optional[AnnouncementHandler] = None
+        self._seen_urls: Optional[BoundedOrderedSet] = None
+        self._interval = min_interval
+        self._stop_event = asyncio.Event()
+
+    def classify(self, announcement: Announcement) -> bool:
+        # The endpoint only lists delistings
+        return True
+
+    def parse(self, announcement: Announcement) -> dict:
+        return parse_description(announcement.description)
+
+    def identity(self, announcement: Announcement) -> str:
+        # Bybit's URLs are canonical, and the archive already keys Bybit announcements by them
+        return announcement.url
+
+    async def _load_state(self):
+        # boto3 is synchronous, keep it off the event loop
+        self.bybit_storage = await asyncio.to_thread(BybitStorage, max_urls=BYBIT_STATE_MAX_URLS)
+        self._seen_urls = await asyncio.to_thread(self.bybit_storage.load_state)
+
+    async def poll_once(self) -> int:
+        """
+        Runs one poll and hands the new announcements to the registry.
+        Returns:
+            Number of new announcements.
+        """
+        if self._seen_urls is None:
+            await self._load_state()
+
+        # One small request normally; a backlog behind the watermark is walked page by page
+        watermark = self.bybit_storage.watermark
+        started = time.perf_counter()
+        items = await self.bybit_client.get_announcements_since(watermark, only_if_changed=True)
+        _FETCH_TIMER.observe(time.perf_counter() - started)
+        if items is None:
+            return 0
+
+        announcement_list = _get_announcement_list(items)
+        new_announcements = [announcement for announcement in announcement_list if announcement.url not in self._seen_urls]
+        if new_announcements:
+            # Announcements found by one request go out as one merged message per chat
+            await self._handle(new_announcements)
+            for announcement in new_announcements:
+                self._seen_urls.add(announcement.url)
+        await asyncio.to_thread(self.bybit_storage.save_state, self._seen_urls, _advance_watermark(watermark, announcement_list))
+        return len(new_announcements)
+
+    def _next_delay(self, found_new: bool) -> float:
+        if found_new:
+            self._interval = self.min_interval
+        else:
+            self._interval = min(self._interval * self.backoff_factor, self.max_interval)
+        return self._interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def ingest(self, handle: AnnouncementHandler):
+        """Polls until stopped; new announcements go to handle."""
+        self._handle = handle
+        while not self._stop_event.is_set():
+            if not is_leader():
+                # The leader polls; reload its state from S3 after taking over, then poll right away
+                self._seen_urls = None
+                found_new = True
+            else:
+                try:
+                    found_new = await self.poll_once() > 0
+                except Exception as e:
+                    _POLL_FAILURES_METRIC.inc()
+                    logger.exception("Error polling Bybit announcements: %s", e)
+                    found_new = False
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self._next_delay(found_new))
+            except asyncio.TimeoutError:
+                pass
+
+    async def aclose(self):
+        self._stop_event.set()
+        await self.bybit_client.aclose()
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Optional
+from src.bot.output_message_sender import OutputMessageSender
+from src.bot.reminder_scheduler import ReminderScheduler
+from src.models.output_message import DelistingAlert
+from src.repositories.reminders.reminder_store import ReminderStore
+from src.utils.delisting_deadline import parse_delisting_deadline
+from src.utils.metrics import FAILURES
+from src.env import REMINDER_OFFSETS_HOURS, REMINDER_STORE_PATH, REMINDER_GRACE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_scheduler: Optional[ReminderScheduler] = None
+_REMINDER_FAILURES_METRIC = FAILURES.labels("reminders")
+
+async def start_reminder_scheduler(output_sender: OutputMessageSender) -> Optional[asyncio.Task]:
+    """
+    Creates the reminder scheduler, restores the delistings saved by the previous
+    run and starts sending; reminders go through output_sender (and its outbox).
+    Returns:
+        The scheduler task, or None if no reminder offsets are configured.
+    """
+    global _scheduler
+    if not REMINDER_OFFSETS_HOURS:
+        return None
+    store = await asyncio.to_thread(ReminderStore, REMINDER_STORE_PATH) if REMINDER_STORE_PATH else None
+    _scheduler = ReminderScheduler(
+        output_sender,
+        offsets=[hours * 3600 for hours in REMINDER_OFFSETS_HOURS],
+        store=store,
+        grace_seconds=REMINDER_GRACE_SECONDS
+    )
+    await asyncio.to_thread(_scheduler.restore)
+    return asyncio.create_task(_scheduler.run())
+
+def schedule_delisting_reminders(alert: DelistingAlert):
+    """
+    Schedules the reminders for a delisting alert (on every instance, only the
+    leader sends them). Does nothing without a running scheduler or when the
+    announcement's tickers or deadline weren't parsed.
+    Never raises: the alert itself is already out.
+    """
+    if _scheduler is None or not alert.tickers:
+        return
+    deadline = parse_delisting_deadline(alert.date, alert.time)
+    if deadline is None:
+        return
+    try:
+        _scheduler.schedule(alert.header, alert.tickers, deadline, alert.announcement_url)
+    except Exception as e:
+        _REMINDER_FAILURES_METRIC.inc()
+        logger.error("Error scheduling reminders for %s: %s", alert.tickers, e)
+
+async def take_over_reminders(replay_seconds: float):
+    """Called when this instance becomes the leader, see ReminderScheduler.take_over."""
+    if _scheduler is not None:
+        await _scheduler.take_over(replay_seconds)
+
+def get_pending_reminders() -> int:
+    return 0 if _scheduler is None else len(_scheduler)
+
+def close_reminder_scheduler():
+    global _scheduler
+    if _scheduler is not None and _scheduler.store is not None:
+        _scheduler.store.close()
+    _scheduler = None
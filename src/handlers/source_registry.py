@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Callable, Optional
+from src.bot.output_message_sender import OutputMessageSender
+from src.bot.alert_coalescer import AlertCoalescer
+from src.bot.delisting_stream import publish_delisting
+from src.handlers.archive_handler import archive_announcement
+from src.handlers.reminder_handler import schedule_delisting_reminders
+from src.repositories.binance.binance_storage import BinanceStorage
+from src.utils.dedup_index import DedupIndex
+from src.utils.leader_election import is_leader
+from src.models.announcement import Announcement, AnnouncementHandler, AnnouncementSource
+from src.models.output_message import DelistingAlert
+from src.utils.metrics import DELISTINGS, FAILURES, stage_timer
+from src.env import (
+    BINANCE_DEDUP_MAX_ITEMS,
+    BINANCE_DEDUP_TTL_SECONDS,
+    BINANCE_DEDUP_BLOOM_CAPACITY,
+    BINANCE_DEDUP_SNAPSHOT,
+    BINANCE_DEDUP_SNAPSHOT_PATH,
+    ALERT_COALESCE_WINDOW_SECONDS,
+    TELEGRAM_OUTBOX_PATH,
+    TWO_PHASE_ALERTS
+)
+
+logger = logging.getLogger(__name__)
+
+# Delay before restarting a feed whose ingest loop failed, doubling up to the maximum
+SOURCE_RESTART_BACKOFF_BASE = 1.0
+SOURCE_RESTART_BACKOFF_MAX = 60.0
+
+class _SourceMetrics:
+    """Metric children of one source, resolved once so the hot path only calls observe()/inc()."""
+    def __init__(self, name: str):
+        self.queue = stage_timer(name, "queue")
+        self.classify = stage_timer(name, "classify")
+        self.parse = stage_timer(name, "parse")
+        self.send = stage_timer(name, "send")
+        self.end_to_end = stage_timer(name, "end_to_end")
+        self.delistings = DELISTINGS.labels(name)
+        self.failures = FAILURES.labels(f"{name}_ingest")
+
+class SourceRegistry:
+    """
+    Runs every registered exchange feed as its own task on the running event loop
+    and puts their announcements through one pipeline: classify, leader check,
+    shared dedup, alert (coalesced, optionally in two phases), archive, reminders.
+
+    A feed costs one task and its metric children; the sender, coalescer, dedup
+    index and exchange HTTP pool are shared. Feeds never wait on each other: each
+    batch is handled on its own feed's task, and an ingest loop that fails is
+    restarted with backoff while the others keep running.
+    """
+    def __init__(
+        self,
+        alert_coalescer: AlertCoalescer,
+        dedup_index: DedupIndex,
+        two_phase: bool = False,
+        on_new_identities: Optional[Callable[[], None]] = None,
+        standby_buffer_size: int = 100
+    ):
+        self.alert_coalescer = alert_coalescer
+        self.dedup_index = dedup_index
+        self.two_phase = two_phase
+        self.on_new_identities = on_new_identities
+        self.sources: dict[str, AnnouncementSource] = {}
+        self._metrics: dict[str, _SourceMetrics] = {}
+        # Identities being sent: duplicates arriving meanwhile are skipped, but they
+        # only go into the dedup index once the send succeeded, so a failed one is retried
+        self._sending: set[str] = set()
+        # Announcements already published to this process's stream subscribers (leader or not)
+        self._streamed = DedupIndex()
+        # Delisting announcements a standby received; replayed if it takes over shortly after
+        self._standby_announcements: deque[tuple[AnnouncementSource, Announcement]] = deque(maxlen=standby_buffer_size)
+
+    def register(self, source: AnnouncementSource):
+        if source.name in self.sources:
+            raise ValueError(f"A source named {source.name} is already registered.")
+        self.sources[source.name] = source
+        self._metrics[source.name] = _SourceMetrics(source.name)
+
+    def handler_for(self, source: AnnouncementSource) -> AnnouncementHandler:
+        """The callback a registered source's ingest() hands its announcements to."""
+        return lambda announcements: self.process(source, announcements)
+
+    def _build_alert(self, source: AnnouncementSource, metrics: _SourceMetrics, announcement: Announcement) -> DelistingAlert:
+        started = time.perf_counter()
+        parsed_data = source.parse(announcement)
+        metrics.parse.observe(time.perf_counter() - started)
+
+        alert = DelistingAlert(
+            header=source.name.upper(),
+            announcement_url=announcement.url,
+            tickers=parsed_data.get("tickers"),
+            date=parsed_data.get("date"),
+            time=parsed_data.get("time")
+        )
+        # Stream subscribers get the event first: publishing never waits
+        if not self._streamed.seen_or_add(source.identity(announcement)):
+            publish_delisting(alert)
+        return alert
+
+    async def process(self, source: AnnouncementSource, announcements: list[Announcement]):
+        """
+        Handles announcements that arrived together from one source; the
+        delistings among them go out as one merged message per chat.
+        """
+        metrics = self._metrics[source.name]
+        delistings = []
+        for announcement in announcements:
+            started = time.perf_counter()
+            if announcement.received_at:
+                metrics.queue.observe(started - announcement.received_at)
+            is_delisting = source.classify(announcement)
+            metrics.classify.observe(time.perf_counter() - started)
+            if is_delisting:
+                delistings.append(announcement)
+            else:
+                logger.debug("%s ANNOUNCEMENT (non-delisting): %s", source.name.upper(), announcement.title)
+                archive_announcement(announcement, identity=source.identity(announcement))
+        if not delistings:
+            return
+
+        # Only the leader sends; a standby keeps the announcements in case the leader just died.
+        # Stream subscribers of every instance get the events either way.
+        if not is_leader():
+            for announcement in delistings:
+                if not self._streamed.seen(source.identity(announcement)):
+                    # Reminders too, so they aren't lost if this instance takes over
+                    schedule_delisting_reminders(self._build_alert(source, metrics, announcement))
+            self._standby_announcements.extend((source, announcement) for announcement in delistings)
+            return
+
+        new_announcements, identities = [], []
+        for announcement in delistings:
+            # Same announcement after a reconnect, from another instance or another feed
+            identity = source.identity(announcement)
+            if identity in self._sending or self.dedup_index.seen(identity):
+                logger.info("DUPLICATE DELISTING ANNOUNCEMENT SKIPPED: %s", announcement.title)
+                continue
+            self._sending.add(identity)
+            metrics.delistings.inc()
+            logger.info("DELISTING ANNOUNCEMENT DETECTED: %s", announcement.title)
+            new_announcements.append(announcement)
+            identities.append(identity)
+        if not new_announcements:
+            return
+        try:
+            alerts = await self._send(source, metrics, new_announcements)
+            for identity in identities:
+                self.dedup_index.add(identity)
+        finally:
+            self._sending.difference_update(identities)
+        if self.on_new_identities is not None:
+            self.on_new_identities()
+
+        sent = time.perf_counter()
+        for announcement, alert, identity in zip(new_announcements, alerts, identities):
+            if announcement.received_at:
+                metrics.end_to_end.observe(sent - announcement.received_at)
+            # Archived once the alert is out (batched, see archive_handler)
+            archive_announcement(announcement, alert, identity)
+            schedule_delisting_reminders(alert)
+
+    async def _send(self, source: AnnouncementSource, metrics: _SourceMetrics, new_announcements: list[Announcement]) -> list[DelistingAlert]:
+        if self.two_phase:
+            # Headlines now, parsed details as an edit (the send stage includes the parse)
+            send_started = time.perf_counter()
+            headlines = [DelistingAlert(header=source.name.upper(), announcement_url=announcement.url) for announcement in new_announcements]
+            alerts = await self.alert_coalescer.send_alerts_in_two_phases(
+                headlines, lambda: [self._build_alert(source, metrics, announcement) for announcement in new_announcements]
+            )
+        else:
+            alerts = [self._build_alert(source, metrics, announcement) for announcement in new_announcements]
+            # Sent now, or merged with the next alerts if a coalescing window is open
+            # (formatting happens in the coalescer, so the send stage includes it)
+            send_started = time.perf_counter()
+            await self.alert_coalescer.send_alerts(alerts)
+        metrics.send.observe(time.perf_counter() - send_started)
+        return alerts
+
+    async def take_over(self, replay_seconds: float):
+        """Handles the delisting announcements this standby received in the last replay_seconds."""
+        cutoff = time.perf_counter() - replay_seconds
+        recent = [(source, announcement) for source, announcement in self._standby_announcements if announcement.received_at >= cutoff]
+        self._standby_announcements.clear()
+        for source, announcement in recent:
+            await self.process(source, [announcement])
+
+    async def _run_source(self, source: AnnouncementSource):
+        handle = self.handler_for(source)
+        attempt = 0
+        while True:
+            logger.info("%s feed started.", source.name)
+            started = time.monotonic()
+            try:
+                await source.ingest(handle)
+                logger.info("%s feed stopped.", source.name)
+                return
+            except Exception as e:
+                self._metrics[source.name].failures.inc()
+                logger.exception("Error in the %s feed, restarting it: %s", source.name, e)
+            # A feed that ran for a while before failing starts over from the shortest delay
+            if time.monotonic() - started > SOURCE_RESTART_BACKOFF_MAX:
+                attempt = 0
+            delay = min(SOURCE_RESTART_BACKOFF_MAX, SOURCE_RESTART_BACKOFF_BASE * 2 ** attempt)
+            attempt += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def run(self):
+        """
+        Runs every registered feed concurrently until cancelled.
+        This function is intended to be run as an asyncio task within a larger application.
+        """
+        tasks = [asyncio.create_task(self._run_source(source), name=f"source-{name}") for name, source in self.sources.items()]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def aclose(self):
+        """Closes every feed's connections."""
+        for source in self.sources.values():
+            try:
+                await source.aclose()
+            except Exception as e:
+                logger.exception("Error closing the %s feed: %s", source.name, e)
+
+# Shared sender so every alert of every feed reuses the same pooled keep-alive HTTP session
+output_sender = OutputMessageSender(outbox_path=TELEGRAM_OUTBOX_PATH)
+# Delisting waves go out as one merged message per chat instead of one per announcement
+alert_coalescer = AlertCoalescer(output_sender, window_seconds=ALERT_COALESCE_WINDOW_SECONDS)
+
+# Announcements already handled by any feed, shared across reconnects and restarts
+dedup_index = DedupIndex(
+    max_items=BINANCE_DEDUP_MAX_ITEMS,
+    ttl_seconds=BINANCE_DEDUP_TTL_SECONDS,
+    bloom_capacity=BINANCE_DEDUP_BLOOM_CAPACITY
+)
+_dedup_storage: Optional[BinanceStorage] = None
+_saved_dedup_version = 0
+_dedup_snapshot_task: Optional[asyncio.Task] = None
+
+async def load_dedup_index():
+    """Restores the dedup index from its snapshot (S3 or local file, see BINANCE_DEDUP_SNAPSHOT)."""
+    global _dedup_storage, _saved_dedup_version
+    if BINANCE_DEDUP_SNAPSHOT == "off":
+        return
+    local_path = BINANCE_DEDUP_SNAPSHOT_PATH if BINANCE_DEDUP_SNAPSHOT == "local" else None
+    _dedup_storage = await asyncio.to_thread(BinanceStorage, local_path=local_path)
+    snapshot = await asyncio.to_thread(_dedup_storage.load_snapshot)
+    if snapshot:
+        dedup_index.restore(snapshot)
+        logger.info("Restored %d announcement identities.", len(dedup_index))
+    _saved_dedup_version = dedup_index.version
+
+async def save_dedup_index():
+    """Writes a snapshot of the dedup index if it changed since the last one."""
+    global _saved_dedup_version
+    while _dedup_storage is not None and dedup_index.version != _saved_dedup_version:
+        version = dedup_index.version
+        await asyncio.to_thread(_dedup_storage.save_snapshot, dedup_index.snapshot())
+        _saved_dedup_version = version
+
+def _schedule_dedup_snapshot():
+    # One writer at a time; it keeps going while new identities arrive
+    global _dedup_snapshot_task
+    if _dedup_storage is not None and (_dedup_snapshot_task is None or _dedup_snapshot_task.done()):
+        _dedup_snapshot_task = asyncio.create_task(save_dedup_index())
+
+source_registry = SourceRegistry(alert_coalescer, dedup_index, two_phase=TWO_PHASE_ALERTS, on_new_identities=_schedule_dedup_snapshot)
+
+async def take_over_alerts(replay_seconds: float):
+    """
+    Called when this instance becomes the leader: reloads the dedup index the
+    previous leader saved and handles the delisting announcements received in
+    the last replay_seconds, so those the previous leader didn't get to are sent
+    (at least once: one it sent but hadn't saved yet is sent again).
+    """
+    await load_dedup_index()
+    await source_registry.take_over(replay_seconds)
+
+def start_output_sender():
+    """Starts redelivering failed (or interrupted) alerts from the outbox."""
+    output_sender.start_retry_scheduler()
+
+def get_pending_deliveries() -> int:
+    return output_sender.pending_deliveries()
+
+async def stop_output_sender():
+    """Sends alerts still held by the coalescer and closes the pooled HTTP session of the shared sender."""
+    await alert_coalescer.flush()
+    await output_sender.aclose()
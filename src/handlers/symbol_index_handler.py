@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import time
+import httpx
+from typing import Optional
+from src.repositories.binance.binance_market_client import BinanceMarketClient
+from src.repositories.bybit.bybit_client import BybitClient
+from src.utils.symbol_index import SYMBOL_INDEX
+from src.utils.metrics import FAILURES
+from src.env import SYMBOL_INDEX_PATH, SYMBOL_INDEX_REFRESH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Never check the pair lists more often than this, even after a failed refresh
+MIN_REFRESH_DELAY = 60.0
+
+_REFRESH_FAILURES_METRIC = FAILURES.labels("symbol_index")
+
+async def load_symbol_index():
+    """Fills the shared symbol index from its local snapshot, if there is one."""
+    if not SYMBOL_INDEX_PATH or SYMBOL_INDEX:
+        return
+    if await asyncio.to_thread(SYMBOL_INDEX.load, SYMBOL_INDEX_PATH):
+        logger.info("Loaded %d trading pairs from %s.", len(SYMBOL_INDEX), SYMBOL_INDEX_PATH)
+
+class SymbolIndexRefresher:
+    """
+    Keeps the shared symbol index current. Each pair list is refetched on its own
+    once it is older than refresh_seconds (so a fresh snapshot means no requests
+    at startup), new pairs are merged in, and the snapshot is rewritten after
+    every round that fetched anything.
+    """
+    def __init__(self, refresh_seconds: float = SYMBOL_INDEX_REFRESH_SECONDS, http_client: Optional[httpx.AsyncClient] = None):
+        self.refresh_seconds = refresh_seconds
+        self.binance_client = BinanceMarketClient(http_client=http_client)
+        self.bybit_client = BybitClient(http_client=http_client)
+        self._sources = {
+            "binance_spot": self.binance_client.get_trading_pairs,
+            "bybit_spot": lambda: self.bybit_client.get_trading_pairs("spot"),
+            "bybit_linear": lambda: self.bybit_client.get_trading_pairs("linear")
+        }
+
+    async def refresh_due(self) -> float:
+        """
+        Refetches every pair list older than refresh_seconds.
+        Returns:
+            Seconds until the next list is due.
+        """
+        refreshed = False
+        for source, fetch in self._sources.items():
+            if time.time() - SYMBOL_INDEX.updated_at.get(source, 0) < self.refresh_seconds:
+                continue
+            try:
+                added = SYMBOL_INDEX.add_pairs(source, await fetch())
+                refreshed = True
+                if added:
+                    logger.info("Symbol index: %d new pairs from %s, %d in total.", added, source, len(SYMBOL_INDEX))
+            except Exception as e:
+                _REFRESH_FAILURES_METRIC.inc()
+                logger.warning("Error refreshing %s trading pairs: %s", source, e)
+
+        if refreshed and SYMBOL_INDEX_PATH:
+            try:
+                await asyncio.to_thread(SYMBOL_INDEX.save, SYMBOL_INDEX_PATH)
+            except OSError as e:
+                logger.error("Error saving symbol index snapshot: %s", e)
+
+        oldest = min(SYMBOL_INDEX.updated_at.get(source, 0) for source in self._sources)
+        return max(MIN_REFRESH_DELAY, oldest + self.refresh_seconds - time.time())
+
+    async def run(self):
+        try:
+            while True:
+                await asyncio.sleep(await self.refresh_due())
+        finally:
+            await self.binance_client.aclose()
+            await self.bybit_client.aclose()
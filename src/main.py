@@ -1,49 +1,291 @@
 import asyncio
-from fastapi import FastAPI
+import hmac
+import logging
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, Query, Response, WebSocket
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from contextlib import asynccontextmanager
 
-from src.handlers.binance_handler import start_binance_websocket_listener, process_binance_websocket_message
-from src.repositories.binance.binance_client import BinanceClient
+from src.handlers.source_registry import (
+    source_registry,
+    output_sender,
+    load_dedup_index,
+    save_dedup_index,
+    start_output_sender,
+    stop_output_sender,
+    get_pending_deliveries,
+    take_over_alerts
+)
+from src.handlers.binance_handler import BinanceSource
+from src.handlers.bybit_handler import BybitPoller
+from src.handlers.symbol_index_handler import SymbolIndexRefresher, load_symbol_index
+from src.handlers.archive_handler import close_announcement_archive, query_announcements
+from src.handlers.reminder_handler import start_reminder_scheduler, close_reminder_scheduler, get_pending_reminders, take_over_reminders
+from src.repositories.http.http_client import get_http_client, close_http_client
+from src.utils.traffic_recorder import TrafficRecorder
+from src.utils.logging_setup import setup_logging, stop_logging
+from src.utils.loop_watchdog import LoopWatchdog
+from src.bot.delisting_stream import delisting_events
+from src.utils.leader_election import LeaderElector, is_leader, set_leader_elector
+from src.repositories.leader.leader_lease import FileLockLease, S3Lease
+from src.utils.sampling_profiler import format_folded, sample_stacks
+from src.utils.metrics import QUEUE_DEPTH, ACTIVE_CONNECTIONS, SECONDS_SINCE_LAST_FRAME, OUTBOX_PENDING, IS_LEADER, STREAM_SUBSCRIBERS, REMINDERS_PENDING
+from src.env import (
+    BINANCE_DISPATCH_WORKERS,
+    BINANCE_DISPATCH_QUEUE_SIZE,
+    BINANCE_DISPATCH_OVERFLOW,
+    BINANCE_WS_CONNECTIONS,
+    BINANCE_WS_STAGGER_SECONDS,
+    BYBIT_POLLER_ENABLED,
+    BYBIT_POLL_MIN_INTERVAL,
+    BYBIT_POLL_MAX_INTERVAL,
+    TRAFFIC_RECORD_DIR,
+    TRAFFIC_RECORD_MAX_BYTES,
+    TRAFFIC_RECORD_MAX_FILES,
+    LOG_LEVEL,
+    LOG_FORMAT,
+    LOG_SAMPLE_PER_SECOND,
+    SYMBOL_INDEX_REFRESH_SECONDS,
+    LOOP_WATCHDOG_INTERVAL,
+    LOOP_BLOCK_THRESHOLD_SECONDS,
+    DEBUG_TOKEN,
+    LEADER_ELECTION,
+    LEADER_LEASE_SECONDS,
+    LEADER_LOCK_PATH,
+    INSTANCE_ID
+)
 
-# This is a placeholder for the actual BinanceClient background task
-# We will define a proper way to manage it soon.
-_binance_task: asyncio.Task = None
-_binance_client: BinanceClient = None
+logger = logging.getLogger(__name__)
+
+# Every exchange feed runs in this one task, see SourceRegistry
+_sources_task: asyncio.Task = None
+_symbol_index_task: asyncio.Task = None
+_reminder_task: asyncio.Task = None
+_loop_watchdog = LoopWatchdog(interval=LOOP_WATCHDOG_INTERVAL, block_threshold=LOOP_BLOCK_THRESHOLD_SECONDS)
+_loop_watchdog_task: asyncio.Task = None
+_profile_lock = asyncio.Lock()
+_leader_task: asyncio.Task = None
+
+# Comment lines sent to idle SSE clients so proxies don't time the connection out
+STREAM_KEEPALIVE_SECONDS = 15.0
+# WebSocket close code for a subscriber dropped by the "disconnect" slow consumer policy
+STREAM_SLOW_CONSUMER_CLOSE_CODE = 1013
+
+async def _create_leader_elector() -> LeaderElector:
+    if LEADER_ELECTION == "s3":
+        # boto3 client creation is slow and synchronous, keep it off the event loop
+        lease = await asyncio.to_thread(S3Lease, INSTANCE_ID, ttl_seconds=LEADER_LEASE_SECONDS)
+    elif LEADER_ELECTION == "file":
+        lease = FileLockLease(LEADER_LOCK_PATH)
+    else:
+        raise ValueError(f"Unknown LEADER_ELECTION mode: {LEADER_ELECTION}")
+    elector = LeaderElector(lease, ttl_seconds=LEADER_LEASE_SECONDS)
+    # A standby may have received announcements the dead leader never sent:
+    # replay those from the longest possible takeover time
+    elector.on_elected(lambda: take_over_alerts(LEADER_LEASE_SECONDS + 2 * elector.renew_interval))
+    # Same for reminders: those due before that window were the previous leader's
+    elector.on_elected(lambda: take_over_reminders(LEADER_LEASE_SECONDS + 2 * elector.renew_interval))
+    return elector
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
-    print("Starting up FastAPI application...")
+    setup_logging(LOG_LEVEL, json_output=LOG_FORMAT == "json", sample_per_second=LOG_SAMPLE_PER_SECOND)
+    logger.info("Starting up FastAPI application...")
+    # Watch the loop from the start, so slow startup steps show up too
+    global _loop_watchdog_task
+    _loop_watchdog_task = asyncio.create_task(_loop_watchdog.run())
     
-    # Initialize BinanceClient
-    global _binance_client
-    _binance_client = BinanceClient(message_handler=process_binance_websocket_message)
+    # Known trading pairs for the parsers; refreshed in the background from the exchanges
+    await load_symbol_index()
+    global _symbol_index_task
+    if SYMBOL_INDEX_REFRESH_SECONDS > 0:
+        _symbol_index_task = asyncio.create_task(SymbolIndexRefresher(SYMBOL_INDEX_REFRESH_SECONDS, http_client=get_http_client()).run())
+
+    # With several instances only the leader sends; the others keep their connections warm
+    global _leader_task
+    if LEADER_ELECTION != "off":
+        elector = await _create_leader_elector()
+        set_leader_elector(elector)
+        _leader_task = asyncio.create_task(elector.run())
+    IS_LEADER.set_function(lambda: int(is_leader()))
+    STREAM_SUBSCRIBERS.set_function(lambda: len(delisting_events))
+
+    # Restore already handled announcements before the first frame arrives
+    await load_dedup_index()
+    # Redeliver alerts that failed or were in flight when the previous process stopped
+    start_output_sender()
+    OUTBOX_PENDING.set_function(get_pending_deliveries)
+    # Reminders before delisting deadlines share the alert sender and its outbox;
+    # every instance schedules them, only the leader sends
+    global _reminder_task
+    _reminder_task = await start_reminder_scheduler(output_sender)
+    REMINDERS_PENDING.set_function(get_pending_reminders)
+
+    # Exchange feeds: each one is a task of the registry, sharing its pipeline,
+    # the sender, the dedup index and the exchange HTTP pool
+    binance_source = BinanceSource(
+        dispatch_workers=BINANCE_DISPATCH_WORKERS,
+        dispatch_queue_size=BINANCE_DISPATCH_QUEUE_SIZE,
+        dispatch_overflow=BINANCE_DISPATCH_OVERFLOW,
+        connections=BINANCE_WS_CONNECTIONS,
+        stagger_seconds=BINANCE_WS_STAGGER_SECONDS,
+        recorder=TrafficRecorder(
+            TRAFFIC_RECORD_DIR, "binance", TRAFFIC_RECORD_MAX_BYTES, TRAFFIC_RECORD_MAX_FILES
+        ) if TRAFFIC_RECORD_DIR else None
+    )
+    source_registry.register(binance_source)
+    # Gauges are read from the client only when /metrics is scraped
+    binance_client = binance_source.client
+    QUEUE_DEPTH.labels("binance").set_function(binance_client.dispatcher.qsize)
+    ACTIVE_CONNECTIONS.labels("binance").set_function(lambda: binance_client.stats.active_connections)
+    SECONDS_SINCE_LAST_FRAME.labels("binance").set_function(binance_client.frame_clock.seconds_since_last_frame)
+    if BYBIT_POLLER_ENABLED:
+        source_registry.register(BybitPoller(
+            min_interval=BYBIT_POLL_MIN_INTERVAL,
+            max_interval=BYBIT_POLL_MAX_INTERVAL,
+            http_client=get_http_client()
+        ))
 
-    # Start Binance WebSocket listener in the background
     # We create a task that runs in the event loop managed by FastAPI
-    global _binance_task
-    _binance_task = asyncio.create_task(start_binance_websocket_listener(client_instance=_binance_client))
+    global _sources_task
+    _sources_task = asyncio.create_task(source_registry.run())
     
     yield
     
     # Shutdown logic
-    print("Shutting down FastAPI application...")
-    if _binance_task:
-        _binance_task.cancel() # Request cancellation
+    logger.info("Shutting down FastAPI application...")
+    if _sources_task:
+        _sources_task.cancel() # Request cancellation
         try:
-            await _binance_task # Await for the task to finish cancelling
+            await _sources_task # Await for the task to finish cancelling
         except asyncio.CancelledError:
-            print("Binance WebSocket listener task cancelled.")
+            logger.info("Exchange feeds cancelled.")
         except Exception as e:
-            print(f"Error during Binance WebSocket listener shutdown: {e}")
-    
-    if _binance_client:
-        await _binance_client.stop()
+            logger.exception("Error during exchange feeds shutdown: %s", e)
+    await source_registry.aclose()
+
+    if _symbol_index_task:
+        _symbol_index_task.cancel()
+        await asyncio.gather(_symbol_index_task, return_exceptions=True)
+
+    if _reminder_task:
+        _reminder_task.cancel()
+        await asyncio.gather(_reminder_task, return_exceptions=True)
+    close_reminder_scheduler()
+
+    await close_http_client()
+    await save_dedup_index()
+    await stop_output_sender()
+    close_announcement_archive()
+
+    if _leader_task:
+        # Releases the lease, so a standby takes over without waiting for it to expire
+        _leader_task.cancel()
+        await asyncio.gather(_leader_task, return_exceptions=True)
+
+    if _loop_watchdog_task:
+        _loop_watchdog_task.cancel()
+        await asyncio.gather(_loop_watchdog_task, return_exceptions=True)
+    stop_logging()
 
 app = FastAPI(lifespan=lifespan)
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "message": "Service is running"}
+    event_loop = _loop_watchdog.stats()
+    role = "leader" if is_leader() else "standby"
+    if event_loop["blocked"]:
+        return {"status": "degraded", "message": "Event loop is lagging", "role": role, "event_loop": event_loop}
+    return {"status": "ok", "message": "Service is running", "role": role, "event_loop": event_loop}
+
+@app.get("/metrics")
+async def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/debug/profile")
+async def debug_profile(seconds: float = Query(10, gt=0, le=60), authorization: Optional[str] = Header(None)):
+    """
+    Samples every thread's stack for the given time and returns the folded stacks
+    (flamegraph.pl / speedscope input). Requires "Authorization: Bearer <DEBUG_TOKEN>".
+    """
+    if not DEBUG_TOKEN:
+        raise HTTPException(status_code=404)
+    if authorization is None or not hmac.compare_digest(authorization.encode(), f"Bearer {DEBUG_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid debug token")
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    async with _profile_lock:
+        # The sampler runs in its own thread, the loop stays free (and is part of the profile)
+        stacks = await asyncio.to_thread(sample_stacks, seconds)
+    return Response(content=format_folded(stacks), media_type="text/plain")
+
+@app.get("/announcements")
+async def announcements(
+    ticker: Optional[str] = None,
+    exchange: Optional[str] = None,
+    since: Optional[int] = Query(None, description="Publish time from, ms since epoch"),
+    until: Optional[int] = Query(None, description="Publish time to, ms since epoch"),
+    delisting: Optional[bool] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, pattern=r"^\d+:\d+$")
+):
+    """
+    Archived announcements, newest first, e.g. /announcements?ticker=XYZ&delisting=true&since=...
+    Pass next_cursor from the response as cursor to get the next page.
+    """
+    body = query_announcements(ticker, exchange, since, until, delisting, limit, cursor)
+    if body is None:
+        raise HTTPException(status_code=404, detail="The announcement archive is disabled")
+    return Response(content=body, media_type="application/json")
+
+@app.get("/stream/delistings")
+async def stream_delistings_sse(last_event_id: Optional[int] = Header(None)):
+    """
+    Parsed delisting events as Server-Sent Events ("delisting" events with a JSON
+    body: exchange, tickers, date, time, url, detected_at). Reconnecting clients
+    send Last-Event-ID and get the events they missed, if still in the history.
+    """
+    subscriber = delisting_events.subscribe(last_event_id)
+
+    async def events():
+        try:
+            yield b"retry: 1000\n\n"
+            while not subscriber.closed:
+                event = await subscriber.next(timeout=STREAM_KEEPALIVE_SECONDS)
+                yield event.sse if event is not None else b": keepalive\n\n"
+        finally:
+            delisting_events.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/stream/delistings")
+async def stream_delistings_websocket(websocket: WebSocket, last_event_id: Optional[int] = None):
+    """Same events as the SSE endpoint, one JSON text message each (?last_event_id= to resume)."""
+    await websocket.accept()
+    subscriber = delisting_events.subscribe(last_event_id)
+
+    async def forward():
+        while not subscriber.closed:
+            event = await subscriber.next()
+            if event is not None:
+                await websocket.send_text(event.json)
+
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    # A slow client only ever blocks its own forward(); the broadcaster never waits for it
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        if tasks[0] in done and subscriber.closed:
+            await websocket.close(code=STREAM_SLOW_CONSUMER_CLOSE_CODE, reason="Too slow, events were dropped")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        delisting_events.unsubscribe(subscriber)
 
 # You can add other API endpoints here if needed
@@ -0,0 +1,93 @@
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, Protocol, Union
+from urllib.parse import urlsplit
+
+# orjson is optional: it decodes frames several times faster, json is the fallback
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Every Binance announcement frame carries "e":"announcement"; anything without the
+# marker (subscription acks, other events) is rejected before decoding
+_ANNOUNCEMENT_MARKER = '"announcement"'
+_ANNOUNCEMENT_MARKER_BYTES = b'"announcement"'
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+@dataclass(slots=True, frozen=True)
+class Announcement:
+    """Exchange announcement shared by the Binance and Bybit paths."""
+    exchange: str
+    title: str
+    url: str
+    description: str = ""
+    published_at: Optional[int] = None # Milliseconds since epoch, if the exchange provides it
+    received_at: float = field(default=0.0, compare=False) # time.perf_counter() when the frame arrived
+
+    @classmethod
+    def from_bybit(cls, item: dict) -> "Announcement":
+        """Builds an announcement from one entry of Bybit's result.list."""
+        return cls(
+            exchange="BYBIT",
+            title=item.get("title", ""),
+            url=item["url"],
+            description=item["description"],
+            published_at=item.get("publishTime")
+        )
+
+def get_announcement_identity(announcement: Announcement) -> str:
+    """
+    Normalized identity of an announcement: the article URL without scheme,
+    query, fragment and trailing slash, or the case-folded title if there is no URL.
+    The host is part of it, so identities of different exchanges never collide.
+    """
+    if announcement.url:
+        parts = urlsplit(announcement.url.strip())
+        return f"url:{parts.netloc.lower()}{parts.path.rstrip('/')}"
+    return "title:" + WHITESPACE_RE.sub(" ", announcement.title).strip().casefold()
+
+def decode_binance_frame(frame: Union[str, bytes], received_at: Optional[float] = None) -> Optional[Announcement]:
+    """
+    Decodes a raw Binance WebSocket frame.
+    Args:
+        frame: Text or binary frame as received from the socket.
+        received_at: time.perf_counter() when the frame arrived, now if omitted.
+    Returns:
+        The announcement, or None for any other frame.
+    """
+    marker = _ANNOUNCEMENT_MARKER_BYTES if isinstance(frame, bytes) else _ANNOUNCEMENT_MARKER
+    if marker not in frame:
+        return None
+    data = _json_loads(frame)
+    if not isinstance(data, dict) or data.get("e") != "announcement":
+        return None
+    return Announcement(
+        exchange="BINANCE",
+        title=data.get("t", ""),
+        url=data.get("u", ""),
+        published_at=data.get("E"),
+        received_at=time.perf_counter() if received_at is None else received_at
+    )
+
+# Receives the announcements a feed got together (one frame, one poll)
+AnnouncementHandler = Callable[[list[Announcement]], Awaitable[None]]
+
+class AnnouncementSource(Protocol):
+    """
+    One exchange feed run by the SourceRegistry (BinanceSource, BybitPoller).
+    ingest() runs until stopped or cancelled and hands every batch of new
+    announcements to handle; classify, parse and identity tell the shared
+    pipeline how to read this exchange's announcements.
+    """
+    name: str # Metric label, e.g. "binance"; upper-cased it is the alert header
+
+    async def ingest(self, handle: AnnouncementHandler): ...
+    def classify(self, announcement: Announcement) -> bool: ...
+    def parse(self, announcement: Announcement) -> dict: ...
+    def identity(self, announcement: Announcement) -> str: ...
+    async def aclose(self): ...
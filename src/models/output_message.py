@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+@dataclass(slots=True, frozen=True)
+class DelistingAlert:
+    """Parsed delisting announcement, ready to be formatted for Telegram."""
+    header: str
+    announcement_url: str
+    tickers: Optional[List[str]] = None
+    date: Optional[str] = None
+    time: Optional[str] = None
+
+@dataclass(slots=True, frozen=True)
+class DelistingReminder:
+    """Reminder that delistings on one exchange are offset_seconds away (0: happening now)."""
+    header: str
+    tickers: List[str]
+    deadline: float # UTC timestamp
+    offset_seconds: float
+    announcement_url: str
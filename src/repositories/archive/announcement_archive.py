@@ -0,0 +1,192 @@
+import json
+import sqlite3
+import time
+from typing import Iterable, Optional
+from src.models.announcement import Announcement
+from src.models.output_message import DelistingAlert
+
+# Hard cap on one page of query results
+MAX_PAGE_SIZE = 500
+
+class AnnouncementArchive:
+    """
+    Every classified announcement with its parsed fields, in SQLite (WAL mode).
+
+    Tickers get their own table keyed by (ticker, published_at, announcement_id),
+    so "announcements about XYZ since January" is one index range scan in
+    published_at order no matter how big the archive grows; announcements are
+    indexed by (exchange, published_at) and published_at for the other filters.
+    Pages are keyset-paginated on (published_at, id): deep pages cost the same
+    as the first one. version grows with every insert, for cache invalidation.
+    """
+    def __init__(self, path: str = "announcements.sqlite3"):
+        self.path = path
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        # WAL: writers don't block readers and commits don't fsync, only checkpoints do
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS announcements (
+                id INTEGER PRIMARY KEY,
+                exchange TEXT NOT NULL,
+                identity TEXT NOT NULL,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                is_delisting INTEGER NOT NULL,
+                published_at INTEGER NOT NULL,
+                event_date TEXT,
+                event_time TEXT,
+                tickers TEXT NOT NULL,
+                archived_at REAL NOT NULL,
+                UNIQUE (exchange, identity)
+            );
+            CREATE INDEX IF NOT EXISTS announcements_exchange_time ON announcements (exchange, published_at, id);
+            CREATE INDEX IF NOT EXISTS announcements_time ON announcements (published_at, id);
+            CREATE TABLE IF NOT EXISTS announcement_tickers (
+                ticker TEXT NOT NULL,
+                published_at INTEGER NOT NULL,
+                announcement_id INTEGER NOT NULL,
+                PRIMARY KEY (ticker, published_at, announcement_id)
+            ) WITHOUT ROWID;
+        """)
+        self.version = 0
+
+    def add(self, announcement: Announcement, alert: Optional[DelistingAlert] = None, identity: Optional[str] = None) -> bool:
+        """
+        Archives one announcement; a second one with the same exchange and identity is ignored.
+        Args:
+            announcement: The announcement as received.
+            alert: Parsed fields if it is a delisting announcement.
+            identity: Dedup key within the exchange, the URL (or title) if omitted.
+        Returns:
+            True if it was new.
+        """
+        return self.add_many([(announcement, alert, identity)]) == 1
+
+    def add_many(self, items: Iterable[tuple[Announcement, Optional[DelistingAlert], Optional[str]]]) -> int:
+        """
+        Archives (announcement, alert, identity) items in one transaction, see add.
+        Returns:
+            Number of new announcements.
+        """
+        now = time.time()
+        added = 0
+        cursor = self._connection.cursor()
+        cursor.execute("BEGIN")
+        try:
+            for announcement, alert, identity in items:
+                published_at = announcement.published_at or int(now * 1000)
+                tickers = (alert.tickers or []) if alert is not None else []
+                cursor.execute(
+                    "INSERT OR IGNORE INTO announcements "
+                    "(exchange, identity, title, url, is_delisting, published_at, event_date, event_time, tickers, archived_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        announcement.exchange,
+                        identity or announcement.url or announcement.title,
+                        announcement.title,
+                        announcement.url,
+                        int(alert is not None),
+                        published_at,
+                        alert.date if alert is not None else None,
+                        alert.time if alert is not None else None,
+                        json.dumps(tickers),
+                        now
+                    )
+                )
+                if cursor.rowcount != 1:
+                    continue
+                added += 1
+                announcement_id = cursor.lastrowid
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO announcement_tickers (ticker, published_at, announcement_id) VALUES (?, ?, ?)",
+                    [(ticker.upper(), published_at, announcement_id) for ticker in tickers]
+                )
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        if added:
+            self.version += 1
+        return added
+
+    def query(
+        self,
+        ticker: Optional[str] = None,
+        exchange: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        delisting: Optional[bool] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        Newest announcements first, matching every filter given.
+        Args:
+            ticker: Base asset named in the announcement.
+            exchange: "BINANCE" or "BYBIT".
+            since, until: Publish time range in ms since epoch (inclusive).
+            delisting: Only delisting (True) or other (False) announcements.
+            limit: Page size, at most MAX_PAGE_SIZE.
+            cursor: next_cursor of the previous page.
+        Returns:
+            (announcements, next_cursor); next_cursor is None on the last page.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        conditions = []
+        params = []
+        if ticker is not None:
+            # Driven by the ticker index; published_at and the id come from it too
+            source = "announcement_tickers t JOIN announcements a ON a.id = t.announcement_id"
+            time_column, id_column = "t.published_at", "t.announcement_id"
+            conditions.append("t.ticker = ?")
+            params.append(ticker.upper())
+        else:
+            source = "announcements a"
+            time_column, id_column = "a.published_at", "a.id"
+        if exchange is not None:
+            conditions.append("a.exchange = ?")
+            params.append(exchange.upper())
+        if since is not None:
+            conditions.append(f"{time_column} >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append(f"{time_column} <= ?")
+            params.append(until)
+        if delisting is not None:
+            conditions.append("a.is_delisting = ?")
+            params.append(int(delisting))
+        if cursor is not None:
+            cursor_time, cursor_id = (int(part) for part in cursor.split(":", 1))
+            conditions.append(f"({time_column}, {id_column}) < (?, ?)")
+            params.extend((cursor_time, cursor_id))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connection.execute(
+            "SELECT a.id, a.exchange, a.title, a.url, a.is_delisting, a.published_at, a.event_date, a.event_time, a.tickers "
+            f"FROM {source} {where} ORDER BY {time_column} DESC, {id_column} DESC LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+
+        announcements = [
+            {
+                "id": row[0],
+                "exchange": row[1],
+                "title": row[2],
+                "url": row[3],
+                "delisting": bool(row[4]),
+                "published_at": row[5],
+                "date": row[6],
+                "time": row[7],
+                "tickers": json.loads(row[8])
+            }
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = announcements[-1]
+            next_cursor = f"{last['published_at']}:{last['id']}"
+        return announcements, next_cursor
+
+    def close(self):
+        self._connection.close()
@@ -1,19 +1,102 @@
 import asyncio
+import logging
+import random
+import time
 import websockets
 import json
 from typing import Optional, Callable
+from src.utils.message_dispatcher import MessageDispatcher, OVERFLOW_DROP
+from src.utils.dedup_index import DedupIndex
+from src.models.announcement import Announcement, decode_binance_frame
+from src.utils.traffic_recorder import TrafficRecorder
+from src.utils.metrics import FRAMES, FAILURES, RECONNECTS, FrameClock, stage_timer
+
 # from datetime import datetime # No longer needed as _get_timestamp is removed
 
+logger = logging.getLogger(__name__)
+
 # Публичный эндпоинт с портом для стабильности
 BINANCE_WS_PUBLIC_BASE = "wss://stream.binance.com:9443/ws"
-RECONNECT_INTERVAL = 5
+# Экспоненциальный backoff с jitter между попытками переподключения
+RECONNECT_BACKOFF_BASE = 0.5
+RECONNECT_BACKOFF_MAX = 30
+# Binance рвёт соединение через 24 часа; пересоздаём заранее, по одному
+MAX_CONNECTION_AGE = 23 * 3600
+
+class ConnectionStats:
+    """Counters for the redundant connections and the gaps when none of them was up."""
+    def __init__(self):
+        self.active_connections = 0
+        self.connects = 0
+        self.disconnects = 0
+        self.covered_disconnects = 0 # A socket dropped while another one stayed up
+        self.failover_gaps = 0 # All sockets were down at the same time
+        self.last_failover_gap_seconds = 0.0
+        self.max_failover_gap_seconds = 0.0
+        self.total_failover_gap_seconds = 0.0
+        self.duplicate_frames = 0
+        self._all_down_since: Optional[float] = None
+
+    def on_connected(self):
+        self.connects += 1
+        self.active_connections += 1
+        if self._all_down_since is not None:
+            gap = time.monotonic() - self._all_down_since
+            self._all_down_since = None
+            self.failover_gaps += 1
+            self.last_failover_gap_seconds = gap
+            self.max_failover_gap_seconds = max(self.max_failover_gap_seconds, gap)
+            self.total_failover_gap_seconds += gap
+
+    def on_disconnected(self):
+        self.disconnects += 1
+        self.active_connections -= 1
+        if self.active_connections == 0:
+            self._all_down_since = time.monotonic()
+        else:
+            self.covered_disconnects += 1
 
 class BinanceClient:
-    def __init__(self, message_handler: Callable[[dict], None]): # Corrected from init to __init__
+    def __init__(
+        self,
+        message_handler: Callable[[Announcement], None],
+        priority_fn: Optional[Callable[[Announcement], int]] = None,
+        dispatch_workers: int = 4,
+        dispatch_queue_size: int = 1000,
+        dispatch_overflow: str = OVERFLOW_DROP,
+        connections: int = 1,
+        stagger_seconds: float = 5.0,
+        max_connection_age: float = MAX_CONNECTION_AGE,
+        recorder: Optional[TrafficRecorder] = None
+    ): # Corrected from init to __init__
         self.ws_base_url = BINANCE_WS_PUBLIC_BASE
         self.message_handler = message_handler
-        self._websocket: Optional[websockets.WebSocketClientProtocol] = None
+        # Handler runs on the dispatcher's workers so the socket reader never waits on it
+        self.dispatcher = MessageDispatcher(
+            message_handler,
+            priority_fn=priority_fn,
+            workers=dispatch_workers,
+            maxsize=dispatch_queue_size,
+            overflow=dispatch_overflow
+        )
+        # Hot-standby: several sockets receive the same stream, the first copy of a frame wins
+        self.connections = connections
+        self.stagger_seconds = stagger_seconds
+        self.max_connection_age = max_connection_age
+        self.stats = ConnectionStats()
+        self._frame_index = DedupIndex(max_items=4096, ttl_seconds=300) if connections > 1 else None
+        self._websockets: set = set()
         self._stop_event = asyncio.Event() 
+        # Raw frames (after cross-connection dedup) go to the traffic log for replay
+        self.recorder = recorder
+
+        # Metric children are resolved once, the read loop only calls inc()/observe()
+        self.frame_clock = FrameClock()
+        self._frames_metric = FRAMES.labels("binance")
+        self._reconnects_metric = RECONNECTS.labels("binance")
+        self._ws_failures_metric = FAILURES.labels("binance_ws")
+        self._overflow_metric = FAILURES.labels("dispatch_overflow")
+        self._decode_timer = stage_timer("binance", "decode")
 
     async def _send_subscription_request(self, websocket):
         """Подписка на поток объявлений."""
@@ -25,69 +108,108 @@ class BinanceClient:
             "id": 1
         }
         await websocket.send(json.dumps(request))
-        print(f"Подписка отправлена: {json.dumps(request)}")
+        logger.info("Подписка отправлена: %s", json.dumps(request))
 
     # def _get_timestamp(self): # Removed as it's not used after refactoring _listen_for_messages
     #     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     async def _listen_for_messages(self, websocket):
         async for message in websocket:
-            msg_data = json.loads(message)
-            
-            # Adapt message format for the existing message_handler
-            if msg_data.get("e") == "announcement":
-                # Translate new keys 't' and 'u' to 'title' and 'url'
-                # Create a mutable copy to add new keys
-                processed_msg_data = msg_data.copy()
-                processed_msg_data["title"] = msg_data.get('t', '')
-                processed_msg_data["url"] = msg_data.get('u', '')
-                
-                # Pass the adapted message to the handler
-                if self.message_handler:
-                    if asyncio.iscoroutinefunction(self.message_handler):
-                        await self.message_handler(processed_msg_data)
-                    else:
-                        await asyncio.to_thread(self.message_handler, processed_msg_data)
-            else:
-                # For non-announcement messages, pass as is
-                if self.message_handler:
-                    if asyncio.iscoroutinefunction(self.message_handler):
-                        await self.message_handler(msg_data)
-                    else:
-                        await asyncio.to_thread(self.message_handler, msg_data)
+            await self._handle_frame(message)
 
-    async def connect_and_listen(self):
-        """Установка и поддержание соединения (из твоего исходника)."""
+    async def _handle_frame(self, message):
+        received_at = time.perf_counter()
+        self.frame_clock.tick()
+        self._frames_metric.inc()
+        if self._frame_index is not None and self._frame_index.seen_or_add(message):
+            self.stats.duplicate_frames += 1
+            return
+        if self.recorder is not None:
+            self.recorder.record(message)
+
+        # Only announcement frames are decoded; acks and other events are rejected up front
+        announcement = decode_binance_frame(message, received_at)
+        if announcement is None:
+            return
+        self._decode_timer.observe(time.perf_counter() - received_at)
+
+        # Pass the announcement to the handler
+        if not await self.dispatcher.submit(announcement):
+            self._overflow_metric.inc()
+            logger.warning("Очередь переполнена, сообщение отброшено: %s", announcement.title)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = min(RECONNECT_BACKOFF_MAX, RECONNECT_BACKOFF_BASE * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _sleep_unless_stopped(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _close_when_too_old(self, websocket, index: int):
+        # Small per-connection jitter so recycled sockets never go down together
+        await asyncio.sleep(self.max_connection_age * random.uniform(0.95, 1.0))
+        logger.info("[%d] Плановое пересоздание соединения.", index)
+        await websocket.close()
+
+    async def _run_connection(self, index: int):
+        """Одно соединение: подключение, подписка, чтение и переподключение с backoff."""
+        # Stagger the sockets so they never connect (and get dropped) at the same moment
+        await self._sleep_unless_stopped(index * self.stagger_seconds)
+        attempt = 0
         while not self._stop_event.is_set():
+            websocket = None
+            recycler = None
             try:
-                print(f"Попытка подключения к {self.ws_base_url}...")
+                logger.info("[%d] Попытка подключения к %s...", index, self.ws_base_url)
                 async with websockets.connect(
                     self.ws_base_url, 
                     ping_interval=20, 
                     ping_timeout=10
                 ) as websocket:
-                    self._websocket = websocket
-                    print("✅ Соединение установлено.")
-                    
+                    self._websockets.add(websocket)
+                    self.stats.on_connected()
+                    logger.info("[%d] ✅ Соединение установлено.", index)
+                    recycler = asyncio.create_task(self._close_when_too_old(websocket, index))
+
                     await self._send_subscription_request(websocket)
+                    attempt = 0
                     await self._listen_for_messages(websocket)
 
             except websockets.exceptions.ConnectionClosedOK:
-                print("Соединение закрыто чисто (OK), переподключение...")
+                logger.info("[%d] Соединение закрыто чисто (OK), переподключение...", index)
             except Exception as e:
-                print(f"Ошибка WebSocket: {e}")
+                self._ws_failures_metric.inc()
+                logger.warning("[%d] Ошибка WebSocket: %s", index, e)
             finally:
-                if self._websocket and not self._websocket.closed:
-                    await self._websocket.close()
-                if not self._stop_event.is_set():
-                    print(f"Реконнект через {RECONNECT_INTERVAL} сек...")
-                    await asyncio.sleep(RECONNECT_INTERVAL)
+                if recycler:
+                    recycler.cancel()
+                if websocket is not None:
+                    # close() is a no-op on an already closed connection
+                    await websocket.close()
+                    if websocket in self._websockets:
+                        self._websockets.discard(websocket)
+                        self.stats.on_disconnected()
+            if not self._stop_event.is_set():
+                delay = self._backoff_delay(attempt)
+                attempt += 1
+                self._reconnects_metric.inc()
+                logger.info("[%d] Реконнект через %.1f сек...", index, delay)
+                await self._sleep_unless_stopped(delay)
+
+    async def connect_and_listen(self):
+        """Установка и поддержание соединений (из твоего исходника)."""
+        self.dispatcher.start()
+        await asyncio.gather(*(self._run_connection(index) for index in range(self.connections)))
 
     async def stop(self):
         """Остановка клиента."""
         self._stop_event.set()
-        if self._websocket and not self._websocket.closed:
-            await self._websocket.close()
-            print("Соединение Binance закрыто вручную.")
-
-            
\ No newline at end of file
+        if self._websockets:
+            await asyncio.gather(*(websocket.close() for websocket in list(self._websockets)))
+            logger.info("Соединение Binance закрыто вручную.")
+        await self.dispatcher.stop()
+        if self.recorder is not None:
+            self.recorder.close()
@@ -0,0 +1,35 @@
+import httpx
+from typing import Optional
+from src.env import BINANCE_API_URL
+
+class BinanceMarketClient:
+    """Binance REST market data (the announcements themselves come over the WebSocket)."""
+    def __init__(self, timeout: float = 30.0, http_client: Optional[httpx.AsyncClient] = None):
+        self.timeout = timeout
+        self._shared_client = http_client # Used as is and never closed here
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._shared_client is not None:
+            return self._shared_client
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    async def get_trading_pairs(self) -> list[tuple[str, str, str]]:
+        """
+        Fetches every spot symbol from exchangeInfo, including halted ones
+        (a pair being delisted is usually already in BREAK status).
+        Returns:
+            (symbol, base asset, quote asset) tuples.
+        """
+        response = await self._get_client().get(f"{BINANCE_API_URL}/api/v3/exchangeInfo", timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if "symbols" not in data:
+            raise ValueError("Binance exchangeInfo response did not contain 'symbols'.")
+        return [(item["symbol"], item["baseAsset"], item["quoteAsset"]) for item in data["symbols"]]
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
@@ -0,0 +1,66 @@
+import json
+import logging
+import os
+from typing import Optional
+
+from src.repositories.s3.s3_client import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+class BinanceStorage:
+    """
+    Persists the dedup index snapshot (every exchange feed's identities) either
+    in the S3 bucket (default) or in a local file when local_path is given.
+    """
+    def __init__(self, storage_file_name: str = "binance_dedup.json", local_path: Optional[str] = None):
+        self.storage_file_name = storage_file_name
+        self.local_path = local_path
+        self.s3_client = None
+        self.bucket_name = None
+
+        if local_path is None:
+            from src.env import BUCKET_NAME # Only required when the snapshot is kept in S3
+            self.s3_client = get_s3_client()
+            self.bucket_name = BUCKET_NAME
+
+    def load_snapshot(self) -> Optional[dict]:
+        try:
+            if self.local_path is not None:
+                with open(self.local_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            else:
+                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.storage_file_name)
+                snapshot = json.loads(response['Body'].read().decode('utf-8'))
+        except FileNotFoundError:
+            logger.info("%s not found. Starting with an empty dedup index.", self.local_path)
+            return None
+        except Exception as e:
+            if self.s3_client is not None and isinstance(e, self.s3_client.exceptions.NoSuchKey):
+                logger.info("%s not found in S3. Starting with an empty dedup index.", self.storage_file_name)
+            else:
+                logger.error("Error loading dedup snapshot: %s. Starting with an empty dedup index.", e)
+            return None
+
+        if not isinstance(snapshot, dict):
+            logger.warning("Dedup snapshot is not an object. Starting with an empty dedup index.")
+            return None
+        return snapshot
+
+    def save_snapshot(self, snapshot: dict):
+        file_content = json.dumps(snapshot, separators=(',', ':'))
+        try:
+            if self.local_path is not None:
+                # Write to a temporary file first so a crash never leaves a truncated snapshot
+                temporary_path = f"{self.local_path}.tmp"
+                with open(temporary_path, 'w', encoding='utf-8') as f:
+                    f.write(file_content)
+                os.replace(temporary_path, self.local_path)
+            else:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=self.storage_file_name,
+                    Body=file_content,
+                    ContentType='application/json'
+                )
+        except Exception as e:
+            logger.error("Error saving dedup snapshot: %s", e)
@@ -1,15 +1,188 @@
-import requests
+import asyncio
+import logging
+import httpx
+from typing import Optional
+from src.env import BYBIT_API_URL
+from src.utils.traffic_recorder import TrafficRecorder
+
+logger = logging.getLogger(__name__)
+
+# A normal poll is a single small page; pages behind it are only fetched on a backlog
+DEFAULT_PAGE_SIZE = 5
+# Pages requested at once while catching up, and the hard stop for one catch-up
+BACKLOG_CONCURRENCY = 4
+MAX_BACKLOG_PAGES = 20
 
 class BybitClient:
-    def __init__(self):
-        self.base_url = "https://api.bybit.com/v5/announcements/index"
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        backlog_concurrency: int = BACKLOG_CONCURRENCY,
+        max_pages: int = MAX_BACKLOG_PAGES,
+        recorder: Optional[TrafficRecorder] = None,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
+        self.base_url = f"{BYBIT_API_URL}/v5/announcements/index"
+        self.timeout = timeout
+        self.page_size = page_size
+        self.backlog_concurrency = backlog_concurrency
+        self.max_pages = max_pages
+        self.recorder = recorder # Raw response bodies go to the traffic log for replay
+        # A shared pool (see http_client.get_http_client) is used as is and never closed here
+        self._shared_client = http_client
+        self._client: Optional[httpx.AsyncClient] = None
+        # Validators of the last first-page response for conditional requests
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # One keep-alive session per client, created on the running event loop;
+        # sized for the concurrent backlog pages
+        if self._shared_client is not None:
+            return self._shared_client
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.backlog_concurrency,
+                    max_keepalive_connections=self.backlog_concurrency
+                )
+            )
+        return self._client
 
-    def get_announcements(self) -> dict:
+    async def get_announcements(self, only_if_changed: bool = False, page: int = 1, limit: int = DEFAULT_PAGE_SIZE) -> Optional[dict]:
+        """
+        Fetches one page of the latest delisting announcements (newest first).
+        Args:
+            only_if_changed: Send conditional headers (ETag / Last-Modified of the
+                previous first page) so an unchanged list costs a bodyless 304.
+                Only applies to the first page.
+            page: 1-based page number.
+            limit: Page size.
+        Returns:
+            The decoded API response, or None if nothing changed since the last call.
+        """
         params = {
             "locale": "en-US",
-            "limit": 5,
-            "type": "delistings"
+            "limit": limit,
+            "type": "delistings",
+            "page": page
         }
-        response = requests.get(self.base_url, params=params)
+        headers = {}
+        if only_if_changed and page == 1:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+
+        response = await self._get_client().get(self.base_url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return None
         response.raise_for_status()
+
+        if self.recorder is not None:
+            self.recorder.record(response.text, page=page, limit=limit)
+        if page == 1:
+            self._etag = response.headers.get("ETag")
+            self._last_modified = response.headers.get("Last-Modified")
         return response.json()
+
+    @staticmethod
+    def _page_items(response: dict) -> list:
+        if "result" in response and "list" in response["result"]:
+            return response["result"]["list"]
+        raise ValueError("Bybit announcements response did not contain expected 'result.list' structure.")
+
+    async def get_announcements_since(
+        self,
+        watermark: Optional[int],
+        only_if_changed: bool = False,
+        first_page: Optional[dict] = None
+    ) -> Optional[list]:
+        """
+        Fetches the announcements published since the watermark, walking pages
+        until one reaches it. The first page is fetched alone; only when it is
+        entirely newer than the watermark (a backlog) are the following pages
+        requested, backlog_concurrency at a time, up to max_pages pages.
+        The watermark only decides how far to walk: every item on the fetched
+        pages is returned (also those at or before it, or without publishTime),
+        and telling new announcements from handled ones is left to the caller's
+        seen URLs.
+        Args:
+            watermark: publishTime (ms) of the newest announcement already handled,
+                or None to only look at the first page.
+            only_if_changed: Conditional request for the first page, see get_announcements.
+            first_page: The first page if the caller already fetched it with
+                get_announcements(limit=page_size), e.g. while the watermark was loading.
+        Returns:
+            Announcement items of the fetched pages (newest first, without
+            duplicates), or None if the first page did not change.
+        """
+        if first_page is None:
+            first_page = await self.get_announcements(only_if_changed=only_if_changed, limit=self.page_size)
+        if first_page is None:
+            return None
+        pages = [self._page_items(first_page)]
+
+        next_page = 2
+        while (
+            watermark is not None
+            and self._is_backlog(pages[-1], watermark)
+            and next_page <= self.max_pages
+        ):
+            page_numbers = range(next_page, min(next_page + self.backlog_concurrency, self.max_pages + 1))
+            responses = await asyncio.gather(*(
+                self.get_announcements(page=page, limit=self.page_size) for page in page_numbers
+            ))
+            next_page = page_numbers[-1] + 1
+            for response in responses:
+                pages.append(self._page_items(response))
+                if not self._is_backlog(pages[-1], watermark):
+                    break
+        if watermark is not None and self._is_backlog(pages[-1], watermark):
+            logger.warning("Bybit backlog is longer than %d pages, older announcements were not fetched.", self.max_pages)
+
+        # Announcements published while walking shift the pages, so items can repeat
+        items = []
+        seen_urls = set()
+        for page_items in pages:
+            for item in page_items:
+                url = item.get("url")
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                items.append(item)
+        return items
+
+    async def get_trading_pairs(self, category: str = "spot") -> list[tuple[str, str, str]]:
+        """
+        Fetches every instrument of a category ("spot", "linear" or "inverse"), following the cursor.
+        Returns:
+            (symbol, base coin, quote coin) tuples.
+        """
+        pairs = []
+        cursor = ""
+        while True:
+            params = {"category": category, "limit": 1000}
+            if cursor:
+                params["cursor"] = cursor
+            response = await self._get_client().get(f"{BYBIT_API_URL}/v5/market/instruments-info", params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("retCode", 0) != 0 or "list" not in data.get("result", {}):
+                raise ValueError(f"Bybit instruments-info error for {category}: {data.get('retMsg')}")
+            pairs.extend((item["symbol"], item["baseCoin"], item["quoteCoin"]) for item in data["result"]["list"])
+            cursor = data["result"].get("nextPageCursor")
+            if not cursor:
+                return pairs
+
+    def _is_backlog(self, page_items: list, watermark: int) -> bool:
+        """A full page whose oldest item is still newer than the watermark: there may be more."""
+        return len(page_items) >= self.page_size and min(item.get("publishTime", 0) for item in page_items) > watermark
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        if self.recorder is not None:
+            self.recorder.close()
@@ -1,61 +1,85 @@
-import boto3
 import json
+import logging
+from typing import Optional
 
-from src.env import BUCKET_NAME, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, S3_ENDPOINT_URL
+from src.repositories.s3.s3_client import get_s3_client
+from src.utils.bounded_ordered_set import BoundedOrderedSet
+
+logger = logging.getLogger(__name__)
 
 class BybitStorage:
     def __init__(self, storage_file_name: str = "bybit_state.json", max_urls: int = 10):
-        s3_config = {
-            'aws_access_key_id': AWS_ACCESS_KEY_ID,
-            'aws_secret_access_key': AWS_SECRET_ACCESS_KEY,
-            'region_name': 'ru-central1'
-        }
-        if S3_ENDPOINT_URL:
-            s3_config['endpoint_url'] = S3_ENDPOINT_URL
-
-        self.s3_client = boto3.client('s3', **s3_config)
+        from src.env import BUCKET_NAME # Validated on first use, not when the module is imported
+        self.s3_client = get_s3_client()
         self.bucket_name = BUCKET_NAME
         self.storage_file_name = storage_file_name
         self.max_urls = max_urls
 
-    def load_state(self) -> list[str]:
+        # publishTime (ms) of the newest handled announcement, stored next to the URLs
+        self.watermark: Optional[int] = None
+
+        # ETag of the stored object and the state it corresponds to
+        self._etag: Optional[str] = None
+        self._state: Optional[BoundedOrderedSet] = None
+        # (state object, state.version, watermark) as last loaded or saved, to skip no-op writes
+        self._persisted: Optional[tuple[int, int, Optional[int]]] = None
+
+    def _remember(self, state: BoundedOrderedSet, etag: Optional[str], watermark: Optional[int] = None) -> BoundedOrderedSet:
+        self._state = state
+        self._etag = etag
+        self.watermark = watermark
+        self._persisted = (id(state), state.version, watermark)
+        return state
+
+    def load_state(self) -> BoundedOrderedSet:
+        """
+        Loads the seen URLs (most recent first) and the watermark (see self.watermark).
+        Repeated calls send the last ETag and reuse the cached state on 304 Not Modified.
+        The state is {"watermark": ..., "urls": [...]}; a bare list of URLs
+        (the previous format) is read as a state without a watermark.
+        """
+        request = {'Bucket': self.bucket_name, 'Key': self.storage_file_name}
+        if self._etag and self._state is not None:
+            request['IfNoneMatch'] = self._etag
         try:
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.storage_file_name)
+            response = self.s3_client.get_object(**request)
             file_content = response['Body'].read().decode('utf-8')
             state = json.loads(file_content)
+            watermark = None
+            if isinstance(state, dict):
+                watermark = state.get("watermark")
+                state = state.get("urls")
             if not isinstance(state, list):
-                print(f"Warning: Loaded state from {self.storage_file_name} is not a list. Initializing with empty list.")
-                return []
-            return state
+                logger.warning("Loaded state from %s is not a list. Initializing with empty list.", self.storage_file_name)
+                return self._remember(BoundedOrderedSet(self.max_urls), None)
+            return self._remember(BoundedOrderedSet(self.max_urls, state), response.get('ETag'), watermark)
         except self.s3_client.exceptions.NoSuchKey:
-            print(f"Info: {self.storage_file_name} not found in S3. Initializing with empty list.")
-            return []
+            logger.info("%s not found in S3. Initializing with empty list.", self.storage_file_name)
+            return self._remember(BoundedOrderedSet(self.max_urls), None)
         except json.JSONDecodeError as e:
-            print(f"Error decoding JSON from {self.storage_file_name}: {e}. Initializing with empty list.")
-            return []
+            logger.error("Error decoding JSON from %s: %s. Initializing with empty list.", self.storage_file_name, e)
+            return self._remember(BoundedOrderedSet(self.max_urls), None)
+        except self.s3_client.exceptions.ClientError as e:
+            if e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304:
+                return self._state
+            logger.error("Error loading state from S3: %s. Initializing with empty list.", e)
+            return BoundedOrderedSet(self.max_urls)
         except Exception as e:
-            print(f"Error loading state from S3: {e}. Initializing with empty list.")
-            return []
+            logger.error("Error loading state from S3: %s. Initializing with empty list.", e)
+            return BoundedOrderedSet(self.max_urls)
 
-    def save_state(self, urls: list[str]):
+    def save_state(self, urls: BoundedOrderedSet, watermark: Optional[int] = None):
+        """Uploads the state in compact JSON, skipping the write if nothing changed since load/save."""
+        if self._persisted == (id(urls), urls.version, watermark):
+            return
         try:
-            file_content = json.dumps(urls, indent=2)
-            self.s3_client.put_object(
+            file_content = json.dumps({"watermark": watermark, "urls": urls.to_list()}, separators=(',', ':'))
+            response = self.s3_client.put_object(
                 Bucket=self.bucket_name,
                 Key=self.storage_file_name,
                 Body=file_content,
                 ContentType='application/json'
             )
+            self._remember(urls, response.get('ETag'), watermark)
         except Exception as e:
-            print(f"Error saving state to S3: {e}")
-
-    def add_and_trim_url(self, new_url: str, current_state: list[str]) -> list[str]:
-        if new_url in current_state:
-            # If URL already exists, move it to the front (most recent)
-            current_state.remove(new_url)
-        
-        # Add new URL to the front
-        current_state.insert(0, new_url)
-
-        # Trim the list if it exceeds max_urls
-        return current_state[:self.max_urls]
+            logger.error("Error saving state to S3: %s", e)
@@ -0,0 +1,26 @@
+import httpx
+from typing import Optional
+from src.env import HTTP_POOL_MAX_CONNECTIONS
+
+# One keep-alive pool for every exchange REST request of the process (announcement
+# feeds, trading pair lists), so another exchange adds requests, not another pool.
+# Each caller passes its own timeout, so a slow exchange only ever waits on itself.
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared exchange HTTP pool, created on first use on the running event loop."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_POOL_MAX_CONNECTIONS
+            )
+        )
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from src.repositories.s3.s3_client import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+class S3Lease:
+    """
+    Leader lease stored as one object in the S3 bucket.
+
+    Every write is conditional (If-None-Match: * to create, If-Match: <etag> to
+    renew or take over), so of several instances racing for the same lease
+    exactly one write succeeds. Expiry does not rely on synchronized clocks:
+    a standby takes over once the object's ETag has stayed the same for
+    ttl_seconds by its own monotonic clock, i.e. the holder stopped renewing.
+    """
+    def __init__(self, holder_id: str, ttl_seconds: float = 15.0, storage_file_name: str = "leader_lease.json"):
+        from src.env import BUCKET_NAME # Only required with LEADER_ELECTION=s3
+        self.s3_client = get_s3_client()
+        self.bucket_name = BUCKET_NAME
+        self.storage_file_name = storage_file_name
+        self.holder_id = holder_id
+        self.ttl_seconds = ttl_seconds
+
+        # ETag of the lease as last seen and when it was first seen with that ETag
+        self._observed_etag: Optional[str] = None
+        self._observed_at = 0.0
+        self._held_etag: Optional[str] = None
+
+    def _put(self, body: dict, **condition) -> Optional[str]:
+        try:
+            response = self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=self.storage_file_name,
+                Body=json.dumps(body),
+                ContentType='application/json',
+                **condition
+            )
+        except self.s3_client.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('PreconditionFailed', 'ConditionalRequestConflict', '412', '409'):
+                return None
+            raise
+        return response['ETag']
+
+    def try_acquire(self) -> bool:
+        """
+        Renews the lease if this instance holds it, or takes it over if it is
+        free, released or expired. Blocking (boto3), run it in a thread.
+        Returns:
+            True if this instance holds the lease now.
+        """
+        body = {"holder": self.holder_id, "renewed_at": time.time(), "ttl_seconds": self.ttl_seconds}
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.storage_file_name)
+        except self.s3_client.exceptions.NoSuchKey:
+            self._held_etag = self._put(body, IfNoneMatch='*')
+            return self._held_etag is not None
+
+        etag = response['ETag']
+        lease = json.loads(response['Body'].read().decode('utf-8'))
+        now = time.monotonic()
+        if etag != self._observed_etag:
+            self._observed_etag = etag
+            self._observed_at = now
+
+        held = lease.get("holder") == self.holder_id and etag == self._held_etag
+        released = lease.get("holder") is None
+        expired = now - self._observed_at >= lease.get("ttl_seconds", self.ttl_seconds)
+        if not (held or released or expired):
+            self._held_etag = None
+            return False
+        if not held:
+            logger.info("Taking over the leader lease from %s.", lease.get("holder"))
+        self._held_etag = self._put(body, IfMatch=etag)
+        return self._held_etag is not None
+
+    def release(self):
+        """Marks the lease as free so a standby can take over without waiting for it to expire."""
+        if self._held_etag is None:
+            return
+        self._put({"holder": None, "renewed_at": time.time()}, IfMatch=self._held_etag)
+        self._held_etag = None
+
+class FileLockLease:
+    """
+    Leader lease as an exclusive flock() on a local file, for several workers
+    on one host. The kernel drops the lock when the holder exits, so there is
+    nothing to expire.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        import fcntl # POSIX only; the S3 lease works everywhere
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd) # closing the descriptor releases the lock
+            self._fd = None
@@ -0,0 +1,79 @@
+import math
+import sqlite3
+from typing import Iterable
+
+class ReminderStore:
+    """
+    Scheduled delistings, one row per (exchange, ticker), in SQLite (WAL mode).
+
+    A row holds the delisting deadline and the smallest reminder offset already
+    sent for it (infinity before the first one), which is all that is needed to
+    rebuild the pending reminders after a restart. Several processes on a host
+    may share the file: progress on a deadline never goes backwards, and sent
+    reminders are recorded only against the deadline they were sent for.
+    """
+    def __init__(self, path: str = "reminders.sqlite3"):
+        self.path = path
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        # WAL: writers don't block readers and commits don't fsync, only checkpoints do
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS delistings (
+                exchange TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                deadline REAL NOT NULL,
+                announcement_url TEXT NOT NULL,
+                sent_offset REAL,
+                PRIMARY KEY (exchange, ticker)
+            ) WITHOUT ROWID;
+        """)
+
+    def load(self) -> list[tuple[str, str, float, str, float]]:
+        """Every scheduled delisting as (exchange, ticker, deadline, announcement_url, sent_offset)."""
+        rows = self._connection.execute(
+            "SELECT exchange, ticker, deadline, announcement_url, sent_offset FROM delistings"
+        ).fetchall()
+        return [(exchange, ticker, deadline, url, math.inf if sent is None else sent) for exchange, ticker, deadline, url, sent in rows]
+
+    def _write(self, statement: str, rows: Iterable[tuple]):
+        cursor = self._connection.cursor()
+        cursor.execute("BEGIN")
+        try:
+            cursor.executemany(statement, rows)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def save(self, delistings: Iterable[tuple[str, str, float, str, float]]):
+        """
+        Adds or reschedules (exchange, ticker, deadline, announcement_url, sent_offset)
+        delistings, in one transaction. For an unchanged deadline the smaller
+        sent_offset (the one further along) is kept.
+        """
+        self._write(
+            "INSERT INTO delistings (exchange, ticker, deadline, announcement_url, sent_offset) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (exchange, ticker) DO UPDATE SET "
+            "announcement_url = excluded.announcement_url, "
+            "sent_offset = CASE WHEN deadline = excluded.deadline AND sent_offset IS NOT NULL "
+            "AND (excluded.sent_offset IS NULL OR sent_offset < excluded.sent_offset) "
+            "THEN sent_offset ELSE excluded.sent_offset END, "
+            "deadline = excluded.deadline",
+            ((*row[:4], None if math.isinf(row[4]) else row[4]) for row in delistings)
+        )
+
+    def mark_sent(self, keys: Iterable[tuple[str, str]], deadline: float, offset: float):
+        """Records that the reminder offset seconds before deadline went out for these (exchange, ticker) keys."""
+        self._write(
+            "UPDATE delistings SET sent_offset = ? WHERE exchange = ? AND ticker = ? AND deadline = ? "
+            "AND (sent_offset IS NULL OR sent_offset > ?)",
+            ((offset, *key, deadline, offset) for key in keys)
+        )
+
+    def delete(self, keys: Iterable[tuple[str, str]], deadline: float):
+        """Removes these (exchange, ticker) delistings, unless they were rescheduled to another deadline."""
+        self._write("DELETE FROM delistings WHERE exchange = ? AND ticker = ? AND deadline = ?", ((*key, deadline) for key in keys))
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,29 @@
+import threading
+
+# One client for every S3 user in the process (state, dedup snapshot, leader lease).
+# Importing boto3 and building a client take tens to hundreds of milliseconds, so both
+# happen on first use only and are paid once, also across warm cloud-function calls.
+_s3_client = None
+_s3_client_lock = threading.Lock() # boto3 clients are thread-safe, creating them is not
+
+def get_s3_client():
+    """
+    The shared S3 client, created on the first call from the S3 settings in src.env.
+    Blocking the first time (imports boto3), so call it from a thread in async code.
+    """
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                import boto3
+                from src.env import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, S3_ENDPOINT_URL
+
+                s3_config = {
+                    'aws_access_key_id': AWS_ACCESS_KEY_ID,
+                    'aws_secret_access_key': AWS_SECRET_ACCESS_KEY,
+                    'region_name': 'ru-central1'
+                }
+                if S3_ENDPOINT_URL:
+                    s3_config['endpoint_url'] = S3_ENDPOINT_URL
+                _s3_client = boto3.client('s3', **s3_config)
+    return _s3_client
@@ -0,0 +1,182 @@
+import json
+import sqlite3
+import time
+import uuid
+from typing import Iterable, Optional
+
+STATUS_PENDING = "pending"
+STATUS_IN_FLIGHT = "in_flight" # Being sent by the owner process
+STATUS_DELIVERED = "delivered"
+STATUS_REJECTED = "rejected" # Telegram refused the message for good (e.g. bot removed from the chat)
+STATUS_EXPIRED = "expired"   # Still undelivered after the maximum age
+
+class TelegramOutbox:
+    """
+    Durable record of every (message, chat) delivery, in SQLite (WAL mode).
+
+    A delivery is recorded as in flight, owned by this outbox, before it is
+    sent, and marked delivered as soon as its chat got it. A failed one goes
+    back to pending and is due again at next_attempt_at, when its backoff runs
+    out. In-flight deliveries are never due, however long the send takes: they
+    only go back to pending when their owner stopped calling heartbeat() for
+    owner_ttl seconds (the process died), so a message that was being sent
+    then is sent again by the next process.
+    """
+    def __init__(self, path: str = "telegram_outbox.sqlite3", owner_ttl: float = 30.0):
+        self.path = path
+        self.owner_ttl = owner_ttl
+        self.owner = uuid.uuid4().hex
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        # WAL: writers don't block readers and commits don't fsync, only checkpoints do
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS deliveries (
+                id INTEGER PRIMARY KEY,
+                chat TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS deliveries_due ON deliveries (status, next_attempt_at);
+            CREATE TABLE IF NOT EXISTS owners (
+                owner TEXT PRIMARY KEY,
+                heartbeat_at REAL NOT NULL
+            );
+        """)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(deliveries)")}
+        if "owner" not in columns:
+            # Outboxes created before deliveries had owners
+            self._connection.execute("ALTER TABLE deliveries ADD COLUMN owner TEXT")
+        self.heartbeat()
+
+    def heartbeat(self, now: Optional[float] = None):
+        """Tells other processes this owner is alive; call more often than owner_ttl."""
+        now = time.time() if now is None else now
+        self._connection.execute(
+            "INSERT INTO owners (owner, heartbeat_at) VALUES (?, ?) ON CONFLICT (owner) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+            (self.owner, now)
+        )
+
+    def release_orphans(self, now: Optional[float] = None) -> int:
+        """
+        Puts the in-flight deliveries of owners whose heartbeat is older than
+        owner_ttl back to pending, due right away. Returns how many.
+        """
+        now = time.time() if now is None else now
+        cursor = self._connection.cursor()
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute("DELETE FROM owners WHERE heartbeat_at < ? AND owner != ?", (now - self.owner_ttl, self.owner))
+            cursor.execute(
+                "UPDATE deliveries SET status = ?, owner = NULL, next_attempt_at = ? "
+                "WHERE status = ? AND (owner IS NULL OR owner NOT IN (SELECT owner FROM owners))",
+                (STATUS_PENDING, now, STATUS_IN_FLIGHT)
+            )
+            released = cursor.rowcount
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        return released
+
+    def record(self, deliveries: Iterable[tuple[str, dict]], now: Optional[float] = None) -> list[int]:
+        """
+        Records deliveries that are about to be sent as in flight, in one transaction.
+        Args:
+            deliveries: (chat display id, sendMessage payload) pairs.
+        Returns:
+            Delivery ids, in the same order.
+        """
+        now = time.time() if now is None else now
+        cursor = self._connection.cursor()
+        ids = []
+        cursor.execute("BEGIN")
+        try:
+            for chat, payload in deliveries:
+                cursor.execute(
+                    "INSERT INTO deliveries (chat, payload, status, created_at, next_attempt_at, owner) VALUES (?, ?, ?, ?, ?, ?)",
+                    (chat, json.dumps(payload, ensure_ascii=False), STATUS_IN_FLIGHT, now, now, self.owner)
+                )
+                ids.append(cursor.lastrowid)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        return ids
+
+    def mark_delivered(self, delivery_ids: list[int]):
+        if delivery_ids:
+            self._connection.executemany(
+                "UPDATE deliveries SET status = ?, owner = NULL, attempts = attempts + 1, last_error = NULL WHERE id = ?",
+                [(STATUS_DELIVERED, delivery_id) for delivery_id in delivery_ids]
+            )
+
+    def mark_rejected(self, delivery_id: int, error: str):
+        self._connection.execute(
+            "UPDATE deliveries SET status = ?, owner = NULL, attempts = attempts + 1, last_error = ? WHERE id = ?",
+            (STATUS_REJECTED, error, delivery_id)
+        )
+
+    def reschedule(self, delivery_id: int, next_attempt_at: float, error: str):
+        """Records a failed attempt; the delivery is pending again and due at next_attempt_at."""
+        self._connection.execute(
+            "UPDATE deliveries SET status = ?, owner = NULL, attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+            "WHERE id = ? AND status IN (?, ?)",
+            (STATUS_PENDING, next_attempt_at, error, delivery_id, STATUS_PENDING, STATUS_IN_FLIGHT)
+        )
+
+    def due(self, now: Optional[float] = None, limit: int = 100) -> list[tuple[int, str, dict, int]]:
+        """
+        Pending deliveries whose next attempt is due, oldest first.
+        Returns:
+            (delivery id, chat display id, payload, attempts so far) tuples.
+        """
+        now = time.time() if now is None else now
+        rows = self._connection.execute(
+            "SELECT id, chat, payload, attempts FROM deliveries WHERE status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (STATUS_PENDING, now, limit)
+        ).fetchall()
+        return [(delivery_id, chat, json.loads(payload), attempts) for delivery_id, chat, payload, attempts in rows]
+
+    def claim(self, delivery_id: int, now: Optional[float] = None) -> bool:
+        """
+        Takes a due delivery for sending: it is in flight, owned by this outbox.
+        Returns:
+            False if another sender (or process) claimed it first.
+        """
+        now = time.time() if now is None else now
+        cursor = self._connection.execute(
+            "UPDATE deliveries SET status = ?, owner = ? WHERE id = ? AND status = ? AND next_attempt_at <= ?",
+            (STATUS_IN_FLIGHT, self.owner, delivery_id, STATUS_PENDING, now)
+        )
+        return cursor.rowcount == 1
+
+    def expire(self, created_before: float) -> int:
+        """Gives up on pending deliveries created before the given time. Returns how many."""
+        cursor = self._connection.execute(
+            "UPDATE deliveries SET status = ? WHERE status = ? AND created_at < ?",
+            (STATUS_EXPIRED, STATUS_PENDING, created_before)
+        )
+        return cursor.rowcount
+
+    def purge(self, created_before: float) -> int:
+        """Deletes finished deliveries created before the given time. Returns how many."""
+        cursor = self._connection.execute(
+            "DELETE FROM deliveries WHERE status NOT IN (?, ?) AND created_at < ?",
+            (STATUS_PENDING, STATUS_IN_FLIGHT, created_before)
+        )
+        return cursor.rowcount
+
+    def pending_count(self) -> int:
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM deliveries WHERE status IN (?, ?)", (STATUS_PENDING, STATUS_IN_FLIGHT)
+        ).fetchone()[0]
+
+    def close(self):
+        # Nothing is in flight any more: the next process need not wait for owner_ttl
+        self._connection.execute("DELETE FROM owners WHERE owner = ?", (self.owner,))
+        self._connection.close()
@@ -0,0 +1,95 @@
+import re
+from typing import Iterable, Iterator
+from src.utils.symbol_index import SymbolIndex
+
+# Shared building blocks for the exchange announcement parsers.
+# Everything here is compiled once at import time so a parse call only runs
+# prebuilt patterns and set lookups.
+
+DELISTING_KEYWORDS = ["delist", "removal", "remove", "suspend trading", "discontinue"]
+
+# All keywords folded into one alternation: a single scan classifies a title
+# without lowercasing it or looping over the keyword list
+DELISTING_KEYWORDS_RE = re.compile("|".join(re.escape(keyword) for keyword in DELISTING_KEYWORDS), re.IGNORECASE)
+
+MONTHS_PATTERN = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)'
+
+def is_delisting_text(text: str) -> bool:
+    """Checks the text for any of the delisting keywords (case-insensitive)."""
+    return DELISTING_KEYWORDS_RE.search(text) is not None
+
+def iter_overlapping(pattern: re.Pattern, text: str) -> Iterator[re.Match]:
+    """
+    Scans the text once from left to right, yielding a match at every position
+    where the combined pattern matches (unlike finditer, matches may overlap).
+    With mutually exclusive alternatives, the first match of each named
+    alternative is exactly what a separate re.search with it would return.
+    """
+    pos = 0
+    while True:
+        match = pattern.search(text, pos)
+        if match is None:
+            return
+        yield match
+        pos = match.start() + 1
+
+def strip_ticker_suffix(ticker: str, suffixes: tuple[str, ...], min_remaining: int) -> str:
+    """
+    Removes one quote-asset suffix (e.g. SAROSUSDT -> SAROS).
+    Args:
+        ticker: Upper-case ticker candidate.
+        suffixes: Suffixes to strip; none of them may be a suffix of another.
+        min_remaining: Minimum length of the ticker left after stripping.
+    Returns:
+        The ticker without the suffix, or unchanged if stripping would make it too short.
+    """
+    if not ticker.endswith(suffixes):
+        return ticker
+    for suffix in suffixes:
+        if ticker.endswith(suffix):
+            if len(ticker) - len(suffix) >= min_remaining:
+                return ticker[:-len(suffix)]
+            return ticker
+    return ticker
+
+def unique_suffixes(suffixes: Iterable[str]) -> tuple[str, ...]:
+    """Deduplicates a suffix list, keeping order, for use with strip_ticker_suffix."""
+    result = tuple(dict.fromkeys(suffixes))
+    for suffix in result:
+        for other in result:
+            if suffix != other and suffix.endswith(other):
+                raise ValueError(f"Ticker suffix {other} is a suffix of {suffix}.")
+    return result
+
+def confirm_tickers(
+    strict: Iterable[str],
+    loose: Iterable[str],
+    symbol_index: SymbolIndex,
+    suffixes: tuple[str, ...],
+    min_remaining: int
+) -> set[str]:
+    """
+    Turns ticker candidates into tickers, using the symbol index when it has been loaded.
+    Args:
+        strict: Candidates from patterns that only match tickers (e.g. "Delist X, Y on");
+            kept even if the index doesn't know them, e.g. a pair removed before it was built.
+        loose: Candidates from broad patterns (any upper-case word); only kept if the index
+            confirms them.
+        symbol_index: Known trading pairs.
+        suffixes, min_remaining: Suffix stripping used when the index is empty or
+            doesn't know a strict candidate (see strip_ticker_suffix).
+    Returns:
+        Base assets, with pairs split exactly (SAROSUSDT -> SAROS).
+    """
+    if not symbol_index:
+        return {strip_ticker_suffix(ticker, suffixes, min_remaining) for ticker in (*strict, *loose)}
+
+    tickers = set()
+    for ticker in strict:
+        base = symbol_index.resolve(ticker)
+        tickers.add(base if base is not None else strip_ticker_suffix(ticker, suffixes, min_remaining))
+    for ticker in loose:
+        base = symbol_index.resolve(ticker)
+        if base is not None:
+            tickers.add(base)
+    return tickers
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+from typing import Hashable, Iterable, Iterator
+
+class BoundedOrderedSet:
+    """
+    Insertion-ordered set with O(1) membership, insert and eviction.
+    Re-adding an item makes it the most recent one; once the set is full the
+    least recent item is evicted.
+    """
+    def __init__(self, maxlen: int, items: Iterable[Hashable] = ()):
+        """
+        Args:
+            maxlen: Maximum number of items kept.
+            items: Initial items, most recent first (the order used by to_list()).
+        """
+        if maxlen < 1:
+            raise ValueError("maxlen must be positive.")
+        self.maxlen = maxlen
+        # Bumped on every change so callers can cheaply detect modifications
+        self.version = 0
+        self._items: OrderedDict = OrderedDict()
+        for item in reversed(list(items)):
+            self.add(item)
+        self.version = 0
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        """Iterates from the most recent item to the least recent one."""
+        return reversed(self._items)
+
+    def add(self, item: Hashable) -> bool:
+        """
+        Adds the item as the most recent one.
+        Returns:
+            True if the item was not in the set before.
+        """
+        if item in self._items:
+            if next(reversed(self._items)) != item:
+                self._items.move_to_end(item)
+                self.version += 1
+            return False
+        self._items[item] = None
+        if len(self._items) > self.maxlen:
+            self._items.popitem(last=False)
+        self.version += 1
+        return True
+
+    def discard(self, item: Hashable):
+        if item in self._items:
+            del self._items[item]
+            self.version += 1
+
+    def to_list(self) -> list:
+        """Items from the most recent to the least recent."""
+        return list(reversed(self._items))
@@ -1,11 +1,52 @@
 import re
 from typing import Optional, List, Dict, Any
+from src.utils.announcement_parser import MONTHS_PATTERN, confirm_tickers, iter_overlapping, unique_suffixes
+from src.utils.symbol_index import SYMBOL_INDEX, SymbolIndex
 
-def parse_description(description: str) -> Dict[str, Optional[Any]]:
+# Define common suffixes to remove from tickers
+COMMON_TICKER_SUFFIXES = unique_suffixes(["USDT", "PERP", "USD", "USDC", "USDT", "ETH", "BTC"]) # Add more as needed
+
+DESCRIPTION_STOPWORDS = frozenset(["AND", "OF", "TO", "FOR", "WITH", "FROM", "VIA", "IN", "THE", "AM", "PM", "UTC", "AT"])
+
+# 1. Pattern to capture ticker before "Perpetual Contract" or similar phrases
+#    e.g., "delisting the SAROSUSDT Perpetual Contract" -> SAROSUSDT
+CONTRACT_RE = re.compile(r'delisting the ([A-Z0-9]{2,10})(?: Perpetual)? Contract')
+
+# 2. Pattern for general delisted coins/tokens, e.g., "Delisting of COQ and VRA"
+#    This might capture multiple tickers separated by "and"
+DELISTING_OF_RE = re.compile(r'delisting (?:of )?([A-Z0-9]{2,10}(?: and [A-Z0-9]{2,10})*)', re.IGNORECASE)
+AND_SPLIT_RE = re.compile(r' and ')
+
+# 3. Specific pattern for "Token swap and rebranding of MANTRA (OM) to MANTRA (MANTRA)"
+REBRANDING_RE = re.compile(r'rebranding of \s*(\S+)\s*\(([A-Z0-9]{2,10})\)', re.IGNORECASE)
+
+# Dates and times in one combined pattern. The alternatives can never match at the
+# same position, so a single overlapping scan yields the first match of each kind:
+#   date_mdy:   "Feb 11, 2026" (a leading "at "/"on " is never part of the output)
+#   date_dmy:   "11th of Feb 2026" (reported as "the 11th of Feb 2026" after "on the ")
+#   date_iso:   YYYY-MM-DD
+#   date_slash: MM/DD/YYYY or DD/MM/YYYY
+#   time:       "9:00AM UTC", "9:00AM" or "09:00" (utc group set when followed by UTC)
+# The leading lookahead lets the scanner skip characters no alternative can start with.
+DATE_TIME_RE = re.compile(
+    r'(?=[\dADFJMNOSadfjmnos])(?:'
+    rf'(?P<date_mdy>{MONTHS_PATTERN}\s+\d{{1,2}},\s+\d{{4}})'
+    rf'|(?P<date_dmy>\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?{MONTHS_PATTERN}\s+\d{{4}})'
+    r'|(?P<date_iso>\d{4}-\d{2}-\d{2})'
+    r'|(?P<date_slash>\d{1,2}/\d{1,2}/\d{4})'
+    r'|(?P<time>\d{1,2}:\d{2}(?:AM|PM)?(?P<utc>\s*UTC)?)'
+    r')',
+    re.IGNORECASE
+)
+# Prioritize specific formats
+DATE_PRIORITY = ("date_mdy", "date_dmy", "date_iso", "date_slash")
+
+def parse_description(description: str, symbol_index: Optional[SymbolIndex] = None) -> Dict[str, Optional[Any]]:
     """
     Parses the Bybit delisting description to extract tickers, date, and time.
     Args:
         description: The description string from the Bybit announcement.
+        symbol_index: Known trading pairs used to confirm tickers (the shared index by default).
     Returns:
         A dictionary containing 'tickers' (list of strings), 'date' (string),
         and 'time' (string). Missing values will be None or empty list.
@@ -16,80 +57,63 @@ def parse_description(description: str) -> Dict[str, Optional[Any]]:
         "time": None
     }
 
-    # Define common suffixes to remove from tickers
-    common_ticker_suffixes = ["USDT", "PERP", "USD", "USDC", "USDT", "ETH", "BTC"] # Add more as needed
-    
     # --- Extract Tickers ---
-    potential_tickers = set()
+    strict_tickers = set()
+    loose_tickers = set()
 
-    # 1. Pattern to capture ticker before "Perpetual Contract" or similar phrases
-    #    e.g., "delisting the SAROSUSDT Perpetual Contract" -> SAROSUSDT
-    contract_match = re.search(r'delisting the ([A-Z0-9]{2,10})(?: Perpetual)? Contract', description)
+    contract_match = CONTRACT_RE.search(description)
     if contract_match:
-        potential_tickers.add(contract_match.group(1).upper())
-    
-    # 2. Pattern for general delisted coins/tokens, e.g., "Delisting of COQ and VRA"
-    #    This might capture multiple tickers separated by "and"
-    delisting_of_match = re.findall(r'delisting (?:of )?([A-Z0-9]{2,10}(?: and [A-Z0-9]{2,10})*)', description, re.IGNORECASE)
-    for match_group in delisting_of_match:
+        strict_tickers.add(contract_match.group(1))
+
+    for match_group in DELISTING_OF_RE.findall(description):
         # Split by " and " to handle multiple tickers in one match
-        for ticker_part in re.split(r' and ', match_group):
-            if ticker_part and ticker_part.upper() not in ["AND", "OF", "TO", "FOR", "WITH", "FROM", "VIA", "IN", "THE", "AM", "PM", "UTC", "AT"]:
-                potential_tickers.add(ticker_part.upper())
+        for ticker_part in AND_SPLIT_RE.split(match_group):
+            upper_part = ticker_part.upper()
+            if upper_part and upper_part not in DESCRIPTION_STOPWORDS:
+                # The pattern is case-insensitive: words that weren't written in capitals
+                # ("delisting of spot pairs") only count if the index knows them
+                (strict_tickers if ticker_part == upper_part else loose_tickers).add(upper_part)
 
-    # 3. Specific pattern for "Token swap and rebranding of MANTRA (OM) to MANTRA (MANTRA)"
-    rebranding_match = re.search(r'rebranding of \s*(\S+)\s*\(([A-Z0-9]{2,10})\)', description, re.IGNORECASE)
+    rebranding_match = REBRANDING_RE.search(description)
     if rebranding_match:
-        potential_tickers.add(rebranding_match.group(2).upper())
-
-    # Filter and clean tickers
-    cleaned_tickers = set()
-    for ticker in potential_tickers:
-        cleaned_ticker = ticker
-        for suffix in common_ticker_suffixes:
-            if cleaned_ticker.endswith(suffix):
-                # Remove suffix if it's the last part and the remaining part is still a valid ticker length
-                if len(cleaned_ticker) - len(suffix) >= 2:
-                    cleaned_ticker = cleaned_ticker[:-len(suffix)]
-                break # Only remove one suffix type per ticker, prioritize the first match
-        # Final check to ensure it's not a common word that slipped through
-        if cleaned_ticker and cleaned_ticker not in ["AND", "OF", "TO", "FOR", "WITH", "FROM", "VIA", "IN", "THE", "AM", "PM", "UTC", "AT"]:
-            cleaned_tickers.add(cleaned_ticker)
-
-
-    extracted_data["tickers"] = sorted(list(cleaned_tickers))
-
-    # --- Extract Date ---
-    # Prioritize specific formats
-    # Example: "at Feb 11, 2026", "Feb 11, 2026"
-    date_patterns = [
-        r'(?:at |on )?(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}', # "at Feb 11, 2026" or "Feb 11, 2026"
-        r'(?:on the )?\d{1,2}(?:st|nd|rd|th)?\s+(?:of\s+)?(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}', # "11th of Feb 2026"
-        r'(\d{4}-\d{2}-\d{2})', # YYYY-MM-DD
-        r'(\d{1,2}/\d{1,2}/\d{4})' # MM/DD/YYYY or DD/MM/YYYY
-    ]
-    for pattern in date_patterns:
-        match = re.search(pattern, description, re.IGNORECASE)
-        if match:
-            extracted_data["date"] = match.group(0).strip()
-            # If it started with "at " or "on ", remove it for cleaner output
-            if extracted_data["date"].lower().startswith("at "):
-                extracted_data["date"] = extracted_data["date"][3:]
-            elif extracted_data["date"].lower().startswith("on "):
-                extracted_data["date"] = extracted_data["date"][3:]
+        strict_tickers.add(rebranding_match.group(2).upper())
+
+    # Confirm the candidates against the known pairs and split pairs into base assets
+    # (without an index: strip one suffix if at least 2 characters remain),
+    # then drop common words that slipped through
+    cleaned_tickers = confirm_tickers(
+        strict_tickers, loose_tickers, SYMBOL_INDEX if symbol_index is None else symbol_index, COMMON_TICKER_SUFFIXES, 2
+    )
+    cleaned_tickers.difference_update(DESCRIPTION_STOPWORDS)
+    extracted_data["tickers"] = sorted(cleaned_tickers)
+
+    # --- Extract Date and Time ---
+    first_dates = {}
+    first_time = None
+    utc_time = None
+    for match in iter_overlapping(DATE_TIME_RE, description):
+        kind = match.lastgroup
+        if kind == "time":
+            if first_time is None:
+                first_time = match.group("time")
+            if utc_time is None and match.group("utc") is not None:
+                utc_time = match.group("time")
+        elif kind not in first_dates:
+            date = match.group(0)
+            start = match.start()
+            if kind == "date_dmy" and start >= 7 and description[start - 7:start].lower() == "on the ":
+                date = description[start - 4:start] + date
+            first_dates[kind] = date
+        # Nothing later in the text can change the result
+        if utc_time is not None and "date_mdy" in first_dates:
             break
 
-    # --- Extract Time ---
-    # Example: "9:00AM UTC", "at 9:00AM UTC"
-    time_patterns = [
-        r'(?:at )?(\d{1,2}:\d{2}(?:AM|PM)?\s*UTC)', # "at 9:00AM UTC" or "9:00AM UTC"
-        r'(?:at )?(\d{1,2}:\d{2}(?:AM|PM)?)',       # "at 9:00AM" or "9:00AM"
-        r'(\d{1,2}:\d{2})'                          # "09:00"
-    ]
-    for pattern in time_patterns:
-        match = re.search(pattern, description, re.IGNORECASE)
-        if match:
-            extracted_data["time"] = match.group(1).strip()
+    for kind in DATE_PRIORITY:
+        if kind in first_dates:
+            extracted_data["date"] = first_dates[kind]
             break
 
+    # "UTC" times take precedence over bare times
+    extracted_data["time"] = utc_time if utc_time is not None else first_time
+
     return extracted_data
@@ -0,0 +1,145 @@
+import base64
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+
+def make_dedup_key(identity: str) -> bytes:
+    """Fixed-size digest of an identity string, so every entry costs the same memory."""
+    return hashlib.blake2b(identity.encode('utf-8'), digest_size=16).digest()
+
+class BloomFilter:
+    """Plain Bloom filter over 16-byte keys (double hashing on the key's two halves)."""
+    def __init__(self, capacity: int, error_rate: float = 1e-6, bits: Optional[bytearray] = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: bytes):
+        first = int.from_bytes(key[:8], 'little')
+        second = int.from_bytes(key[8:16], 'little') | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, key: bytes):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class DedupIndex:
+    """
+    Bounded TTL set of announcement identities.
+    Entries live in an OrderedDict in insertion order, which with a fixed TTL is
+    also expiry order, so expiring and evicting only ever touch the front:
+    every check is O(1) and memory is capped at max_items entries.
+
+    With bloom_capacity set, identities also go into two rotating Bloom filter
+    generations (each spanning ttl_seconds). They remember identities that were
+    already evicted from the exact set at a fixed memory cost, at the price of a
+    false-positive rate of about bloom_error_rate.
+    """
+    def __init__(
+        self,
+        max_items: int = 10000,
+        ttl_seconds: float = 7 * 24 * 3600,
+        bloom_capacity: int = 0,
+        bloom_error_rate: float = 1e-6
+    ):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.version = 0
+
+        self._entries: OrderedDict[bytes, float] = OrderedDict()
+        self._blooms: list[BloomFilter] = []
+        self._bloom_rotated_at = time.time()
+        if bloom_capacity:
+            self._blooms = [BloomFilter(bloom_capacity, bloom_error_rate), BloomFilter(bloom_capacity, bloom_error_rate)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float):
+        while self._entries:
+            key, expires_at = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_items:
+                break
+            self._entries.popitem(last=False)
+
+        if self._blooms and now - self._bloom_rotated_at >= self.ttl_seconds:
+            # Drop the older generation; anything in it is older than the TTL
+            self._blooms = [BloomFilter(self.bloom_capacity, self.bloom_error_rate), self._blooms[0]]
+            self._bloom_rotated_at = now
+
+    def _seen(self, key: bytes, now: float) -> bool:
+        self._expire(now)
+        expires_at = self._entries.get(key)
+        if expires_at is not None and expires_at > now:
+            return True
+        return any(key in bloom for bloom in self._blooms)
+
+    def _add(self, key: bytes, now: float):
+        self._entries[key] = now + self.ttl_seconds
+        self._expire(now)
+        if self._blooms:
+            self._blooms[0].add(key)
+        self.version += 1
+
+    def seen(self, identity: str, now: Optional[float] = None) -> bool:
+        """Whether the identity was already seen within the TTL, without recording it."""
+        return self._seen(make_dedup_key(identity), time.time() if now is None else now)
+
+    def add(self, identity: str, now: Optional[float] = None):
+        """Records the identity (e.g. once the alert for it is out)."""
+        self._add(make_dedup_key(identity), time.time() if now is None else now)
+
+    def seen_or_add(self, identity: str, now: Optional[float] = None) -> bool:
+        """
+        Checks the identity and records it.
+        Returns:
+            True if the identity was already seen within the TTL (a duplicate).
+        """
+        now = time.time() if now is None else now
+        key = make_dedup_key(identity)
+        if self._seen(key, now):
+            return True
+        self._add(key, now)
+        return False
+
+    def snapshot(self) -> dict:
+        """JSON-serializable state for persistence."""
+        data = {
+            "version": 1,
+            "entries": [[key.hex(), expires_at] for key, expires_at in self._entries.items()]
+        }
+        if self._blooms:
+            data["bloom"] = {
+                "capacity": self.bloom_capacity,
+                "error_rate": self.bloom_error_rate,
+                "rotated_at": self._bloom_rotated_at,
+                "generations": [base64.b64encode(bytes(bloom.bits)).decode('ascii') for bloom in self._blooms]
+            }
+        return data
+
+    def restore(self, data: dict, now: Optional[float] = None):
+        """Loads a snapshot, skipping expired entries and an incompatible Bloom filter."""
+        now = time.time() if now is None else now
+        self._entries.clear()
+        for key_hex, expires_at in data.get("entries", []):
+            if expires_at > now:
+                self._entries[bytes.fromhex(key_hex)] = expires_at
+
+        bloom = data.get("bloom")
+        if self._blooms and bloom and bloom.get("capacity") == self.bloom_capacity and bloom.get("error_rate") == self.bloom_error_rate:
+            self._blooms = [
+                BloomFilter(self.bloom_capacity, self.bloom_error_rate, bytearray(base64.b64decode(generation)))
+                for generation in bloom["generations"]
+            ]
+            self._bloom_rotated_at = bloom["rotated_at"]
+        self._expire(now)
@@ -0,0 +1,70 @@
+import re
+from datetime import datetime, timezone
+from typing import Optional
+from src.utils.announcement_parser import MONTHS_PATTERN
+
+# The date formats the parsers report (see bybit_parser.DATE_TIME_RE and binance_parser.DATE_RE)
+DATE_MDY_RE = re.compile(rf'({MONTHS_PATTERN})\s+(\d{{1,2}}),\s+(\d{{4}})', re.IGNORECASE)
+DATE_DMY_RE = re.compile(rf'(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({MONTHS_PATTERN})\s+(\d{{4}})', re.IGNORECASE)
+DATE_ISO_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+DATE_SLASH_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+TIME_RE = re.compile(r'(\d{1,2}):(\d{2})\s*(AM|PM)?', re.IGNORECASE)
+
+MONTHS = {name: number for number, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+)}
+
+def _parse_date(date: str) -> Optional[tuple[int, int, int]]:
+    """(year, month, day) of a parsed date string, or None if it has no known format."""
+    match = DATE_MDY_RE.search(date)
+    if match:
+        return int(match.group(3)), MONTHS[match.group(1).lower()], int(match.group(2))
+    match = DATE_DMY_RE.search(date)
+    if match:
+        return int(match.group(3)), MONTHS[match.group(2).lower()], int(match.group(1))
+    match = DATE_ISO_RE.search(date)
+    if match:
+        return int(match.group(1)), int(match.group(2)), int(match.group(3))
+    match = DATE_SLASH_RE.search(date)
+    if match:
+        first, second = int(match.group(1)), int(match.group(2))
+        # Month first like the rest of Bybit's announcements, unless that can't be a date
+        if first > 12:
+            return int(match.group(3)), second, first
+        return int(match.group(3)), first, second
+    return None
+
+def _parse_time(time: str) -> Optional[tuple[int, int]]:
+    """(hour, minute) of "9:00AM", "9:00 PM UTC" or "21:00", or None."""
+    match = TIME_RE.search(time)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    meridiem = (match.group(3) or "").upper()
+    if meridiem == "AM" and hour == 12:
+        hour = 0
+    elif meridiem == "PM" and hour != 12:
+        hour += 12
+    return hour, minute
+
+def parse_delisting_deadline(date: Optional[str], time: Optional[str] = None) -> Optional[float]:
+    """
+    Normalizes a parsed delisting date and time into a UTC timestamp.
+    Exchanges announce delisting times in UTC; without a time the deadline
+    is the start of the day (00:00 UTC), so reminders come early rather than late.
+    Args:
+        date: Date as reported by the parsers, e.g. "Feb 11, 2026" or "2026-03-01".
+        time: Time as reported by the parsers, e.g. "9:00AM UTC", or None.
+    Returns:
+        Seconds since the epoch, or None if the date is missing or not a valid date.
+    """
+    if not date:
+        return None
+    parsed_date = _parse_date(date)
+    if parsed_date is None:
+        return None
+    hour, minute = (_parse_time(time) if time else None) or (0, 0)
+    try:
+        return datetime(*parsed_date, hour, minute, tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Optional
+from src.utils.metrics import STREAM_OVERFLOWS
+
+# orjson is optional: it encodes several times faster, json is the fallback
+try:
+    import orjson
+    def _json_dumps(value) -> str:
+        return orjson.dumps(value).decode('utf-8')
+except ImportError:
+    def _json_dumps(value) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+# What a subscriber whose buffer is full loses: its oldest events, or the connection
+POLICY_DROP = "drop"
+POLICY_DISCONNECT = "disconnect"
+
+class EncodedEvent:
+    """One published event, encoded once for every subscriber and transport."""
+    __slots__ = ("id", "json", "sse")
+
+    def __init__(self, event_id: int, event_type: str, data: dict):
+        self.id = event_id
+        self.json = _json_dumps({"id": event_id, "type": event_type, **data})
+        self.sse = f"id: {event_id}\nevent: {event_type}\ndata: {self.json}\n\n".encode('utf-8')
+
+class Subscriber:
+    """Bounded buffer of events for one client, filled by the broadcaster and drained by the client's task."""
+    def __init__(self, max_buffer: int):
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self.closed = False
+        self._buffer: deque[EncodedEvent] = deque()
+        self._ready = asyncio.Event()
+
+    def _push(self, event: EncodedEvent, policy: str) -> bool:
+        """Returns False if the buffer was full (an event was dropped or the subscriber closed)."""
+        if len(self._buffer) >= self.max_buffer:
+            if policy == POLICY_DISCONNECT:
+                self.close()
+                return False
+            self._buffer.popleft()
+            self.dropped += 1
+            self._buffer.append(event)
+            self._ready.set()
+            return False
+        self._buffer.append(event)
+        self._ready.set()
+        return True
+
+    def close(self):
+        self.closed = True
+        self._buffer.clear()
+        self._ready.set()
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[EncodedEvent]:
+        """
+        Waits for the next event.
+        Returns:
+            The event, or None on timeout or once the subscriber is closed (check closed).
+        """
+        if not self._buffer and not self.closed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.closed or not self._buffer:
+            return None
+        return self._buffer.popleft()
+
+class EventBroadcaster:
+    """
+    Fan-out of events to any number of subscribers.
+
+    publish() encodes the event once and appends it to every subscriber's
+    buffer without awaiting anything, so it costs the publisher the same
+    whether the clients are fast, slow or gone. A subscriber whose buffer is
+    full loses its oldest event (POLICY_DROP) or is closed (POLICY_DISCONNECT);
+    either way nobody else waits for it. The last history events are kept
+    for clients resuming after a reconnect.
+    """
+    def __init__(self, buffer_size: int = 256, policy: str = POLICY_DROP, history: int = 256):
+        if policy not in (POLICY_DROP, POLICY_DISCONNECT):
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.buffer_size = buffer_size
+        self.policy = policy
+        self._subscribers: set[Subscriber] = set()
+        self._history: deque[EncodedEvent] = deque(maxlen=history)
+        # Ids continue from the start time (ms), so they keep growing across restarts
+        self._last_id = int(time.time() * 1000)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: dict) -> EncodedEvent:
+        self._last_id += 1
+        event = EncodedEvent(self._last_id, event_type, data)
+        self._history.append(event)
+        for subscriber in list(self._subscribers):
+            if not subscriber._push(event, self.policy):
+                STREAM_OVERFLOWS.labels(self.policy).inc()
+                if subscriber.closed:
+                    self._subscribers.discard(subscriber)
+        return event
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscriber:
+        """
+        Registers a new subscriber.
+        Args:
+            last_event_id: Id of the last event the client received before
+                reconnecting; the newer events still in the history are queued first.
+        """
+        subscriber = Subscriber(self.buffer_size)
+        if last_event_id is not None:
+            for event in self._history:
+                if event.id > last_event_id:
+                    subscriber._push(event, POLICY_DROP)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+        subscriber.close()
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional, Protocol
+from src.utils.metrics import FAILURES
+
+logger = logging.getLogger(__name__)
+
+class Lease(Protocol):
+    def try_acquire(self) -> bool: ...
+    def release(self): ...
+
+class LeaderElector:
+    """
+    Keeps trying to acquire or renew a lease (S3Lease, FileLockLease) every
+    renew_interval. This instance is the leader until ttl_seconds after the
+    start of its last successful renewal: a standby can only take over after
+    seeing the lease unchanged for ttl_seconds, so the two never overlap.
+    Failed attempts (e.g. S3 unreachable) don't demote the leader before that.
+    Election callbacks run in their own tasks, so a slow one (e.g. replaying
+    alerts) never delays a renewal; they are cancelled when this instance is
+    demoted or stops.
+    """
+    def __init__(self, lease: Lease, ttl_seconds: float = 15.0, renew_interval: Optional[float] = None):
+        self.lease = lease
+        self.ttl_seconds = ttl_seconds
+        self.renew_interval = ttl_seconds / 3 if renew_interval is None else renew_interval
+        self._valid_until = 0.0
+        self._on_elected: list[Callable[[], Awaitable[None]]] = []
+        self._callback_tasks: set[asyncio.Task] = set()
+
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    def on_elected(self, callback: Callable[[], Awaitable[None]]):
+        """Registers a coroutine function to run each time this instance becomes the leader."""
+        self._on_elected.append(callback)
+
+    async def _run_callback(self, callback: Callable[[], Awaitable[None]]):
+        try:
+            await callback()
+        except Exception as e:
+            logger.exception("Error in leader election callback: %s", e)
+
+    def _cancel_callbacks(self):
+        for task in self._callback_tasks:
+            task.cancel()
+
+    async def run(self):
+        was_leader = False
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    acquired = await asyncio.to_thread(self.lease.try_acquire)
+                    self._valid_until = started + self.ttl_seconds if acquired else 0.0
+                except Exception as e:
+                    FAILURES.labels("leader_lease").inc()
+                    logger.warning("Error renewing the leader lease: %s", e)
+
+                if self.is_leader != was_leader:
+                    was_leader = self.is_leader
+                    if was_leader:
+                        logger.info("This instance is now the leader.")
+                        for callback in self._on_elected:
+                            task = asyncio.create_task(self._run_callback(callback))
+                            self._callback_tasks.add(task)
+                            task.add_done_callback(self._callback_tasks.discard)
+                    else:
+                        logger.warning("This instance lost the leader lease and is now a standby.")
+                        self._cancel_callbacks()
+                await asyncio.sleep(self.renew_interval)
+        finally:
+            self._valid_until = 0.0
+            # Stopped before the lease is released, so another leader never overlaps them
+            self._cancel_callbacks()
+            await asyncio.gather(*self._callback_tasks, return_exceptions=True)
+            try:
+                await asyncio.to_thread(self.lease.release)
+            except Exception as e:
+                logger.warning("Error releasing the leader lease: %s", e)
+
+_elector: Optional[LeaderElector] = None
+
+def set_leader_elector(elector: Optional[LeaderElector]):
+    global _elector
+    _elector = elector
+
+def is_leader() -> bool:
+    """Whether this instance should send alerts; always True without leader election."""
+    return _elector is None or _elector.is_leader
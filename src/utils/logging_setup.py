@@ -0,0 +1,131 @@
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Optional, TextIO
+
+# Attributes every LogRecord has; anything else came in through extra= and is added to the JSON output
+_STANDARD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, extra fields and the exception if any."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class RateSampler(logging.Filter):
+    """
+    Lets through at most per_second records per call site (logger and message
+    template) per second; errors are never sampled. The next record that gets
+    through from a sampled call site carries the number of dropped ones in
+    its "suppressed" field.
+    """
+    def __init__(self, per_second: int):
+        super().__init__()
+        self.per_second = per_second
+        self._windows: dict[tuple[str, str], list] = {} # call site -> [second, passed, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, str(record.msg))
+        second = int(record.created)
+        window = self._windows.get(key)
+        if window is None or window[0] != second:
+            suppressed = window[2] if window is not None else 0
+            self._windows[key] = [second, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if window[1] < self.per_second:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts the record on the queue as it is: formatting and sampling happen on the
+    listener thread, so the caller only pays for creating the record and one
+    put_nowait(). When the queue is full the record is dropped, never waited on.
+    """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[_NonBlockingQueueHandler] = None
+
+def setup_logging(
+    level: str = "INFO",
+    json_output: bool = True,
+    sample_per_second: int = 10,
+    queue_size: int = 10000,
+    stream: TextIO = sys.stdout
+) -> bool:
+    """
+    Routes the root logger through a bounded queue to a background thread that
+    formats and writes the records.
+    Args:
+        level: Root log level name.
+        json_output: JSON lines instead of plain text.
+        sample_per_second: Records per call site per second (0 = no sampling).
+        queue_size: Records buffered for the writer thread before new ones are dropped.
+        stream: Where the writer thread writes.
+    Returns:
+        False if logging was already set up (by someone who will also stop it).
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return False
+
+    output_handler = logging.StreamHandler(stream)
+    if json_output:
+        output_handler.setFormatter(JsonFormatter())
+    else:
+        output_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    if sample_per_second > 0:
+        output_handler.addFilter(RateSampler(sample_per_second))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = _NonBlockingQueueHandler(log_queue)
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, output_handler)
+    _listener.start()
+    return True
+
+def stop_logging():
+    """Writes out everything still queued and detaches the queue handler."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    if _queue_handler.dropped:
+        print(f"Logging queue was full, {_queue_handler.dropped} records were dropped.", file=sys.stderr)
+    _listener = None
+    _queue_handler = None
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+from src.utils.metrics import EVENT_LOOP_LAG, EVENT_LOOP_BLOCKS
+
+logger = logging.getLogger(__name__)
+
+class LoopWatchdog:
+    """
+    Measures event loop lag and catches callbacks that block the loop.
+
+    A task on the loop sleeps for interval and records how late it woke up
+    (the lag) and when (the heartbeat). A watcher thread checks the heartbeat:
+    once it is more than block_threshold overdue the loop is stuck in a
+    callback right now, so the thread logs the loop thread's current stack,
+    once per stall, while the culprit is still running.
+    """
+    def __init__(self, interval: float = 0.1, block_threshold: float = 0.25, history: int = 600):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.lag = 0.0
+        self._recent_lags: deque[float] = deque(maxlen=history) # the last history * interval seconds
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._stop_event = threading.Event()
+
+    async def run(self):
+        """Samples the lag until cancelled; the watcher thread runs as long as this does."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop_event.clear()
+        watcher = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        watcher.start()
+        try:
+            while True:
+                started = time.monotonic()
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                self._heartbeat = now
+                self.lag = max(0.0, now - started - self.interval)
+                self._recent_lags.append(self.lag)
+                EVENT_LOOP_LAG.observe(self.lag)
+        finally:
+            self._stop_event.set()
+
+    def _watch(self):
+        reported_heartbeat = None
+        while not self._stop_event.wait(self.block_threshold / 4):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.block_threshold or heartbeat == reported_heartbeat:
+                continue
+            reported_heartbeat = heartbeat
+            EVENT_LOOP_BLOCKS.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(loop thread not found)\n"
+            logger.warning("Event loop blocked for %.0f ms so far, running callback:\n%s", blocked_for * 1000, stack.rstrip())
+
+    def stats(self) -> dict:
+        """Current and recent lag for the health endpoint."""
+        return {
+            "lag_ms": round(self.lag * 1000, 3),
+            "max_lag_ms": round(max(self._recent_lags, default=0.0) * 1000, 3),
+            "window_seconds": round(self._recent_lags.maxlen * self.interval, 1),
+            "blocked": self.lag >= self.block_threshold
+        }
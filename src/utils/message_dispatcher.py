@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Optional
+from src.utils.metrics import FAILURES
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes, lower value is served first
+PRIORITY_DELISTING = 0
+PRIORITY_ANNOUNCEMENT = 1
+PRIORITY_OTHER = 2
+PRIORITY_LEVELS = 3
+
+OVERFLOW_BLOCK = "block" # Producer waits for a free slot
+OVERFLOW_DROP = "drop"   # Producer never waits, lowest-priority frames are dropped first
+
+class MessageDispatcher:
+    """
+    Bounded, prioritized hand-off between a producer (the WebSocket reader)
+    and a pool of async workers running the message handler.
+
+    Backpressure when the queue is full:
+        - "drop": the oldest frame of the lowest non-empty lane below the incoming
+          frame's priority is evicted; if there is none, the incoming frame is dropped.
+          Delisting frames therefore only ever lose to other delisting frames.
+        - "block": submit() waits until a worker frees a slot.
+    """
+    def __init__(
+        self,
+        message_handler: Callable[[Any], Any],
+        priority_fn: Optional[Callable[[Any], int]] = None,
+        workers: int = 4,
+        maxsize: int = 1000,
+        overflow: str = OVERFLOW_DROP
+    ):
+        if overflow not in (OVERFLOW_BLOCK, OVERFLOW_DROP):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if workers < 1 or maxsize < 1:
+            raise ValueError("workers and maxsize must be positive.")
+
+        self.message_handler = message_handler
+        self.priority_fn = priority_fn
+        self.workers = workers
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+
+        self._is_coroutine_handler = asyncio.iscoroutinefunction(message_handler)
+        self._lanes = [deque() for _ in range(PRIORITY_LEVELS)]
+        self._size = 0
+        self._items = asyncio.Semaphore(0)
+        self._free_slots = asyncio.Semaphore(maxsize)
+        self._worker_tasks: list[asyncio.Task] = []
+
+    def qsize(self) -> int:
+        return self._size
+
+    def _get_priority(self, message: Any) -> int:
+        if self.priority_fn is None:
+            return PRIORITY_OTHER
+        return min(max(self.priority_fn(message), 0), PRIORITY_LEVELS - 1)
+
+    async def submit(self, message: Any) -> bool:
+        """
+        Enqueues a message for the workers.
+        Returns:
+            False if the message was dropped because the queue is full.
+        """
+        priority = self._get_priority(message)
+
+        if self.overflow == OVERFLOW_BLOCK:
+            await self._free_slots.acquire()
+        elif self._size >= self.maxsize:
+            for lane in reversed(self._lanes[priority + 1:]):
+                if lane:
+                    lane.popleft()
+                    self.dropped += 1
+                    self._lanes[priority].append(message)
+                    return True
+            self.dropped += 1
+            return False
+
+        self._lanes[priority].append(message)
+        self._size += 1
+        self._items.release()
+        return True
+
+    def _pop(self) -> Any:
+        for lane in self._lanes:
+            if lane:
+                self._size -= 1
+                return lane.popleft()
+        raise RuntimeError("Dispatcher queue is empty.")
+
+    async def _worker(self):
+        while True:
+            await self._items.acquire()
+            message = self._pop()
+            if self.overflow == OVERFLOW_BLOCK:
+                self._free_slots.release()
+            try:
+                if self._is_coroutine_handler:
+                    await self.message_handler(message)
+                else:
+                    await asyncio.to_thread(self.message_handler, message)
+            except Exception as e:
+                FAILURES.labels("message_handler").inc()
+                logger.exception("Error in message handler: %s", e)
+
+    def start(self):
+        if self._worker_tasks:
+            return
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
@@ -0,0 +1,70 @@
+import time
+from prometheus_client import Counter, Gauge, Histogram
+
+# Stage latencies go from tens of microseconds (classify, parse) to seconds (Telegram)
+STAGE_LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+STAGE_LATENCY = Histogram(
+    "delisting_bot_stage_seconds",
+    "Time spent in each pipeline stage.",
+    ["exchange", "stage"],
+    buckets=STAGE_LATENCY_BUCKETS
+)
+FRAMES = Counter("delisting_bot_frames_total", "WebSocket frames received.", ["exchange"])
+DELISTINGS = Counter("delisting_bot_delistings_total", "New delisting announcements detected.", ["exchange"])
+TELEGRAM_SENDS = Counter("delisting_bot_telegram_sends_total", "Telegram sendMessage/editMessageText calls by outcome.", ["result"])
+FAILURES = Counter("delisting_bot_failures_total", "Errors by component.", ["component"])
+RECONNECTS = Counter("delisting_bot_ws_reconnects_total", "WebSocket reconnect attempts.", ["exchange"])
+QUEUE_DEPTH = Gauge("delisting_bot_dispatch_queue_depth", "Frames waiting for a dispatcher worker.", ["exchange"])
+ACTIVE_CONNECTIONS = Gauge("delisting_bot_ws_active_connections", "Open WebSocket connections.", ["exchange"])
+OUTBOX_PENDING = Gauge("delisting_bot_outbox_pending", "Telegram deliveries waiting in the outbox.")
+STREAM_SUBSCRIBERS = Gauge("delisting_bot_stream_subscribers", "Connected /stream/delistings clients.")
+STREAM_OVERFLOWS = Counter(
+    "delisting_bot_stream_overflows_total",
+    "Events a slow stream subscriber lost (policy=drop) or subscribers disconnected (policy=disconnect).",
+    ["policy"]
+)
+REMINDERS_PENDING = Gauge("delisting_bot_reminders_pending", "Scheduled delistings with reminders still to send.")
+IS_LEADER = Gauge("delisting_bot_is_leader", "1 if this instance holds the leader lease and sends alerts.")
+SECONDS_SINCE_LAST_FRAME = Gauge(
+    "delisting_bot_seconds_since_last_frame",
+    "Seconds since the last WebSocket frame (-1 before the first one).",
+    ["exchange"]
+)
+EVENT_LOOP_LAG = Histogram(
+    "delisting_bot_event_loop_lag_seconds",
+    "How late the event loop woke up a timer, sampled continuously.",
+    buckets=STAGE_LATENCY_BUCKETS
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "delisting_bot_event_loop_blocks_total",
+    "Times a callback held the event loop longer than the watchdog threshold."
+)
+
+class FrameClock:
+    """
+    Time of the last received frame. Recording is a plain attribute write;
+    the age is only computed when /metrics is scraped.
+    """
+    __slots__ = ("last_frame_at",)
+
+    def __init__(self):
+        self.last_frame_at = None
+
+    def tick(self):
+        self.last_frame_at = time.monotonic()
+
+    def seconds_since_last_frame(self) -> float:
+        if self.last_frame_at is None:
+            return -1.0
+        return time.monotonic() - self.last_frame_at
+
+def stage_timer(exchange: str, stage: str) -> Histogram:
+    """
+    Histogram child for one (exchange, stage) pair.
+    Resolve it once at import time: label lookup costs more than observe() itself.
+    """
+    return STAGE_LATENCY.labels(exchange, stage)
@@ -1,4 +1,11 @@
+from datetime import datetime, timezone
 from typing import List, Optional
+from src.models.output_message import DelistingAlert, DelistingReminder
+
+# Telegram rejects messages longer than this
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Between the sections of a coalesced message
+SECTION_SEPARATOR = "\n\n"
 
 def format_delisting_message(
     header: str,
@@ -40,3 +47,90 @@ def format_delisting_message(
     message_parts.append(f"\n📜 <a href=\"{announcement_url}\">Читать анонс</a>")
 
     return "".join(message_parts)
+
+def format_delisting_alert(alert: DelistingAlert) -> str:
+    """Formats a single alert, see format_delisting_message."""
+    return format_delisting_message(alert.header, alert.tickers, alert.date, alert.time, alert.announcement_url)
+
+def _split_section(section: str, max_length: int) -> List[str]:
+    """
+    Splits an oversized section on line breaks, and a line that is still too
+    long (a very long ticker list) on the ticker separators, so no HTML tag
+    is ever cut in half.
+    """
+    pieces = [] # (separator before the piece, piece)
+    for line in section.split("\n"):
+        if len(line) <= max_length:
+            pieces.append(("\n", line))
+        else:
+            items = line.split(", ")
+            pieces.append(("\n", items[0]))
+            pieces.extend((", ", item) for item in items[1:])
+
+    chunks = []
+    current = None
+    for separator, piece in pieces:
+        candidate = piece if current is None else f"{current}{separator}{piece}"
+        if len(candidate) <= max_length:
+            current = candidate
+            continue
+        if current is not None:
+            chunks.append(current)
+        current = piece
+    if current is not None:
+        chunks.append(current)
+    return chunks
+
+def format_delisting_alerts(alerts: List[DelistingAlert], max_length: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """
+    Merges several alerts into as few Telegram messages as possible.
+    Args:
+        alerts: Alerts in the order they should appear.
+        max_length: Maximum length of one message.
+    Returns:
+        Messages, each one or more complete alert sections, in order. A section
+        that is longer than max_length on its own is split across messages.
+    """
+    messages = []
+    current = ""
+    for alert in alerts:
+        section = format_delisting_alert(alert)
+        candidate = f"{current}{SECTION_SEPARATOR}{section}" if current else section
+        if len(candidate) <= max_length:
+            current = candidate
+            continue
+        if current:
+            messages.append(current)
+        if len(section) <= max_length:
+            current = section
+        else:
+            *head, current = _split_section(section, max_length)
+            messages.extend(head)
+    if current:
+        messages.append(current)
+    return messages
+
+def format_delisting_reminder(reminder: DelistingReminder, max_length: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """
+    Formats a reminder about upcoming (or starting) delistings for Telegram in HTML.
+    Returns:
+        The message, split across several if the ticker list is too long for one.
+    """
+    if reminder.offset_seconds <= 0:
+        when = "сейчас"
+    elif reminder.offset_seconds % 3600 == 0:
+        when = f"через {int(reminder.offset_seconds // 3600)} ч"
+    else:
+        when = f"через {max(1, round(reminder.offset_seconds / 60))} мин"
+    deadline = datetime.fromtimestamp(reminder.deadline, timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    formatted_tickers = [f"<code>${ticker}</code>" for ticker in reminder.tickers]
+
+    message = (
+        f"⏰ <b>{reminder.header}</b> DELISTING {when}\n\n"
+        f"🪙 Монеты: {', '.join(formatted_tickers)}\n"
+        f"🕒 Время: {deadline}\n"
+        f"\n📜 <a href=\"{reminder.announcement_url}\">Читать анонс</a>"
+    )
+    if len(message) <= max_length:
+        return [message]
+    return _split_section(message, max_length)
@@ -0,0 +1,25 @@
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+class ResponseCache:
+    """
+    LRU cache of encoded responses. Every entry remembers the version of the
+    data it was built from and is only returned for that same version, so a
+    write invalidates everything at once without touching the cache.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[int, bytes]] = OrderedDict()
+
+    def get(self, key: Hashable, version: int) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Hashable, version: int, value: bytes):
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,38 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+def sample_stacks(seconds: float, interval: float = 0.01) -> Counter:
+    """
+    Samples the stacks of all other threads every interval for the given time.
+    Meant to run in its own thread: the sampled code only pays for the GIL
+    hand-offs, not for any instrumentation.
+    Returns:
+        Counter of folded stacks ("thread;outer;...;inner") to sample counts.
+    """
+    own_thread = threading.get_ident()
+    stacks = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(thread_names.get(thread_id, str(thread_id)))
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+def format_folded(stacks: Counter) -> str:
+    """Folded stack format ("stack count" per line), as read by flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import time
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+class SymbolIndex:
+    """
+    Trading pairs listed on the exchanges, for confirming ticker candidates.
+
+    Base assets are a set and pair symbols a dict from the pair to its
+    (base, quote), so checking a token costs one or two hash lookups.
+    Pairs are only ever added: a pair that was just removed from an exchange
+    is exactly what a delisting announcement talks about.
+    """
+    def __init__(self):
+        self.bases: set[str] = set()
+        self.pairs: dict[str, tuple[str, str]] = {}
+        self.updated_at: dict[str, float] = {} # source -> time of its last refresh
+        self.version = 0
+        self._quotes: tuple[str, ...] = () # longest first, for splitting unknown pairs
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def add_pairs(self, source: str, pairs: Iterable[tuple[str, str, str]], refreshed_at: Optional[float] = None) -> int:
+        """
+        Merges the trading pairs of one source (e.g. "binance_spot").
+        Args:
+            source: Name of the pair list the pairs came from.
+            pairs: (symbol, base asset, quote asset) tuples.
+            refreshed_at: Time the list was fetched, now if omitted.
+        Returns:
+            Number of pairs that were new or changed.
+        """
+        added = 0
+        quotes = set(self._quotes)
+        for symbol, base, quote in pairs:
+            symbol, base, quote = symbol.upper(), base.upper(), quote.upper()
+            if not symbol or not base or self.pairs.get(symbol) == (base, quote):
+                continue
+            self.pairs[symbol] = (base, quote)
+            self.bases.add(base)
+            if quote:
+                quotes.add(quote)
+            added += 1
+        if added:
+            self._quotes = tuple(sorted(quotes, key=len, reverse=True))
+            self.version += 1
+        self.updated_at[source] = time.time() if refreshed_at is None else refreshed_at
+        return added
+
+    def split_pair(self, token: str) -> Optional[tuple[str, str]]:
+        """
+        Splits a pair symbol (e.g. SAROSUSDT) into base and quote asset.
+        Unknown pairs are split at a known quote asset if the rest is a known base.
+        Returns:
+            (base, quote), or None if the token is not a pair of known assets.
+        """
+        pair = self.pairs.get(token)
+        if pair is not None:
+            return pair
+        for quote in self._quotes:
+            if len(token) > len(quote) and token.endswith(quote) and token[:-len(quote)] in self.bases:
+                return token[:-len(quote)], quote
+        return None
+
+    def resolve(self, token: str) -> Optional[str]:
+        """
+        Base asset named by an upper-case token: the token itself for a known
+        asset, the base asset for a pair symbol.
+        Returns:
+            The base asset, or None if the token is neither.
+        """
+        if token in self.bases:
+            return token
+        pair = self.split_pair(token)
+        return pair[0] if pair is not None else None
+
+    def snapshot(self) -> dict:
+        return {
+            "updated_at": self.updated_at,
+            "pairs": {symbol: [base, quote] for symbol, (base, quote) in self.pairs.items()}
+        }
+
+    def restore(self, snapshot: dict):
+        pairs = snapshot.get("pairs", {})
+        self.add_pairs("snapshot", ((symbol, base, quote) for symbol, (base, quote) in pairs.items()))
+        del self.updated_at["snapshot"]
+        self.updated_at.update(snapshot.get("updated_at", {}))
+
+    def load(self, path: str) -> bool:
+        """
+        Restores the index from a local snapshot file.
+        Returns:
+            False if there is no usable snapshot.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.restore(snapshot)
+        except FileNotFoundError:
+            logger.info("%s not found. Starting with an empty symbol index.", path)
+            return False
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning("Symbol index snapshot %s is damaged (%s). Starting with an empty symbol index.", path, e)
+            return False
+        return True
+
+    def save(self, path: str):
+        # Write to a temporary file first so a crash never leaves a truncated snapshot
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, separators=(',', ':'))
+        os.replace(temporary_path, path)
+
+# Shared by both parsers; filled from the snapshot at startup and refreshed in the background.
+# While it is empty the parsers fall back to their suffix and stopword heuristics.
+SYMBOL_INDEX = SymbolIndex()
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+class TokenBucket:
+    """
+    Reservation-based token bucket for use on a single event loop.
+    Each acquire() reserves one token up front, so concurrent callers are
+    queued in arrival order without polling.
+    """
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second.
+            capacity: Maximum number of tokens (burst size).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Reserves one token.
+        Returns:
+            Seconds the caller has to wait before the reserved token is available.
+        """
+        self._refill(time.monotonic())
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    def has_token(self) -> bool:
+        """True if a token is available right now, i.e. reserve() would not make the caller wait."""
+        self._refill(time.monotonic())
+        return self._tokens >= 1
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def penalize(self, seconds: float):
+        """Blocks the bucket for the given number of seconds (e.g. Telegram's retry_after)."""
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, -seconds * self.rate)
@@ -0,0 +1,92 @@
+import glob
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Iterable, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+class TrafficRecorder:
+    """
+    Append-only, rotating, gzip-compressed log of raw exchange traffic
+    (one JSON object per line: source, received_at and the raw data).
+
+    Every record is flushed as its own deflate block, so a crash loses at most
+    the record being written and read_traffic() stops cleanly at the damage.
+    Files are rotated after max_bytes of compressed output and only the newest
+    max_files files of this source are kept.
+    """
+    def __init__(self, directory: str, source: str, max_bytes: int = 64 * 1024 * 1024, max_files: int = 20):
+        self.directory = directory
+        self.source = source
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._file = None
+        self._gzip: Optional[gzip.GzipFile] = None
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self):
+        self._sequence += 1
+        name = f"{self.source}-{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{os.getpid()}-{self._sequence:04d}.jsonl.gz"
+        self._file = open(os.path.join(self.directory, name), "ab")
+        self._gzip = gzip.GzipFile(fileobj=self._file, mode="ab")
+        self._remove_old_files()
+
+    def _remove_old_files(self):
+        files = sorted(glob.glob(os.path.join(self.directory, f"{self.source}-*.jsonl.gz")), key=lambda path: (os.path.getmtime(path), path))
+        for path in files[:-self.max_files]:
+            os.remove(path)
+
+    def record(self, data: Union[str, bytes], received_at: Optional[float] = None, **fields):
+        """
+        Appends one record.
+        Args:
+            data: Raw frame or response body.
+            received_at: Wall-clock receive time, now if omitted.
+            fields: Extra JSON-serializable context (e.g. page number, HTTP status).
+        """
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", errors="replace")
+        if self._gzip is None:
+            self._open()
+        entry = {"source": self.source, "received_at": time.time() if received_at is None else received_at, **fields, "data": data}
+        self._gzip.write(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._gzip.flush()
+        if self._file.tell() >= self.max_bytes:
+            self.close()
+
+    def close(self):
+        if self._gzip is not None:
+            self._gzip.close()
+            self._file.close()
+            self._gzip = None
+            self._file = None
+
+def _read_file(path: str) -> Iterator[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.endswith("\n"):
+                    yield json.loads(line)
+        except (EOFError, gzip.BadGzipFile, json.JSONDecodeError) as e:
+            # A process that died mid-write leaves a truncated last record
+            logger.warning("%s ends with a damaged record (%s), skipping the rest of the file.", path, e)
+
+def read_traffic(paths: Iterable[str]) -> list[dict]:
+    """
+    Loads recorded traffic from log files or directories of log files.
+    Returns:
+        All records, ordered by received_at.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "*.jsonl.gz")))
+        else:
+            files.append(path)
+    records = [record for path in sorted(files) for record in _read_file(path)]
+    records.sort(key=lambda record: record["received_at"])
+    return records
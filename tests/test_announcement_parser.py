@@ -0,0 +1,48 @@
+"""
+Parser regression test: the precompiled parsers must give the same tickers,
+date and time (and the same delisting classification) as the original
+regex-per-call parsers on the corpus in fixtures/announcement_corpus.json.
+The expected values in the corpus were produced by those original parsers.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import json
+import os
+import unittest
+
+from src.utils.announcement_parser import is_delisting_text
+from src.utils.binance.binance_parser import parse_announcement_title
+from src.utils.bybit.bybit_parser import parse_description
+from src.utils.symbol_index import SymbolIndex
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "announcement_corpus.json")
+
+def load_corpus() -> dict:
+    with open(CORPUS_PATH, encoding="utf-8") as corpus_file:
+        return json.load(corpus_file)
+
+class AnnouncementParserCorpusTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = load_corpus()
+        # The original parsers had no symbol index: compare against the suffix-stripping fallback
+        cls.symbol_index = SymbolIndex()
+
+    def test_binance_titles(self):
+        for case in self.corpus["binance"]:
+            with self.subTest(title=case["title"]):
+                self.assertEqual(parse_announcement_title(case["title"], self.symbol_index), case["expected"])
+
+    def test_binance_classification(self):
+        for case in self.corpus["binance"]:
+            with self.subTest(title=case["title"]):
+                self.assertEqual(is_delisting_text(case["title"]), case["is_delisting"])
+
+    def test_bybit_descriptions(self):
+        for case in self.corpus["bybit"]:
+            with self.subTest(description=case["description"]):
+                self.assertEqual(parse_description(case["description"], self.symbol_index), case["expected"])
+
+if __name__ == "__main__":
+    unittest.main()